@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from outbound import TokenBucket
+
+# ==============================
+# ANTI-FLOOD (per-user token buckets)
+# ==============================
+# হ্যান্ডলারের সামনে বসে: প্রতিটি ইউজার + কাজের ধরনের আলাদা token bucket।
+# বাজেট শেষ হলে আপডেটটা চুপচাপ বাদ — কোনো SQLite কুয়েরি বা Bot API কল হয় না।
+# একটানা flood এ on_drop শুধু প্রথমবার ডাকা হয় (পরের টোকেন পাওয়া পর্যন্ত আর
+# নয়), তাই সতর্কবার্তাও flood হয় না। bucket গুলো LRU তে, MAX_USERS এর বেশি
+# হলে সবচেয়ে পুরোনোটা বাদ (বাদ পড়া ইউজার আবার পূর্ণ bucket পায়)।
+#   read      বাটন / কমান্ড (💰 Balance, 👥 Refer ...)
+#   step      flow এর টেক্সট ইনপুট (withdraw নম্বর/পরিমাণ ...)
+#   upload    ডকুমেন্ট (handle_file)
+#   callback  inline বাটন
+LIMITS = {                    # action: (টোকেন/সেকেন্ড, burst)
+    "read": (0.5, 6),
+    "step": (1.0, 5),
+    "upload": (1 / 20, 3),
+    "callback": (1.0, 8),
+}
+MAX_USERS = 20000
+
+
+class _Budget(TokenBucket):
+    __slots__ = ("warned",)
+
+    def __init__(self, rate: float, capacity: float):
+        super().__init__(rate, capacity)
+        self.warned = False
+
+
+def _uid(update) -> int:
+    # Message → চ্যাট (router এর মতোই), CallbackQuery → যে চাপ দিয়েছে
+    chat = getattr(update, "chat", None)
+    return chat.id if chat is not None else update.from_user.id
+
+
+class Throttle:
+    def __init__(self, limits: dict = None, max_users: int = MAX_USERS, exempt=None, on_drop=None):
+        self.limits = dict(LIMITS if limits is None else limits)
+        self.max_users = max_users
+        self.exempt = exempt          # exempt(uid) → True হলে কখনো আটকায় না (এডমিন)
+        self.on_drop = on_drop        # on_drop(update, action) — flood এর শুরুতে একবার
+        self.dropped = Counter()      # action → কয়টা বাদ গেছে
+        self._buckets = OrderedDict()  # (uid, action) → _Budget
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def allow(self, uid: int, action: str):
+        """
+        True = চলতে দাও; False = বাদ, প্রথমবার; None = বাদ, আগেই জানানো হয়েছে।
+        (দুটোই falsy)
+        """
+        if self.exempt is not None and self.exempt(uid):
+            return True
+        key = (uid, action)
+        now = time.monotonic()
+        with self._lock:
+            budget = self._buckets.get(key)
+            if budget is None:
+                budget = self._buckets[key] = _Budget(*self.limits[action])
+                if len(self._buckets) > self.max_users:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            if budget.wait_time(now) == 0:
+                budget.take()
+                budget.warned = False
+                return True
+            self.dropped[action] += 1
+            if budget.warned:
+                return None
+            budget.warned = True
+            return False
+
+    def guard(self, fn, action):
+        """
+        fn(update) এর সামনে বাজেট চেক। action একটি নাম অথবা update থেকে নাম
+        বের করার function।
+        """
+        classify = action if callable(action) else None
+
+        def guarded(update):
+            name = action if classify is None else classify(update)
+            allowed = self.allow(_uid(update), name)
+            if allowed:
+                return fn(update)
+            if allowed is False and self.on_drop is not None:
+                self.on_drop(update, name)
+        guarded.__name__ = getattr(fn, "__name__", "guarded")
+        return guarded
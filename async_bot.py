@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from telebot.async_telebot import AsyncTeleBot
+
+import bot as app
+import logs
+
+log = logging.getLogger(__name__)
+
+# ==============================
+# ASYNC ENGINE
+# ==============================
+# bot.py এর হ্যান্ডলারগুলোই এখানে চলে, শুধু নেটওয়ার্ক I/O event loop এ।
+#   - প্রতিটি আপডেট DB executor এর একটি থ্রেডে হ্যান্ডলার চালায়; সেখানে শুধু
+#     SQLite এর কাজ ব্লক করে।
+#   - হ্যান্ডলারের bot.send_message(...) ইত্যাদি AsyncBridge এর মাধ্যমে loop এ
+#     কোরুটিন হিসেবে শিডিউল হয় এবং সাথে সাথে ফেরত আসে।
+#   - একই চ্যাটের সেন্ড ক্রমানুসারে যায়, আলাদা চ্যাটের সেন্ড একসাথে (gather)।
+DB_WORKERS = int(os.getenv("DB_WORKERS", "8"))
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT", "1000"))
+
+
+def _chat_of(update):
+    if update.message:
+        return update.message.chat.id
+    if update.callback_query:
+        return update.callback_query.from_user.id
+    return None
+
+
+class _ChatChain:
+    """চ্যাট-ভিত্তিক সিরিয়াল চেইন: একই key এর কাজ আগেরটা শেষ হলে শুরু হয়।"""
+
+    def __init__(self):
+        self._tails = {}
+
+    async def run(self, key, coro):
+        prev = self._tails.get(key)
+        done = asyncio.get_running_loop().create_future()
+        self._tails[key] = done
+        try:
+            if prev is not None:
+                await prev
+            return await coro
+        finally:
+            done.set_result(None)
+            if self._tails.get(key) is done:
+                del self._tails[key]
+
+
+class AsyncBridge:
+    """
+    হ্যান্ডলার থ্রেড থেকে ডাকা সিঙ্ক API কল → AsyncTeleBot কোরুটিন।
+    আপডেট চলাকালীন কলগুলো অপেক্ষা না করে concurrent Future ফেরত দেয়;
+    একটি আপডেটের সব Future engine শেষে একসাথে await করে।
+    """
+
+    def __init__(self, abot: AsyncTeleBot, loop: asyncio.AbstractEventLoop):
+        self._abot = abot
+        self._loop = loop
+        self._chain = _ChatChain()
+        self._local = threading.local()
+        self._me = None
+
+    # ---------- per-update bookkeeping ----------
+    def begin(self):
+        self._local.pending = []
+
+    def end(self):
+        pending, self._local.pending = self._local.pending, None
+        return pending
+
+    def _call(self, name, chat_id, *args, **kwargs):
+        coro = getattr(self._abot, name)(*args, **kwargs)
+        fut = asyncio.run_coroutine_threadsafe(self._chain.run(chat_id, coro), self._loop)
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            # হ্যান্ডলারের বাইরে (যেমন outbound sender থ্রেড) → সিঙ্ক আচরণ,
+            # যাতে 429/retry_after কলারের কাছে পৌঁছায়
+            return fut.result()
+        pending.append(fut)
+        return fut
+
+    # ---------- API surface used by bot.py ----------
+    def send_message(self, chat_id, text, **kwargs):
+        return self._call("send_message", chat_id, chat_id, text, **kwargs)
+
+    def send_document(self, chat_id, document, **kwargs):
+        return self._call("send_document", chat_id, chat_id, document, **kwargs)
+
+    def edit_message_text(self, text, chat_id=None, message_id=None, **kwargs):
+        return self._call("edit_message_text", chat_id, text, chat_id=chat_id, message_id=message_id, **kwargs)
+
+    def answer_callback_query(self, callback_query_id, text=None, **kwargs):
+        # callback উত্তর কোনো চ্যাটের ক্রমে আটকে থাকার দরকার নেই
+        return self._call("answer_callback_query", ("cbq", callback_query_id), callback_query_id, text, **kwargs)
+
+    def get_me(self):
+        # রেফার লিঙ্কে ইউজারনেম লাগে, তাই এটি ব্লকিং — একবার এনে ক্যাশ
+        if self._me is None:
+            self._me = asyncio.run_coroutine_threadsafe(self._abot.get_me(), self._loop).result()
+        return self._me
+
+
+class AsyncEngine:
+    def __init__(self, token: str, db_workers: int = DB_WORKERS, max_in_flight: int = MAX_IN_FLIGHT):
+        self.abot = AsyncTeleBot(token)
+        # bot.py এর TeleBot শুধু হ্যান্ডলার রেজিস্ট্রি/ফিল্টার হিসেবে ব্যবহার হয়
+        self.dispatcher = app.create_app().bot
+        self.dispatcher.threaded = False
+        self.db_executor = ThreadPoolExecutor(max_workers=db_workers, thread_name_prefix="db")
+        self.max_in_flight = max_in_flight
+        self.bridge = None
+        self._updates = _ChatChain()
+
+    def _run_handlers(self, update):
+        self.bridge.begin()
+        try:
+            self.dispatcher.process_new_updates([update])
+        except Exception:
+            log.exception("Handler error")
+        return self.bridge.end()
+
+    async def _process(self, update, slots: asyncio.Semaphore):
+        try:
+            loop = asyncio.get_running_loop()
+            pending = await loop.run_in_executor(self.db_executor, self._run_handlers, update)
+            if pending:
+                results = await asyncio.gather(*map(asyncio.wrap_future, pending), return_exceptions=True)
+                for r in results:
+                    if isinstance(r, Exception):
+                        log.error("API error", exc_info=r)
+        except Exception:
+            log.exception("Update %s failed", update.update_id)
+        finally:
+            slots.release()
+
+    async def run(self, timeout: int = 20):
+        loop = asyncio.get_running_loop()
+        self.bridge = AsyncBridge(self.abot, loop)
+        app.bot = self.bridge
+        app.outbound.api = self.bridge
+        app.start_background_jobs()
+        slots = asyncio.Semaphore(self.max_in_flight)
+        offset = None
+        try:
+            while True:
+                try:
+                    updates = await self.abot.get_updates(offset=offset, timeout=timeout)
+                except Exception:
+                    log.exception("getUpdates failed")
+                    await asyncio.sleep(1)
+                    continue
+                for update in updates:
+                    offset = update.update_id + 1
+                    await slots.acquire()
+                    # একই ইউজারের আপডেট ক্রমানুসারে, আলাদা ইউজার একসাথে
+                    loop.create_task(self._updates.run(_chat_of(update), self._process(update, slots)))
+        finally:
+            app.bot = self.dispatcher
+            app.outbound.api = self.dispatcher
+            self.db_executor.shutdown(wait=False)
+            await self.abot.close_session()
+
+
+if __name__ == "__main__":
+    logs.setup()
+    print("🤖 Bot is running (async)...")
+    app.create_app()
+    asyncio.run(AsyncEngine(app.TOKEN).run())
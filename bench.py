@@ -0,0 +1,490 @@
+"""
+লোকাল মাইক্রো-বেঞ্চমার্ক — নেটওয়ার্ক বা আসল টোকেন লাগে না।
+
+    python bench.py dispatch
+    python bench.py indexes [-n 1000000]
+    python bench.py referral [-n 100000]
+    python bench.py gmail [--sizes 10000 100000 1000000]
+    python bench.py stats [-n 1000000]
+    python bench.py metrics
+    python bench.py signups [-n 20000] [--threads 16]
+    python bench.py startup [--rounds 5]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import telebot
+from telebot import types
+
+import gmail_index
+import ledger
+import migrations
+import referral
+import stats
+from db import Database
+from metrics import Metrics
+from router import Router
+
+ADMIN = 1
+
+
+def _message(uid: int, text: str, n: int) -> types.Message:
+    return types.Message.de_json({
+        "message_id": n, "date": 0, "text": text,
+        "chat": {"id": uid, "type": "private"},
+        "from": {"id": uid, "is_bot": False, "first_name": "u"},
+    })
+
+
+def _timeit(fn, items, rounds: int) -> float:
+    """প্রতি আইটেমে গড় সময় (µs)।"""
+    best = float("inf")
+    for _ in range(rounds):
+        t = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - t)
+    return best / len(items) * 1e6
+
+
+# ==============================
+# dispatch: lambda-filter chain vs dict router
+# ==============================
+USER_BUTTONS = ["💰 Balance", "👥 Refer", "💵 Withdraw", "💌 Support group 🛑", "🎁 Create Gmail"]
+ADMIN_BUTTONS = ["📋 All Requests", "👥 User List", "📂 Task Requests"]
+FLOW_BUTTONS = ["➕ Add Balance", "✏️ Set Balance", "➖ Reduce Balance", "⚙️ Set Task Price"]
+
+
+def _noop(*_):
+    pass
+
+
+def _filter_chain_bot() -> telebot.TeleBot:
+    """পুরোনো bot.py এর মতো: প্রতি বাটনে একটি lambda ফিল্টার + শেষে catch-all সিঁড়ি।"""
+    tb = telebot.TeleBot("1:bench", threaded=False)
+    withdraw_steps, admin_steps = {}, {}
+
+    def catch_all(m):
+        uid, text = m.chat.id, m.text
+        if uid in withdraw_steps:
+            return
+        if uid == ADMIN:
+            for action, button in zip(["add", "set", "reduce", "set_task_price"], FLOW_BUTTONS):
+                if text == button:
+                    return
+                if admin_steps.get(uid, {}).get("action") == action:
+                    return
+
+    tb.register_message_handler(_noop, commands=["start"])
+    for b in USER_BUTTONS:
+        tb.register_message_handler(_noop, func=lambda m, b=b: m.text == b)
+    tb.register_message_handler(_noop, content_types=["document"])
+    tb.register_message_handler(_noop, commands=["admin"])
+    for b in ADMIN_BUTTONS:
+        tb.register_message_handler(_noop, func=lambda m, b=b: m.text == b and m.chat.id == ADMIN)
+    tb.register_message_handler(_noop, func=lambda m: m.text == "⬅️ Back")
+    tb.register_message_handler(catch_all, func=lambda m: True)
+    return tb
+
+
+def _router_bot(metrics=None) -> telebot.TeleBot:
+    tb = telebot.TeleBot("1:bench", threaded=False)
+    router = Router(is_admin=lambda uid: uid == ADMIN, metrics=metrics)
+    router.command("start")(_noop)
+    router.command("admin")(_noop)
+    router.button(*USER_BUTTONS)(_noop)
+    router.button(*ADMIN_BUTTONS, admin=True)(_noop)
+    router.button(*FLOW_BUTTONS, admin=True)(_noop)
+    router.button("⬅️ Back")(_noop)
+    tb.register_message_handler(_noop, content_types=["document"])
+    tb.register_message_handler(router.dispatch_message, content_types=["text"])
+    return tb
+
+
+def bench_dispatch(n: int, rounds: int):
+    texts = USER_BUTTONS + ["/start", "⬅️ Back", "hello", "017XXXXXXXX"] + ADMIN_BUTTONS + FLOW_BUTTONS
+    msgs = [_message(ADMIN if i % 5 == 0 else 1000 + i, texts[i % len(texts)], i) for i in range(n)]
+    for name, tb in [("lambda chain", _filter_chain_bot()), ("dict router", _router_bot())]:
+        us = _timeit(lambda m: tb.process_new_messages([m]), msgs, rounds)
+        print(f"{name:>14}: {us:7.2f} µs/update")
+
+
+# ==============================
+# indexes: hot queries before/after migration 3
+# ==============================
+HOT_QUERIES = [
+    ("pending tasks", "SELECT id, user_id, username, file_id FROM tasks "
+                      "WHERE status='Pending' ORDER BY id DESC LIMIT 15", lambda n: ()),
+    ("pending withdraws", "SELECT id, user_id, amount FROM withdraws "
+                          "WHERE status='Pending' ORDER BY id DESC LIMIT 10", lambda n: ()),
+    ("user withdraws", "SELECT COUNT(*), COALESCE(SUM(amount), 0) FROM withdraws WHERE user_id=?",
+     lambda n: (random.randrange(1, n),)),
+    ("referrals of user", "SELECT COUNT(*) FROM users WHERE refer_by=?",
+     lambda n: (random.randrange(1, n),)),
+]
+
+
+def _fill(db: Database, n: int):
+    """n ইউজার, n টাস্ক, n/4 withdraw — বেশিরভাগ প্রসেসড, অল্প কিছু Pending (বাস্তবের মতো)।"""
+    rnd = random.Random(1)
+    status = lambda: "Pending" if rnd.random() < 0.001 else rnd.choice(["Approved", "Rejected"])
+    with db.write() as w:
+        w.executemany("INSERT INTO users (user_id, balance, refer_by) VALUES (?,?,?)",
+                      ((u, rnd.randrange(500), rnd.randrange(1, u) if u > 1 and rnd.random() < 0.3 else None)
+                       for u in range(1, n + 1)))
+        w.executemany("INSERT INTO tasks (user_id, username, file_id, status) VALUES (?,?,?,?)",
+                      ((rnd.randrange(1, n), "u", "f", status()) for _ in range(n)))
+        w.executemany("INSERT INTO withdraws (user_id, method, number, amount, status) VALUES (?,?,?,?,?)",
+                      ((rnd.randrange(1, n), "📲 Bkash", "017", 50, status()) for _ in range(n // 4)))
+
+
+def bench_indexes(n: int, rounds: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        upto = migrations.MIGRATIONS.index(migrations.m003_hot_path_indexes)
+        base = migrations.MIGRATIONS[:upto]
+        db.migrate(base)
+        t = time.perf_counter()
+        _fill(db, n)
+        print(f"filled {n:,} rows in {time.perf_counter() - t:.1f}s")
+
+        results = {}
+        for label, migs in [("no index", base), ("indexed", migrations.MIGRATIONS[:upto + 1])]:
+            db.migrate(migs)
+            db.reader.execute("ANALYZE")
+            for name, sql, params in HOT_QUERIES:
+                args = [params(n) for _ in range(20)]
+                results.setdefault(name, []).append(_timeit(lambda p: db.fetchall(sql, p), args, rounds))
+        db.close()
+
+    print(f"{'':>18}  {'no index':>12}  {'indexed':>12}")
+    for name, (before, after) in results.items():
+        print(f"{name:>18}  {before / 1000:9.2f} ms  {after / 1000:9.2f} ms  (x{before / after:,.0f})")
+
+
+# ==============================
+# referral: per-credit bonus vs batched settlement
+# ==============================
+class _Sink:
+    """outbound / outbox এর বদলে — শুধু কয়টা মেসেজ যেত তা গোনে।"""
+    def __init__(self):
+        self.sent = 0
+
+    def send(self, chat_id, text, **kw):
+        self.sent += 1
+
+    def add(self, w, chat_id, text):
+        self.sent += 1
+
+
+def _referral_db(path: str, referred: int, referrers: int) -> Database:
+    db = Database(path)
+    db.migrate(migrations.MIGRATIONS)
+    with db.write() as w:
+        w.executemany("INSERT INTO users (user_id) VALUES (?)", ((r,) for r in range(1, referrers + 1)))
+        w.executemany("INSERT INTO users (user_id, refer_by) VALUES (?,?)",
+                      ((referrers + 1 + u, u % referrers + 1) for u in range(referred)))
+    return db
+
+
+def _per_credit_bonus(db, sink, target: int, amount: int, percent: float):
+    """আগের apply_ref_bonus_if_increase: প্রতি ক্রেডিটে SELECT + আলাদা commit + মেসেজ।"""
+    with db.write() as w:
+        ledger.post(w, target, amount, ledger.ADMIN_ADD)
+    referrer = db.fetchone("SELECT refer_by FROM users WHERE user_id=?", (target,))[0]
+    bonus = int(amount * percent)
+    if bonus > 0:
+        with db.write() as w:
+            ledger.post(w, referrer, bonus, ledger.REF_BONUS, ref=f"user:{target}")
+            w.execute("UPDATE users SET ref_earn = ref_earn + ? WHERE user_id=?", (bonus, referrer))
+        sink.send(referrer, "")
+
+
+def _accrue_credit(db, target: int, amount: int, percent: float):
+    with db.write() as w:
+        ledger.post(w, target, amount, ledger.ADMIN_ADD)
+        referral.accrue(w, target, amount, percent)
+
+
+def bench_referral(n: int, referred: int, referrers: int):
+    rnd = random.Random(1)
+    credits = [(referrers + 1 + rnd.randrange(referred), rnd.randrange(1, 100)) for _ in range(n)]
+    percent = 0.03
+    with tempfile.TemporaryDirectory() as tmp:
+        sink = _Sink()
+        db = _referral_db(os.path.join(tmp, "old.db"), referred, referrers)
+        t = time.perf_counter()
+        for target, amount in credits:
+            _per_credit_bonus(db, sink, target, amount, percent)
+        old_time, old_sent = time.perf_counter() - t, sink.sent
+        old_paid = db.fetchone("SELECT SUM(ref_earn) FROM users")[0]
+        db.close()
+
+        sink = _Sink()
+        db = _referral_db(os.path.join(tmp, "new.db"), referred, referrers)
+        t = time.perf_counter()
+        for target, amount in credits:
+            _accrue_credit(db, target, amount, percent)
+        accrue_time = time.perf_counter() - t
+        t = time.perf_counter()
+        referral.Settler(db, sink).settle()
+        settle_time = time.perf_counter() - t
+        new_paid = db.fetchone("SELECT SUM(ref_earn) FROM users")[0]
+        db.close()
+
+    exact = sum(amount for _, amount in credits) * percent
+    print(f"{n:,} credits, {referred:,} referred users, {referrers:,} referrers")
+    print(f"  per-credit : {old_time:6.2f}s  {old_sent:>7,} messages  bonus paid {old_paid:,}৳")
+    print(f"  batched    : {accrue_time + settle_time:6.2f}s  {sink.sent:>7,} messages  bonus paid {new_paid:,}৳"
+          f"  (settle {settle_time * 1000:.0f} ms)")
+    print(f"  exact 3%   : {exact:,.2f}৳ (বাকি ভগ্নাংশ pending এ থাকে)")
+
+
+# ==============================
+# gmail: duplicate lookup cost vs index size
+# ==============================
+def bench_gmail(sizes, batch: int, rounds: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        db.migrate(migrations.MIGRATIONS)
+        index = gmail_index.GmailIndex(db, capacity=max(sizes))
+        filled = 0
+        print(f"{'index size':>12}  {'new (bloom miss)':>17}  {'duplicate (db hit)':>19}")
+        for size in sizes:
+            with db.write() as w:
+                w.executemany("INSERT INTO gmail_index (address, task_id) VALUES (?, 0)",
+                              ((f"user{i}@gmail.com",) for i in range(filled, size)))
+            filled = size
+            index._bloom = None   # টেবিল থেকে আবার লোড
+            fresh = [f"new{size}x{i}@gmail.com" for i in range(batch)]
+            dupes = [f"user{random.randrange(size)}@gmail.com" for _ in range(batch)]
+            us_new = _timeit(index.__contains__, fresh, rounds)
+            us_dup = _timeit(index.__contains__, dupes, rounds)
+            print(f"{size:>12,}  {us_new:14.2f} µs  {us_dup:16.2f} µs")
+        db.close()
+
+
+# ==============================
+# stats: full-table aggregates vs trigger-maintained counters
+# ==============================
+DASHBOARD_AGGREGATES = """
+    SELECT (SELECT COUNT(*) FROM users), (SELECT COALESCE(SUM(balance), 0) FROM users),
+           (SELECT COUNT(*) FROM withdraws WHERE status='Pending'),
+           (SELECT COALESCE(SUM(amount), 0) FROM withdraws WHERE status='Pending'),
+           (SELECT COUNT(*) FROM withdraws WHERE status='Approved'),
+           (SELECT COALESCE(SUM(amount), 0) FROM withdraws WHERE status='Approved'),
+           (SELECT COUNT(*) FROM tasks WHERE status='Pending')
+"""
+
+
+def bench_stats(n: int, rounds: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        fills = {}
+        for label, upto in [("no triggers", migrations.MIGRATIONS.index(migrations.m010_stats)),
+                            ("triggers", len(migrations.MIGRATIONS))]:
+            db = Database(os.path.join(tmp, f"{upto}.db"))
+            db.migrate(migrations.MIGRATIONS[:upto])
+            t = time.perf_counter()
+            _fill(db, n)
+            fills[label] = time.perf_counter() - t
+            if label == "triggers":
+                db.reader.execute("ANALYZE")
+                full = _timeit(lambda _: db.fetchone(DASHBOARD_AGGREGATES), range(5), rounds)
+                counters = _timeit(lambda _: stats.snapshot(db), range(200), rounds)
+                t = time.perf_counter()
+                mismatches = stats.check(db, repair=False)
+                took = time.perf_counter() - t
+            db.close()
+
+    print(f"fill {n:,} users/tasks + {n // 4:,} withdraws: "
+          + ", ".join(f"{label} {s:.1f}s" for label, s in fills.items()))
+    print(f"dashboard, full aggregates: {full / 1000:9.2f} ms")
+    print(f"dashboard, stats table:     {counters / 1000:9.2f} ms  (x{full / counters:,.0f})")
+    print(f"consistency check:          {took * 1000:9.0f} ms  ({len(mismatches)} mismatches)")
+
+
+# ==============================
+# metrics: instrumentation overhead
+# ==============================
+def bench_metrics(n: int, rounds: int):
+    m = Metrics(enabled=True)
+    us = _timeit(lambda s: m.observe("db", "SELECT users", s), [i * 1e-6 for i in range(n)], rounds)
+    print(f"{'observe()':>22}: {us:7.2f} µs")
+
+    texts = USER_BUTTONS + ["/start", "hello"] + ADMIN_BUTTONS
+    msgs = [_message(ADMIN if i % 5 == 0 else 1000 + i, texts[i % len(texts)], i) for i in range(n)]
+    for label, metrics in [("dispatch", None), ("dispatch + metrics", m)]:
+        tb = _router_bot(metrics)
+        us = _timeit(lambda msg: tb.process_new_messages([msg]), msgs, rounds)
+        print(f"{label:>22}: {us:7.2f} µs/update")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, metrics in [("PK read", None), ("PK read + metrics", m)]:
+            db = Database(os.path.join(tmp, "bench.db"), metrics=metrics)
+            db.migrate(migrations.MIGRATIONS)
+            with db.write() as w:
+                w.executemany("INSERT OR IGNORE INTO users (user_id, balance) VALUES (?, 0)", ((u,) for u in range(n)))
+            ids = [random.randrange(n) for _ in range(n)]
+            us = _timeit(lambda u: db.fetchone("SELECT balance FROM users WHERE user_id=?", (u,)), ids, rounds)
+            print(f"{label:>22}: {us:7.2f} µs/query")
+            db.close()
+
+
+# ==============================
+# signups: one commit per /start vs group commit
+# ==============================
+def _signup(user_id: int, referrer_id: int):
+    def signup(w):
+        w.execute("INSERT OR IGNORE INTO users (user_id, created_at) VALUES (?, ?)", (user_id, time.time()))
+        return referral.attach(w, user_id, referrer_id, 5)
+    return signup
+
+
+def bench_signups(n: int, threads: int):
+    print(f"{n:,} /start <ref> signups from {threads} threads")
+    with tempfile.TemporaryDirectory() as tmp:
+        for sync in ("NORMAL", "FULL"):
+            for label in ("db.write()", "db.run()"):
+                db = Database(os.path.join(tmp, f"{sync}{label}.db"))
+                db.migrate(migrations.MIGRATIONS)
+                db._writer.execute(f"PRAGMA synchronous = {sync}")
+                ids = iter(range(1000, 1000 + n))
+                lock = threading.Lock()
+
+                def worker():
+                    while True:
+                        with lock:
+                            user_id = next(ids, None)
+                        if user_id is None:
+                            return
+                        fn = _signup(user_id, 1 + user_id % 100)
+                        if label == "db.run()":
+                            db.run(fn)
+                        else:
+                            with db.write() as w:
+                                fn(w)
+
+                pool = [threading.Thread(target=worker) for _ in range(threads)]
+                t = time.perf_counter()
+                for th in pool:
+                    th.start()
+                for th in pool:
+                    th.join()
+                took = time.perf_counter() - t
+                attached = db.fetchone("SELECT COUNT(*) FROM users WHERE refer_by IS NOT NULL")[0]
+                batch = f"avg batch {db.batched / db.batches:5.1f}" if db.batches else ""
+                print(f"  synchronous={sync:<6} {label:>10}: {n / took:8,.0f} signups/s  "
+                      f"({attached:,} attached)  {batch}")
+                db.close()
+
+
+# ==============================
+# startup: import bot vs create_app (cold process)
+# ==============================
+_STARTUP = """
+import json, sys, time
+t = time.perf_counter()
+import bot
+imported = time.perf_counter()
+bot.create_app(bot.Config(token="1:bench", db_path=sys.argv[1]))
+print(json.dumps([imported - t, time.perf_counter() - imported]))
+"""
+
+
+def _cold_start(db_path: str):
+    """নতুন interpreter এ (import সময়, create_app সময়, পুরো প্রসেসের সময়)।"""
+    env = dict(os.environ, BOT_TOKEN="1:bench")
+    t = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", _STARTUP, db_path], cwd=os.path.dirname(os.path.abspath(__file__)),
+                         env=env, capture_output=True, text=True, check=True).stdout
+    wall = time.perf_counter() - t
+    return (*json.loads(out.strip().splitlines()[-1]), wall)
+
+
+def _old_main_menu():
+    # আগের send_main_menu: প্রতি কলে নতুন কীবোর্ড
+    kb = types.ReplyKeyboardMarkup(resize_keyboard=True)
+    kb.add(types.KeyboardButton("💰 Balance"), types.KeyboardButton("👥 Refer"))
+    kb.add(types.KeyboardButton("💵 Withdraw"))
+    kb.add(types.KeyboardButton("🎁 Create Gmail"), types.KeyboardButton("💌 Support group 🛑"))
+    return kb
+
+
+def bench_startup(rounds: int):
+    print(f"cold start, median of {rounds} fresh processes")
+    with tempfile.TemporaryDirectory() as tmp:
+        fresh = [_cold_start(os.path.join(tmp, f"fresh{i}.db")) for i in range(rounds)]
+        existing = os.path.join(tmp, "existing.db")
+        _cold_start(existing)
+        warm = [_cold_start(existing) for _ in range(rounds)]
+    for label, runs in (("new DB", fresh), ("migrated DB", warm)):
+        imported, created, wall = (statistics.median(col) * 1000 for col in zip(*runs))
+        print(f"  {label:>12}: import bot {imported:7.1f} ms  create_app {created:6.1f} ms  "
+              f"process {wall:7.1f} ms")
+
+    import bot
+
+    items = range(20000)
+    rebuild = _timeit(lambda _: _old_main_menu().to_json(), items, 3)
+    prebuilt = _timeit(lambda _: bot.MAIN_MENU.to_json(), items, 3)
+    print(f"  main menu markup per send: rebuilt {rebuild:.2f} µs, prebuilt {prebuilt:.2f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("dispatch", help="বাটন/টেক্সট ডিসপ্যাচ খরচ")
+    p.add_argument("-n", type=int, default=20000)
+    p.add_argument("--rounds", type=int, default=3)
+    p = sub.add_parser("indexes", help="million-row DB এ হট কুয়েরি, ইনডেক্স ছাড়া বনাম সহ")
+    p.add_argument("-n", type=int, default=1_000_000)
+    p.add_argument("--rounds", type=int, default=3)
+    p = sub.add_parser("referral", help="প্রতি-ক্রেডিট রেফার বোনাস বনাম batched settlement")
+    p.add_argument("-n", type=int, default=100_000)
+    p.add_argument("--referred", type=int, default=10_000)
+    p.add_argument("--referrers", type=int, default=1_000)
+    p = sub.add_parser("gmail", help="ডুপ্লিকেট-Gmail lookup খরচ, index বড় হওয়ার সাথে")
+    p.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    p.add_argument("--batch", type=int, default=5000)
+    p.add_argument("--rounds", type=int, default=3)
+    p = sub.add_parser("metrics", help="handler/DB instrumentation এর খরচ")
+    p.add_argument("-n", type=int, default=20000)
+    p.add_argument("--rounds", type=int, default=3)
+    p = sub.add_parser("stats", help="ড্যাশবোর্ড: full-table aggregate বনাম stats টেবিল")
+    p.add_argument("-n", type=int, default=1_000_000)
+    p.add_argument("--rounds", type=int, default=3)
+    p = sub.add_parser("signups", help="প্রতি /start আলাদা commit বনাম group commit")
+    p.add_argument("-n", type=int, default=20000)
+    p.add_argument("--threads", type=int, default=16)
+    p = sub.add_parser("startup", help="import bot বনাম create_app — নতুন প্রসেসে cold start")
+    p.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.cmd == "dispatch":
+        bench_dispatch(args.n, args.rounds)
+    elif args.cmd == "indexes":
+        bench_indexes(args.n, args.rounds)
+    elif args.cmd == "referral":
+        bench_referral(args.n, args.referred, args.referrers)
+    elif args.cmd == "gmail":
+        bench_gmail(args.sizes, args.batch, args.rounds)
+    elif args.cmd == "metrics":
+        bench_metrics(args.n, args.rounds)
+    elif args.cmd == "stats":
+        bench_stats(args.n, args.rounds)
+    elif args.cmd == "signups":
+        bench_signups(args.n, args.threads)
+    elif args.cmd == "startup":
+        bench_startup(args.rounds)
+
+
+if __name__ == "__main__":
+    main()
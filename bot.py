@@ -1,266 +1,291 @@
+import argparse
+import logging
 import os
-import sqlite3
+import sys
+import threading
+import time
 import telebot
 from telebot import types
 
+import antiflood
+import broadcast
+import conversation
+import decisions
+import export
+import gmail_index
+import ledger
+import logs
+import migrations
+import referral
+import stats
+import task_files
+from db import Database
+from metrics import Metrics
+from outbound import Outbound
+from outbox import Outbox
+from paging import KeysetPager
+from router import Router
+from settings import Settings
+
+log = logging.getLogger(__name__)
+
 # ==============================
 # CONFIG
 # ==============================
 TOKEN = os.getenv("BOT_TOKEN",)
 ADMIN_ID = 7922495578  # <-- তোমার এডমিন numeric ID
-bot = telebot.TeleBot(TOKEN)
-
-# ==============================
-# DATABASE
-# ==============================
-conn = sqlite3.connect("bot.db", check_same_thread=False)
-cursor = conn.cursor()
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS users (
-    user_id   INTEGER PRIMARY KEY,
-    balance   INTEGER DEFAULT 0,
-    refer_by  INTEGER,
-    ref_count INTEGER DEFAULT 0,
-    ref_earn  INTEGER DEFAULT 0
-)
-""")
-
-# নিরাপদে (IF NOT EXISTS) আলাদা আলাদা কলাম যোগ করার চেষ্টা — পুরোনো DB থাকলেও চলবে
-for alter_sql in [
-    "ALTER TABLE users ADD COLUMN refer_by INTEGER",
-    "ALTER TABLE users ADD COLUMN ref_count INTEGER DEFAULT 0",
-    "ALTER TABLE users ADD COLUMN ref_earn INTEGER DEFAULT 0"
-]:
-    try:
-        cursor.execute(alter_sql)
-    except Exception:
-        pass
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS withdraws (
-    id      INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id INTEGER,
-    method  TEXT,
-    number  TEXT,
-    amount  INTEGER,
-    status  TEXT DEFAULT 'Pending'
-)
-""")
-
-# টাস্ক সাবমিশনের জন্য টেবিল
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS tasks (
-    id       INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id  INTEGER,
-    username TEXT,
-    file_id  TEXT,
-    status   TEXT DEFAULT 'Pending'
-)
-""")
-
-# settings টেবিল (task_price ইত্যাদি স্টোর করার জন্য)
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS settings (
-    key TEXT PRIMARY KEY,
-    value TEXT
-)
-""")
-# ডিফল্ট task_price ইনসার্ট (যদি না থাকে)
-cursor.execute("INSERT OR IGNORE INTO settings (key, value) VALUES ('task_price', '7')")
-
-conn.commit()
-
-# ==============================
-# STATE
-# ==============================
-withdraw_steps = {}  # {user_id: {step, method, number}}
-admin_steps = {}     # {admin_id: {action, step, target_id, old_balance}}
+# 1 হলে অর্ধেক-করা withdraw/এডমিন flow রিস্টার্টের পরও থাকে (SQLite এ সেভ)
+PERSIST_FLOWS = os.getenv("PERSIST_FLOWS", "0") == "1"
+DB_PATH = os.getenv("BOT_DB", "bot.db")
+
+
+class Config:
+    """create_app() এর ইনপুট — যেটা দেওয়া নেই সেটা উপরের env/ডিফল্ট মান।"""
+    __slots__ = ("token", "admin_id", "db_path", "persist_flows")
+
+    def __init__(self, token: str = None, admin_id: int = None, db_path: str = None, persist_flows: bool = None):
+        self.token = TOKEN if token is None else token
+        self.admin_id = ADMIN_ID if admin_id is None else admin_id
+        self.db_path = DB_PATH if db_path is None else db_path
+        self.persist_flows = PERSIST_FLOWS if persist_flows is None else persist_flows
+
+    def _values(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return isinstance(other, Config) and self._values() == other._values()
+
+    def __repr__(self):
+        return "Config(" + ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__ if name != "token") + ")"
+
+
+# handler / SQLite / Bot API এর সময় মাপা (metrics.py) — METRICS=0 দিলে বন্ধ
+metrics = Metrics()
+
+# ==============================
+# APP OBJECTS (create_app এ তৈরি)
+# ==============================
+# import করলে কোনো TeleBot, DB ফাইল বা migration হয় না — হ্যান্ডলার শুধু
+# router এর টেবিলে বসে। নিচের সবকিছু create_app(config) জোড়া লাগায়।
+app_config = None       # যে Config দিয়ে create_app হয়েছে
+bot = None              # telebot.TeleBot
+outbound = None         # সব মেসেজ rate-limited queue দিয়ে যায় (outbound.py)
+db = None               # Database (config.db_path)
+settings = None         # সব সেটিং একবার লোড হয়ে মেমোরিতে থাকে (settings.py)
+broadcaster = None
+outbox = None           # টাকা/স্ট্যাটাস বদলের নোটিফিকেশন, transaction এর সাথে (outbox.py)
+ref_settler = None      # রেফারেল বোনাস জমে থাকে, পর্যায়ক্রমে একসাথে সেটল হয় (referral.py)
+gmails = None
+task_checker = None
+submitted_files = None
+exporter = None
+withdraw_pager = task_pager = user_pager = None
+PAGERS = {}
+
+# ==============================
+# ROUTER + STATE
+# ==============================
+# বাটন/কমান্ড/callback → handler সরাসরি dict lookup (router.py);
+# withdraw ও এডমিন flow এর per-user state TTL-সীমিত StateStore এ (conversation.py)
+def deny_callback(call: types.CallbackQuery):
+    bot.answer_callback_query(call.id, "অনুমতি নেই")
+
+# flows এখানে মেমোরিতে; PERSIST_FLOWS হলে create_app DB-সহ StateStore বসায়
+router = Router(is_admin=lambda uid: uid == ADMIN_ID, on_denied=deny_callback, metrics=metrics)
+
+# ==============================
+# ANTI-FLOOD
+# ==============================
+# প্রতি ইউজার ও কাজের ধরনে token bucket (antiflood.py) — বাড়তি আপডেট
+# handler, SQLite বা Bot API পর্যন্ত পৌঁছায় না। এডমিন বাদ।
+def flood_action(message: types.Message) -> str:
+    text = message.text or ""
+    if text.startswith("/") or text in router.buttons:
+        return "read"
+    return "step"
+
+def flood_notice(update, action: str):
+    # ফাইল বা withdraw ইনপুট নীরবে হারালে ইউজার বিভ্রান্ত হয় — flood এর শুরুতে একবার জানাই
+    if action in ("upload", "step"):
+        outbound.send(update.chat.id, "⏳ একটু ধীরে — কয়েক সেকেন্ড পর আবার পাঠান।")
+
+flood = antiflood.Throttle(exempt=router.is_admin, on_drop=flood_notice)
 
 # ==============================
 # SETTINGS HELPERS
 # ==============================
 def get_setting(key: str, default=None):
-    cursor.execute("SELECT value FROM settings WHERE key=?", (key,))
-    row = cursor.fetchone()
-    return row[0] if row else default
+    # মেমোরি ক্যাশ থেকে — কোনো DB কুয়েরি নয়
+    return settings.get(key, default)
 
-def set_setting(key: str, value: str):
-    cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
-    conn.commit()
+def set_setting(key: str, value):
+    return settings.set(key, value)
 
 # ==============================
 # HELPERS
 # ==============================
+# মেনু দুটো বদলায় না — একবারই বানানো, প্রতি /start বা Back এ নয়
+MAIN_MENU = types.ReplyKeyboardMarkup(resize_keyboard=True)
+# প্রথম লাইন
+MAIN_MENU.add(types.KeyboardButton("💰 Balance"), types.KeyboardButton("👥 Refer"))
+# দ্বিতীয় লাইন
+MAIN_MENU.add(types.KeyboardButton("💵 Withdraw"))
+# তৃতীয় লাইন (নতুন)
+MAIN_MENU.add(types.KeyboardButton("🎁 Create Gmail"), types.KeyboardButton("💌 Support group 🛑"))
+
+ADMIN_MENU = types.ReplyKeyboardMarkup(resize_keyboard=True)
+ADMIN_MENU.add(types.KeyboardButton("➕ Add Balance"), types.KeyboardButton("✏️ Set Balance"))
+ADMIN_MENU.add(types.KeyboardButton("➖ Reduce Balance"), types.KeyboardButton("📋 All Requests"))
+ADMIN_MENU.add(types.KeyboardButton("👥 User List"), types.KeyboardButton("📂 Task Requests"))
+ADMIN_MENU.add(types.KeyboardButton("⚙️ Set Task Price"), types.KeyboardButton("📣 Broadcast"))
+ADMIN_MENU.add(types.KeyboardButton("📊 Dashboard"), types.KeyboardButton("📤 Export"))
+ADMIN_MENU.add(types.KeyboardButton("⬅️ Back"))
+
 def send_main_menu(uid: int):
-    kb = types.ReplyKeyboardMarkup(resize_keyboard=True)
-    # প্রথম লাইন
-    kb.add(types.KeyboardButton("💰 Balance"), types.KeyboardButton("👥 Refer"))
-    # দ্বিতীয় লাইন
-    kb.add(types.KeyboardButton("💵 Withdraw"))
-    # তৃতীয় লাইন (নতুন)
-    kb.add(types.KeyboardButton("🎁 Create Gmail"), types.KeyboardButton("💌 Support group 🛑"))
-    bot.send_message(uid, "👋 মেনু থেকে একটি অপশন সিলেক্ট করুন:", reply_markup=kb)
+    outbound.send(uid, "👋 মেনু থেকে একটি অপশন সিলেক্ট করুন:", reply_markup=MAIN_MENU)
 
 def send_admin_menu(uid: int):
-    kb = types.ReplyKeyboardMarkup(resize_keyboard=True)
-    kb.add(types.KeyboardButton("➕ Add Balance"), types.KeyboardButton("✏️ Set Balance"))
-    kb.add(types.KeyboardButton("➖ Reduce Balance"), types.KeyboardButton("📋 All Requests"))
-    kb.add(types.KeyboardButton("👥 User List"), types.KeyboardButton("📂 Task Requests"))
-    kb.add(types.KeyboardButton("⚙️ Set Task Price"))  # নতুন
-    kb.add(types.KeyboardButton("⬅️ Back"))
-    bot.send_message(uid, "🔐 Admin Panel:", reply_markup=kb)
-
-def send_withdraw_card_to_admin(row):
-    """row: (id, user_id, method, number, amount, status)"""
-    req_id, u_id, method, number, amount, status = row
-    text = (f"🆔 {req_id} | 👤 {u_id}\n"
-            f"💳 {method} ({number})\n"
-            f"💵 {amount}৳ | 📌 {status}")
-    if status == "Pending":
-        ikb = types.InlineKeyboardMarkup()
-        ikb.add(
-            types.InlineKeyboardButton("✅ Approve", callback_data=f"approve_{req_id}"),
-            types.InlineKeyboardButton("❌ Reject",  callback_data=f"reject_{req_id}")
-        )
-        bot.send_message(ADMIN_ID, text, reply_markup=ikb)
-    else:
-        bot.send_message(ADMIN_ID, text)
+    outbound.send(uid, "🔐 Admin Panel:", reply_markup=ADMIN_MENU)
 
-def apply_ref_bonus_if_increase(target_user_id: int, delta_increase: int):
-    """
-    টার্গেট ইউজারের ব্যালেন্স যদি পজিটিভ ডেল্টায় বাড়ে, তাহলে
-    তার রেফারারকে ৩% বোনাস দাও।
-    """
-    if delta_increase <= 0:
-        return
-    cursor.execute("SELECT refer_by FROM users WHERE user_id=?", (target_user_id,))
-    row = cursor.fetchone()
-    if not row:
-        return
-    referrer = row[0]
-    if not referrer:
-        return
-    bonus = int(delta_increase * 0.03)
-    if bonus > 0:
-        cursor.execute("UPDATE users SET balance = balance + ?, ref_earn = ref_earn + ? WHERE user_id=?",
-                       (bonus, bonus, referrer))
-        conn.commit()
-        try:
-            bot.send_message(referrer, f"🎉 আপনার রেফার্ড {target_user_id} এর ব্যালেন্স বৃদ্ধি পেয়েছে। আপনি পেলেন {bonus}৳ (3%)")
-        except Exception:
-            pass
+_me = None
+_me_lock = threading.Lock()
+
+def bot_username() -> str:
+    # রেফার লিঙ্কের জন্য — getMe প্রসেসে একবারই (একসাথে অনেক Refer এলেও), তারপর ক্যাশ।
+    # start_background_jobs পেছনে আগেই ভরে রাখে; তখন ব্যর্থ হলে প্রথম Refer এ আবার চেষ্টা হয়
+    global _me
+    if _me is None:
+        with _me_lock:
+            if _me is None:
+                _me = bot.get_me()
+    return _me.username
 
 # ==============================
 # START + REFER ATTACH (updated to ensure refer works)
 # ==============================
-@bot.message_handler(commands=['start'])
+@router.command("start")
 def cmd_start(message: types.Message):
     user_id = message.chat.id
-    # ensure user exists
-    cursor.execute("INSERT OR IGNORE INTO users (user_id) VALUES (?)", (user_id,))
-    conn.commit()
 
-    # refer attach: /start <referrer_id>
+    # refer attach: /start <referrer_id> (ignore self-referrals)
     parts = message.text.split()
-    if len(parts) > 1:
-        try:
-            referrer_id = int(parts[1])
-            # ignore self-referrals
-            if referrer_id != user_id:
-                # ensure referrer row exists so UPDATE works
-                cursor.execute("INSERT OR IGNORE INTO users (user_id) VALUES (?)", (referrer_id,))
-                conn.commit()
-
-                # only attach if current user's refer_by is empty
-                cursor.execute("SELECT refer_by FROM users WHERE user_id=?", (user_id,))
-                ref = cursor.fetchone()
-                if ref and ref[0] is None:
-                    cursor.execute("UPDATE users SET refer_by=? WHERE user_id=?", (referrer_id, user_id))
-                    # increment ref_count, ref_earn and give +1৳ bonus to referrer
-                    cursor.execute("""
-                        UPDATE users
-                        SET ref_count = COALESCE(ref_count,0) + 1,
-                            ref_earn  = COALESCE(ref_earn,0) + 1,
-                            balance   = COALESCE(balance,0) + 1
-                        WHERE user_id=?
-                    """, (referrer_id,))
-                    conn.commit()
-                    try:
-                        bot.send_message(referrer_id, f"🎉 আপনার রেফারে নতুন একজন জয়েন করেছে!\nআপনি বোনাস 1৳ পেয়েছেন।")
-                    except Exception:
-                        pass
-        except Exception:
-            pass
+    try:
+        referrer_id = int(parts[1]) if len(parts) > 1 else None
+    except ValueError:
+        referrer_id = None
+    if referrer_id == user_id:
+        referrer_id = None
+    join_bonus = get_setting("ref_join_bonus")
+
+    def signup(w):
+        # ইউজার তৈরি + রেফার attach + রেফারারের নোটিফিকেশন এক transaction এ (group commit, db.py)
+        w.execute("INSERT OR IGNORE INTO users (user_id, created_at) VALUES (?, ?)", (user_id, time.time()))
+        # /start দিয়েছে মানে আর ব্লক করা নেই — broadcast / outbox আবার পাঠাবে
+        w.execute("DELETE FROM blocked_users WHERE user_id=?", (user_id,))
+        if referrer_id is not None and referral.attach(w, user_id, referrer_id, join_bonus):
+            outbox.add(w, referrer_id, f"🎉 আপনার রেফারে নতুন একজন জয়েন করেছে!\nআপনি বোনাস {join_bonus}৳ পেয়েছেন।")
+
+    try:
+        db.run(signup)
+    except Exception:
+        log.exception("Signup %s failed", user_id)
 
     send_main_menu(user_id)
 
 # ==============================
 # USER BUTTONS
 # ==============================
-@bot.message_handler(func=lambda m: m.text == "💰 Balance")
+@router.button("💰 Balance")
 def on_balance(message: types.Message):
     uid = message.chat.id
-    cursor.execute("SELECT balance FROM users WHERE user_id=?", (uid,))
-    row = cursor.fetchone()
+    row = db.fetchone("SELECT balance FROM users WHERE user_id=?", (uid,))
     bal = row[0] if row else 0
-    bot.send_message(uid, f"💳 আপনার ব্যালেন্স: {bal}৳")
+    outbound.send(uid, f"💳 আপনার ব্যালেন্স: {bal}৳")
 
-@bot.message_handler(func=lambda m: m.text == "👥 Refer")
+@router.command("statement")
+def cmd_statement(message: types.Message):
+    # /statement → নিজের শেষ ১০টি লেনদেন; এডমিন: /statement <user_id>
+    uid = target = message.chat.id
+    parts = message.text.split()
+    if uid == ADMIN_ID and len(parts) > 1:
+        try:
+            target = int(parts[1])
+        except ValueError:
+            outbound.send(uid, "ℹ️ ব্যবহার: /statement <user_id>")
+            return
+    rows = ledger.statement(db, target)
+    if not rows:
+        outbound.send(uid, "📭 এখনো কোনো লেনদেন নেই।")
+        return
+    lines = [f"📒 Statement ({target}) — শেষ {len(rows)}টি:\n"]
+    for _, delta, balance_after, reason, ref, created_at in rows:
+        when = time.strftime("%d-%m-%Y %H:%M", time.localtime(created_at or 0))
+        lines.append(f"{'➕' if delta > 0 else '➖'} {abs(delta)}৳ → {balance_after}৳ | {reason}"
+                     f"{f' ({ref})' if ref else ''}\n   🕒 {when}")
+    outbound.send(uid, "\n".join(lines))
+
+@router.button("👥 Refer")
 def on_refer(message: types.Message):
     uid = message.chat.id
-    link = f"https://t.me/{bot.get_me().username}?start={uid}"
-    cursor.execute("SELECT ref_count, ref_earn FROM users WHERE user_id=?", (uid,))
-    row = cursor.fetchone()
+    link = f"https://t.me/{bot_username()}?start={uid}"
+    row = db.fetchone("SELECT ref_count, ref_earn FROM users WHERE user_id=?", (uid,))
     ref_count = row[0] if row else 0
     ref_earn = row[1] if row and len(row) > 1 else 0
-    bot.send_message(
+    outbound.send(
         uid,
         f"🔗 আপনার রেফার লিঙ্ক:\n{link}\n\n"
         f"👥 মোট রেফার করেছে: {ref_count}\n"
         f"💰 রেফার থেকে আয়: {ref_earn}৳\n\n"
         f"✅ নিয়ম: আপনার রেফার্ড ইউজারের ব্যালেন্স যখনই বাড়বে,\n"
-        f"আপনি পাবেন সেই বৃদ্ধির 3%।\n\n"
-        f"🔔 চাইলে প্রত্যেক রেফারে সরাসরি 1৳ পান।"
+        f"আপনি পাবেন সেই বৃদ্ধির {get_setting('ref_percent') * 100:g}%।\n\n"
+        f"🔔 চাইলে প্রত্যেক রেফারে সরাসরি {get_setting('ref_join_bonus')}৳ পান।"
     )
 
-@bot.message_handler(func=lambda m: m.text == "💵 Withdraw")
+@router.button("💵 Withdraw")
 def on_withdraw(message: types.Message):
     uid = message.chat.id
     kb = types.ReplyKeyboardMarkup(resize_keyboard=True)
     kb.add(types.KeyboardButton("📲 Bkash"), types.KeyboardButton("📲 Nagad"))
     kb.add(types.KeyboardButton("⬅️ Back"))
-    withdraw_steps[uid] = {"step": "method"}
-    bot.send_message(uid, "💵 কোন পেমেন্ট মেথডে নিতে চান?", reply_markup=kb)
+    router.start_flow(uid, "withdraw", "method")
+    outbound.send(uid, "💵 কোন পেমেন্ট মেথডে নিতে চান?", reply_markup=kb)
 
 # --- Support group ---
-@bot.message_handler(func=lambda m: m.text == "💌 Support group 🛑")
+@router.button("💌 Support group 🛑")
 def support_group(message: types.Message):
-    bot.send_message(
+    outbound.send(
         message.chat.id,
         "ℹ️ যেকোনো সমস্যা হলে সাপোর্ট গ্রুপে জানাতে পারেন:\n"
-        "👉 https://t.me/+f9tOe5fPe0Q0NGZl"
+        f"👉 {get_setting('support_link')}"
     )
 
 # --- Create Gmail task ---
-@bot.message_handler(func=lambda m: m.text == "🎁 Create Gmail")
+@router.button("🎁 Create Gmail")
 def create_gmail(message: types.Message):
     # ডাইনামিক প্রাইস লোড করা হচ্ছে settings থেকে
-    task_price_str = get_setting("task_price", "7")
-    try:
-        task_price = float(task_price_str)
-    except Exception:
-        task_price = 7
-    bot.send_message(
+    task_price = get_setting("task_price")
+    outbound.send(
         message.chat.id,
         f"💰আপনি প্রতি জিমেইল এ পাবেন : {task_price} টাকা🎁\n"
-        "📍 [কিভাবে কাজ করবেন?](https://t.me/taskincometoday/16)",
+        f"📍 [কিভাবে কাজ করবেন?]({get_setting('guide_link')})",
         parse_mode="Markdown"
     )
-    bot.send_message(message.chat.id, "📂 এখন আপনার `.xlsx` ফাইলটি আপলোড করুন।")
+    outbound.send(message.chat.id, "📂 এখন আপনার `.xlsx` ফাইলটি আপলোড করুন।")
 
 # --- Receive .xlsx file ---
-@bot.message_handler(content_types=['document'])
+def on_task_checked(task_id, user_id, valid, invalid, duplicates, payout, error):
+    if error:
+        outbound.send(user_id, f"⚠️ Task #{task_id}: ফাইলটি পড়া যায়নি, এডমিন নিজে যাচাই করবেন।")
+        return
+    text = f"📊 Task #{task_id}: আপনার ফাইলে {valid}টি সঠিক Gmail পাওয়া গেছে।"
+    if invalid:
+        text += f"\n⚠️ {invalid}টি সারি ভুল (Gmail/পাসওয়ার্ড ঠিক নেই)।"
+    if duplicates:
+        text += f"\n🔁 {duplicates}টি Gmail আগেই জমা হয়েছে — এগুলোর টাকা হবে না।"
+    outbound.send(user_id, text)
+
+# ফাইল ডাউনলোড + Gmail সারি গোনা ব্যাকগ্রাউন্ডে (task_files.TaskChecker), ডুপ্লিকেট
+# যাচাই gmail_index.py তে; একই ফাইল আবার জমা দিলে সাথে সাথে বাতিল (file_unique_id)
 def handle_file(message: types.Message):
     doc = message.document
     uid = message.chat.id
@@ -274,416 +299,767 @@ def handle_file(message: types.Message):
         is_xlsx = True
 
     if not is_xlsx:
-        bot.send_message(uid, "❌ অনুগ্রহ করে শুধুমাত্র `.xlsx` ফাইল আপলোড করুন।")
+        outbound.send(uid, "❌ অনুগ্রহ করে শুধুমাত্র `.xlsx` ফাইল আপলোড করুন।")
         return
 
-    # DB তে টাস্ক সেভ
-    cursor.execute(
-        "INSERT INTO tasks (user_id, username, file_id, status) VALUES (?, ?, ?, 'Pending')",
-        (uid, username, doc.file_id)
-    )
-    conn.commit()
+    # আগে জমা হওয়া ফাইল → কোনো DB write বা এডমিন অ্যালার্ট নয়
+    original = submitted_files.original(doc.file_unique_id)
+    if original is None:
+        # DB তে টাস্ক সেভ
+        task_id, created = submitted_files.add(uid, username, doc.file_id, doc.file_unique_id)
+        if not created:
+            original = task_id
+    if original is not None:
+        outbound.send(uid, f"⚠️ এই ফাইলটি আগেই জমা হয়েছে (Task #{original})। নতুন ফাইল দিন।")
+        return
+    task_checker.submit(task_id, doc.file_id)
 
-    bot.send_message(uid, "✅ আপনার ফাইলটি সফলভাবে জমা হয়েছে, আমরা যাচাই করছি।")
+    outbound.send(uid, "✅ আপনার ফাইলটি সফলভাবে জমা হয়েছে, আমরা যাচাই করছি।")
     # এডমিনকে অ্যালার্ট
-    try:
-        bot.send_message(ADMIN_ID, f"🆕 নতুন টাস্ক সাবমিশন\n👤 User: {uid} (@{username})\n📄 File: {doc.file_name}")
-    except Exception:
-        pass
+    outbound.alert(ADMIN_ID, f"🆕 নতুন টাস্ক সাবমিশন\n👤 User: {uid} (@{username})\n📄 File: {doc.file_name}")
 
 # ==============================
 # ADMIN PANEL + ITEMS
 # ==============================
-@bot.message_handler(commands=['admin'])
+@router.command("admin")
 def admin_panel(message: types.Message):
     if message.chat.id != ADMIN_ID:
-        bot.send_message(message.chat.id, "❌ আপনি এডমিন নন।")
+        outbound.send(message.chat.id, "❌ আপনি এডমিন নন।")
         return
     send_admin_menu(message.chat.id)
 
-@bot.message_handler(func=lambda msg: msg.text == "📋 All Requests" and msg.chat.id == ADMIN_ID)
-def all_requests_handler(message: types.Message):
-    cursor.execute("SELECT id, user_id, method, number, amount, status FROM withdraws ORDER BY id DESC LIMIT 10")
-    rows = cursor.fetchall()
-    if not rows:
-        bot.send_message(ADMIN_ID, "📭 কোনো রিকোয়েস্ট পাওয়া যায়নি।")
+# --- Settings (Admin) ---
+@router.command("settings", admin=True)
+def settings_handler(message: types.Message):
+    lines = [f"• {key} = {value}\n   {label}" for key, value, label in settings.items()]
+    outbound.send(ADMIN_ID, "⚙️ Settings:\n" + "\n".join(lines) + "\n\nবদলাতে: /set <key> <value>")
+
+@router.command("set", admin=True)
+def set_handler(message: types.Message):
+    parts = message.text.split(maxsplit=2)
+    if len(parts) < 3:
+        outbound.send(ADMIN_ID, "ℹ️ ব্যবহার: /set <key> <value>\nসব key দেখতে /settings")
+        return
+    key, raw = parts[1], parts[2]
+    try:
+        value = set_setting(key, raw)
+    except KeyError:
+        outbound.send(ADMIN_ID, f"❌ অজানা সেটিং: {key}")
+        return
+    except (ValueError, TypeError):
+        outbound.send(ADMIN_ID, f"❌ {key} এর জন্য সঠিক মান দিন।")
+        return
+    outbound.send(ADMIN_ID, f"✅ {key} = {value}")
+
+@router.command("reconcile", admin=True)
+def reconcile_handler(message: types.Message):
+    # users.balance বনাম ledger এর যোগফল — এক streaming pass এ
+    started = time.perf_counter()
+    mismatches, shown = 0, []
+    for user_id, balance, ledger_sum in ledger.reconcile(db):
+        mismatches += 1
+        if len(shown) < 20:
+            shown.append(f"🆔 {user_id} | balance {balance} ≠ ledger {ledger_sum}")
+    took = time.perf_counter() - started
+    if not mismatches:
+        outbound.send(ADMIN_ID, f"✅ সব ব্যালেন্স ledger এর সাথে মিলেছে ({took:.2f}s)")
     else:
-        for row in rows:
-            send_withdraw_card_to_admin(row)
+        outbound.send(ADMIN_ID, f"⚠️ {mismatches}টি অমিল ({took:.2f}s):\n" + "\n".join(shown))
+
+@router.command("stats", admin=True)
+def metrics_handler(message: types.Message):
+    # সবচেয়ে বেশি মোট সময় নেওয়া handler / DB স্টেটমেন্ট / API কল, সময় ms এ
+    uptime = (time.time() - metrics.started) / 3600
+    parts = [f"⏱ Metrics ({uptime:.1f} ঘণ্টা) — count | err | p50 / p95 / p99 ms"]
+    for name, title in (("handler", "🧩 Handler"), ("db", "🗄 SQLite"), ("db_lock", "🔒 Write lock"),
+                        ("api", "📡 Bot API")):
+        rows = metrics.summary(name, top=8)
+        if not rows:
+            continue
+        parts.append(f"\n{title}")
+        parts += [f"• {label}: {count} | {errors} | {p50 * 1000:.2f} / {p95 * 1000:.2f} / {p99 * 1000:.2f}"
+                  for _, label, count, errors, p50, p95, p99 in rows]
+    if len(parts) == 1:
+        parts.append("এখনো কিছু মাপা হয়নি (METRICS=0?)")
+    if flood.dropped:
+        parts.append("\n🚦 Anti-flood এ বাদ: " + ", ".join(f"{a} {n}" for a, n in flood.dropped.most_common()))
+    waiting = outbox.counts()
+    if waiting:
+        parts.append("\n📮 Outbox: " + ", ".join(f"{status} {n}" for status, n in sorted(waiting.items())))
+    outbound.send(ADMIN_ID, "\n".join(parts))
 
-@bot.message_handler(func=lambda msg: msg.text == "👥 User List" and msg.chat.id == ADMIN_ID)
-def user_list_handler(message: types.Message):
-    cursor.execute("SELECT COUNT(*), COALESCE(SUM(balance), 0) FROM users")
-    total_users, total_balance = cursor.fetchone()
-    cursor.execute("SELECT user_id, balance FROM users ORDER BY user_id DESC LIMIT 20")
-    rows = cursor.fetchall()
+# ==============================
+# ADMIN DASHBOARD
+# ==============================
+# সব সংখ্যা stats টেবিল থেকে (trigger দিয়ে হালনাগাদ, stats.py) — কয়েকটি
+# primary key read। 🧮 যাচাই সব শুরু থেকে গুনে মিলিয়ে দেখে, অমিল হলে ঠিক করে।
+def dashboard_view():
+    s = stats.snapshot(db)
+    days = sorted((k for k in s if k.startswith("signups.")), reverse=True)
+    text = (
+        "📊 Dashboard\n\n"
+        f"👥 মোট ইউজার: {s['users']:,}\n"
+        f"💰 মোট ব্যালেন্স: {s['balance']:,}৳\n\n"
+        f"⏳ Pending Withdraw: {s['withdraws.pending.count']:,} ({s['withdraws.pending.amount']:,}৳)\n"
+        f"✅ Approved Withdraw: {s['withdraws.approved.count']:,} ({s['withdraws.approved.amount']:,}৳)\n"
+        f"📂 Pending টাস্ক: {s['tasks.pending.count']:,} (payout {s['tasks.pending.payout']:,.2f}৳)\n"
+        f"✅ Approved টাস্ক: {s['tasks.approved.count']:,} (payout {s['tasks.approved.payout']:,.2f}৳)\n\n"
+        f"🆕 আজ নতুন ইউজার: {s[days[0]]:,}\n"
+        "📅 গত সাত দিন: " + " | ".join(f"{k[-5:]}: {s[k]}" for k in days)
+    )
+    ikb = types.InlineKeyboardMarkup()
+    ikb.row(types.InlineKeyboardButton("🔄 Refresh", callback_data="dash_refresh"),
+            types.InlineKeyboardButton("🧮 যাচাই", callback_data="dash_check"))
+    return text, ikb
+
+@router.button("📊 Dashboard", admin=True)
+def on_dashboard(message: types.Message):
+    text, ikb = dashboard_view()
+    outbound.send(message.chat.id, text, reply_markup=ikb)
+
+@router.callback("dash", admin=True)
+def on_dashboard_action(call: types.CallbackQuery):
+    if call.data == "dash_check":
+        started = time.perf_counter()
+        mismatches = stats.check(db)
+        took = time.perf_counter() - started
+        if mismatches:
+            lines = [f"• {key}: {stored} → {fresh}" for key, stored, fresh in mismatches[:20]]
+            outbound.send(ADMIN_ID, f"🛠 {len(mismatches)}টি অমিল ঠিক করা হয়েছে ({took:.2f}s):\n" + "\n".join(lines))
+        bot.answer_callback_query(call.id, f"✅ সব মিলেছে ({took:.2f}s)" if not mismatches else "🛠 ঠিক করা হয়েছে")
+    else:
+        bot.answer_callback_query(call.id)
+    text, ikb = dashboard_view()
+    try:
+        bot.edit_message_text(text, chat_id=call.message.chat.id, message_id=call.message.message_id,
+                              reply_markup=ikb)
+    except Exception:
+        pass  # message is not modified
 
-    text = f"👥 মোট ইউজার: {total_users}\n💰 মোট ব্যালেন্স: {total_balance}৳\n\n"
-    if not rows:
-        text += "📭 এখনো কোনো ইউজার নেই।"
+# ==============================
+# ADMIN EXPORT (gzip CSV, streaming)
+# ==============================
+# পুরো টেবিল ব্যাকগ্রাউন্ডে ফাইলে লিখে document হিসেবে পাঠানো হয় (export.py)
+EXPORT_USAGE = ("📤 Export: নিচে টেবিল বাছুন, অথবা ফিল্টারসহ:\n"
+                "/export <users|withdraws|tasks> [status] [from] [to]\n"
+                "উদাহরণ: /export withdraws Approved 2026-01-01 2026-01-31\n"
+                "(তারিখ YYYY-MM-DD; তারিখ ফিল্টারে শুধু তারিখ থাকা সারি আসে)")
+
+def start_export(uid: int, req: export.ExportRequest):
+    if exporter.start(uid, req):
+        outbound.send(uid, f"⏳ {req.name} এক্সপোর্ট হচ্ছে, শেষ হলে ফাইল পাঠানো হবে।")
     else:
-        text += "📌 সর্বশেষ ২০ জন ইউজার:\n"
-        for u in rows:
-            text += f"🆔 {u[0]} | 💰 Balance: {u[1]}৳\n"
-    bot.send_message(ADMIN_ID, text)
+        outbound.send(uid, "⚠️ আরেকটি এক্সপোর্ট চলছে, শেষ হলে আবার চেষ্টা করুন।")
 
-# --- Task Requests (Admin) ---
-@bot.message_handler(func=lambda msg: msg.text == "📂 Task Requests" and msg.chat.id == ADMIN_ID)
-def task_requests_handler(message: types.Message):
-    # পেন্ডিং টাস্ক লিস্ট দেখাও
-    cursor.execute("""
-        SELECT t.id, t.user_id, t.username, u.balance
-        FROM tasks t
-        LEFT JOIN users u ON u.user_id = t.user_id
-        WHERE t.status='Pending'
-        ORDER BY t.id DESC
-        LIMIT 15
-    """)
-    rows = cursor.fetchall()
+@router.button("📤 Export", admin=True)
+def on_export(message: types.Message):
+    ikb = types.InlineKeyboardMarkup()
+    ikb.row(*[types.InlineKeyboardButton(table, callback_data=f"export_{table}") for table in export.TABLES])
+    outbound.send(message.chat.id, EXPORT_USAGE, reply_markup=ikb)
 
-    if not rows:
-        bot.send_message(ADMIN_ID, "📭 কোনো Pending Task নেই।")
+@router.command("export", admin=True)
+def export_handler(message: types.Message):
+    try:
+        req = export.ExportRequest.parse(message.text.split()[1:])
+    except ValueError:
+        outbound.send(message.chat.id, EXPORT_USAGE)
         return
+    start_export(message.chat.id, req)
+
+@router.callback("export", admin=True)
+def on_export_table(call: types.CallbackQuery):
+    table = call.data.split("_", 1)[1]
+    bot.answer_callback_query(call.id, f"📤 {table}")
+    start_export(call.message.chat.id, export.ExportRequest(table))
 
-    for tid, uid, uname, bal in rows:
-        text = (f"🗂️ Task #{tid}\n"
-                f"👤 User: {uid} @{uname if uname else '—'}\n"
-                f"💰 Balance: {bal if bal is not None else 0}৳")
-        ikb = types.InlineKeyboardMarkup()
-        ikb.add(
-            types.InlineKeyboardButton("📥 Open File", callback_data=f"topen_{tid}"),
-            types.InlineKeyboardButton("✅ Approve",  callback_data=f"tapprove_{tid}"),
-            types.InlineKeyboardButton("❌ Reject",   callback_data=f"treject_{tid}")
+# ==============================
+# ADMIN LISTS (keyset pages)
+# ==============================
+# প্রতিটি লিস্ট একটি মেসেজ = একটি পেজ; ◀️/▶️ একই মেসেজ এডিট করে (paging.py)।
+# অ্যাকশন বাটনের callback এ পেজের token থাকে, যাতে approve/reject এর পর
+# একই পেজ আবার আঁকা যায়। pager গুলো (PAGERS) create_app এ।
+# bulk অ্যাকশনের জন্য এডমিনের সিলেক্ট করা id (পেজ বদলালেও থাকে)
+selected = {"wpage": set(), "tpage": set()}
+SELECT_PAGES = {"wsel": "wpage", "tsel": "tpage"}
+
+def bulk_rows(ikb: types.InlineKeyboardMarkup, prefix: str, page, on_page: int, chosen: int):
+    """
+    ✅/❌ এই পেজের সব, আর কিছু সিলেক্ট থাকলে ✅/❌ সিলেক্ট করা সব। পেজের
+    বাটনে দেখানো id-সীমা (token = b<first+1>, তারপর last) থাকে — ক্লিকের সময়
+    পেজ আবার পড়লে এডমিনের না-দেখা সারিও ধরা পড়ত।
+    """
+    token = page.token
+    if on_page:
+        last = page.rows[-1][0]
+        ikb.row(
+            types.InlineKeyboardButton(f"✅ Page ({on_page})", callback_data=f"{prefix}_approve_page_{token}_{last}"),
+            types.InlineKeyboardButton(f"❌ Page ({on_page})", callback_data=f"{prefix}_reject_page_{token}_{last}")
         )
-        bot.send_message(ADMIN_ID, text, reply_markup=ikb)
+    if chosen:
+        ikb.row(
+            types.InlineKeyboardButton(f"✅ Selected ({chosen})", callback_data=f"{prefix}_approve_sel_{token}"),
+            types.InlineKeyboardButton(f"❌ Selected ({chosen})", callback_data=f"{prefix}_reject_sel_{token}")
+        )
+
+def select_button(prefix: str, item_id: int, token: str, chosen: set):
+    mark = "☑️" if item_id in chosen else "☐"
+    return types.InlineKeyboardButton(f"{mark} #{item_id}", callback_data=f"{prefix}_{item_id}_{token}")
+
+def withdraw_page_view(token: str = ""):
+    page = withdraw_pager.page(token)
+    if not page.rows:
+        return "📭 কোনো রিকোয়েস্ট পাওয়া যায়নি।", None
+    ikb = types.InlineKeyboardMarkup()
+    lines = ["📋 Withdraw Requests\n"]
+    pending = 0
+    for req_id, u_id, method, number, amount, status in page.rows:
+        lines.append(f"🆔 {req_id} | 👤 {u_id}\n💳 {method} ({number})\n💵 {amount}৳ | 📌 {status}\n")
+        if status == "Pending":
+            pending += 1
+            ikb.row(
+                select_button("wsel", req_id, page.token, selected["wpage"]),
+                types.InlineKeyboardButton("✅ Approve", callback_data=f"approve_{req_id}_{page.token}"),
+                types.InlineKeyboardButton("❌ Reject",  callback_data=f"reject_{req_id}_{page.token}")
+            )
+    bulk_rows(ikb, "wbulk", page, pending, len(selected["wpage"]))
+    return "\n".join(lines), withdraw_pager.add_nav(ikb, page)
+
+def task_page_view(token: str = ""):
+    page = task_pager.page(token)
+    if not page.rows:
+        return "📭 কোনো Pending Task নেই।", None
+    ikb = types.InlineKeyboardMarkup()
+    lines = ["📂 Pending Tasks\n"]
+    for tid, uid, uname, bal, gmail_rows, invalid_rows, duplicate_rows, payout, check_error in page.rows:
+        lines.append(f"🗂️ Task #{tid} | 👤 {uid} @{uname if uname else '—'} | "
+                     f"💰 {bal if bal is not None else 0}৳")
+        if gmail_rows is not None:
+            lines.append(f"   📊 {gmail_rows} Gmail" + (f" (+{invalid_rows} ভুল)" if invalid_rows else "") +
+                         (f" 🔁 {duplicate_rows} ডুপ্লিকেট" if duplicate_rows else "") +
+                         f" → 💵 {payout:,.2f}৳")
+        elif check_error:
+            lines.append("   ⚠️ ফাইল পড়া যায়নি")
+        else:
+            lines.append("   ⏳ যাচাই চলছে")
+        ikb.row(
+            select_button("tsel", tid, page.token, selected["tpage"]),
+            types.InlineKeyboardButton("📥", callback_data=f"topen_{tid}"),
+            types.InlineKeyboardButton("✅", callback_data=f"tapprove_{tid}_{page.token}"),
+            types.InlineKeyboardButton("❌", callback_data=f"treject_{tid}_{page.token}")
+        )
+    bulk_rows(ikb, "tbulk", page, len(page.rows), len(selected["tpage"]))
+    return "\n".join(lines), task_pager.add_nav(ikb, page)
+
+def user_page_view(token: str = ""):
+    page = user_pager.page(token)
+    text = ""
+    if page.newer is None:
+        # মোট হিসাব শুধু প্রথম পেজে
+        # stats টেবিল থেকে — পুরো users টেবিল স্ক্যান নয়
+        totals = stats.values(db, ["users", "balance"])
+        total_users, total_balance = totals["users"], totals["balance"]
+        text = f"👥 মোট ইউজার: {total_users}\n💰 মোট ব্যালেন্স: {total_balance}৳\n\n"
+    if not page.rows:
+        return text + "📭 এখনো কোনো ইউজার নেই।", None
+    text += "".join(f"🆔 {u_id} | 💰 Balance: {balance}৳\n" for u_id, balance in page.rows)
+    return text, user_pager.add_nav(types.InlineKeyboardMarkup(), page)
+
+def show_page(view, token: str = "", call: types.CallbackQuery = None):
+    """call না থাকলে নতুন মেসেজ, থাকলে সেই মেসেজটাই এডিট।"""
+    text, markup = view(token)
+    if call is None:
+        outbound.send(ADMIN_ID, text, reply_markup=markup)
+        return
+    try:
+        bot.edit_message_text(text, chat_id=call.message.chat.id, message_id=call.message.message_id,
+                              reply_markup=markup)
+    except Exception:
+        pass  # message is not modified
+
+PAGE_VIEWS = {"wpage": withdraw_page_view, "tpage": task_page_view, "upage": user_page_view}
+
+@router.button("📋 All Requests", admin=True)
+def all_requests_handler(message: types.Message):
+    show_page(withdraw_page_view)
+
+@router.button("👥 User List", admin=True)
+def user_list_handler(message: types.Message):
+    show_page(user_page_view)
+
+# --- Task Requests (Admin) ---
+@router.button("📂 Task Requests", admin=True)
+def task_requests_handler(message: types.Message):
+    show_page(task_page_view)
+
+@router.callback(*PAGE_VIEWS, admin=True)
+def on_page_nav(call: types.CallbackQuery):
+    prefix, token = call.data.split("_", 1)
+    show_page(PAGE_VIEWS[prefix], token, call)
+    bot.answer_callback_query(call.id)
 
 # ==============================
 # BACK BUTTON (GLOBAL)
 # ==============================
-@bot.message_handler(func=lambda m: m.text == "⬅️ Back")
+@router.button("⬅️ Back")
 def on_back(message: types.Message):
     uid = message.chat.id
-    withdraw_steps.pop(uid, None)
-    admin_steps.pop(uid, None)
+    router.end_flow(uid)
     if uid == ADMIN_ID:
         send_admin_menu(uid)
     else:
         send_main_menu(uid)
 
 # ==============================
-# WITHDRAW FLOW + ADMIN FLOW (catch-all)
+# WITHDRAW FLOW (method → number → amount)
 # ==============================
-@bot.message_handler(func=lambda m: True)
-def catch_all(message: types.Message):
+@router.step("withdraw", "method")
+def withdraw_method(message: types.Message, state):
     uid = message.chat.id
     text = message.text
+    if text in ["📲 Bkash", "📲 Nagad"]:
+        state.data["method"] = text
+        state.step = "number"
+        outbound.send(uid, f"📱 আপনার {text} নম্বর লিখুন:")
+    else:
+        outbound.send(uid, "❌ Bkash/Nagad সিলেক্ট করুন বা ⬅️ Back চাপুন।")
 
-    # ---------- Withdraw flow ----------
-    if uid in withdraw_steps:
-        step = withdraw_steps[uid]["step"]
-
-        if step == "method":
-            if text in ["📲 Bkash", "📲 Nagad"]:
-                withdraw_steps[uid]["method"] = text
-                withdraw_steps[uid]["step"] = "number"
-                bot.send_message(uid, f"📱 আপনার {text} নম্বর লিখুন:")
-            else:
-                bot.send_message(uid, "❌ Bkash/Nagad সিলেক্ট করুন বা ⬅️ Back চাপুন।")
-            return
+@router.step("withdraw", "number")
+def withdraw_number(message: types.Message, state):
+    state.data["number"] = message.text
+    state.step = "amount"
+    outbound.send(message.chat.id, f"💵 কত টাকা Withdraw করবেন? (সর্বনিম্ন {get_setting('min_withdraw')}৳)")
 
-        if step == "number":
-            withdraw_steps[uid]["number"] = text
-            withdraw_steps[uid]["step"] = "amount"
-            bot.send_message(uid, "💵 কত টাকা Withdraw করবেন? (সর্বনিম্ন 50৳)")
-            return
+@router.step("withdraw", "amount")
+def withdraw_amount(message: types.Message, state):
+    uid = message.chat.id
+    try:
+        amount = int(message.text)
+    except Exception:
+        outbound.send(uid, "❌ পরিমাণ সংখ্যায় দিন।")
+        return
 
-        if step == "amount":
-            try:
-                amount = int(text)
-            except Exception:
-                bot.send_message(uid, "❌ পরিমাণ সংখ্যায় দিন।")
-                return
-
-            cursor.execute("SELECT balance FROM users WHERE user_id=?", (uid,))
-            row = cursor.fetchone()
-            balance = row[0] if row else 0
-
-            if amount < 50:
-                bot.send_message(uid, "⚠️ সর্বনিম্ন withdraw 50৳")
-            elif amount > balance:
-                bot.send_message(uid, f"❌ আপনার ব্যালেন্সে যথেষ্ট টাকা নেই (বর্তমান: {balance}৳)")
-            else:
-                method = withdraw_steps[uid]["method"]
-                number = withdraw_steps[uid]["number"]
-
-                # Create request & deduct now
-                cursor.execute("INSERT INTO withdraws (user_id, method, number, amount, status) VALUES (?,?,?,?, 'Pending')",
-                               (uid, method, number, amount))
-                cursor.execute("UPDATE users SET balance = balance - ? WHERE user_id=?", (amount, uid))
-                conn.commit()
-
-                bot.send_message(uid, f"✅ Withdraw Request সাবমিট হয়েছে!\n💳 {method}\n☎️ {number}\n💵 {amount}৳")
-                # এডমিনকে অ্যালার্ট
-                try:
-                    bot.send_message(ADMIN_ID, f"🔔 নতুন Withdraw Request:\n👤 {uid}\n💳 {method} ({number})\n💵 {amount}৳")
-                except Exception:
-                    pass
-
-            withdraw_steps.pop(uid, None)
-            return
+    row = db.fetchone("SELECT balance FROM users WHERE user_id=?", (uid,))
+    balance = row[0] if row else 0
 
-    # ---------- Admin flow ----------
-    if uid == ADMIN_ID:
-        # Add
-        if text == "➕ Add Balance":
-            admin_steps[uid] = {"action": "add", "step": "userid"}
-            bot.send_message(uid, "🎯 ইউজারের ID দিন:")
-            return
+    min_withdraw = get_setting("min_withdraw")
+    if amount < min_withdraw:
+        outbound.send(uid, f"⚠️ সর্বনিম্ন withdraw {min_withdraw}৳")
+    elif amount > balance:
+        outbound.send(uid, f"❌ আপনার ব্যালেন্সে যথেষ্ট টাকা নেই (বর্তমান: {balance}৳)")
+    else:
+        method = state.data["method"]
+        number = state.data["number"]
 
-        if admin_steps.get(uid, {}).get("action") == "add":
-            if admin_steps[uid]["step"] == "userid":
-                try:
-                    target = int(text)
-                    admin_steps[uid]["target_id"] = target
-                    admin_steps[uid]["step"] = "amount"
-                    bot.send_message(uid, "💵 কত টাকা যোগ করবেন?")
-                except Exception:
-                    bot.send_message(uid, "❌ সঠিক ইউজার ID দিন।")
-                return
-            elif admin_steps[uid]["step"] == "amount":
-                try:
-                    amount = int(text)
-                    target = admin_steps[uid]["target_id"]
-                    cursor.execute("UPDATE users SET balance = balance + ? WHERE user_id=?", (amount, target))
-                    conn.commit()
-                    # রেফার বোনাস: increase = amount
-                    apply_ref_bonus_if_increase(target, amount)
-                    bot.send_message(uid, f"✅ {target} এর ব্যালেন্সে {amount}৳ যোগ হয়েছে।")
-                    try:
-                        bot.send_message(target, f"🎉 আপনার ব্যালেন্সে {amount}৳ যোগ হয়েছে।")
-                    except Exception:
-                        pass
-                except Exception:
-                    bot.send_message(uid, "❌ সঠিক সংখ্যা দিন।")
-                admin_steps.pop(uid, None)
-                return
-
-        # Set
-        if text == "✏️ Set Balance":
-            admin_steps[uid] = {"action": "set", "step": "userid"}
-            bot.send_message(uid, "🎯 ইউজারের ID দিন:")
-            return
+        # Create request & deduct now — guard টি একসাথে দুটো withdraw এ overdraft আটকায়
+        def request(w):
+            req_id = w.execute("INSERT INTO withdraws (user_id, method, number, amount, status, created_at) "
+                               "VALUES (?,?,?,?, 'Pending', ?)",
+                               (uid, method, number, amount, time.time())).lastrowid
+            ledger.post(w, uid, -amount, ledger.WITHDRAW, ref=f"withdraw:{req_id}")
 
-        if admin_steps.get(uid, {}).get("action") == "set":
-            if admin_steps[uid]["step"] == "userid":
-                try:
-                    target = int(text)
-                    admin_steps[uid]["target_id"] = target
-                    cursor.execute("SELECT balance FROM users WHERE user_id=?", (target,))
-                    row = cursor.fetchone()
-                    old_balance = row[0] if row else 0
-                    admin_steps[uid]["old_balance"] = old_balance
-                    admin_steps[uid]["step"] = "amount"
-                    bot.send_message(uid, f"💵 নতুন ব্যালেন্স কত হবে? (বর্তমান {old_balance}৳)")
-                except Exception:
-                    bot.send_message(uid, "❌ সঠিক ইউজার ID দিন।")
-                return
-            elif admin_steps[uid]["step"] == "amount":
-                try:
-                    new_amount = int(text)
-                    target = admin_steps[uid]["target_id"]
-                    old_balance = admin_steps[uid]["old_balance"]
-                    cursor.execute("UPDATE users SET balance = ? WHERE user_id=?", (new_amount, target))
-                    conn.commit()
-                    # রেফার বোনাস: increase = max(new-old, 0)
-                    delta = new_amount - old_balance
-                    apply_ref_bonus_if_increase(target, delta)
-                    bot.send_message(uid, f"✅ {target} এর ব্যালেন্স {new_amount}৳ এ সেট হয়েছে।")
-                    try:
-                        bot.send_message(target, f"⚠️ অ্যাডমিন আপনার ব্যালেন্স সেট করেছে: {new_amount}৳")
-                    except Exception:
-                        pass
-                except Exception:
-                    bot.send_message(uid, "❌ সঠিক সংখ্যা দিন।")
-                admin_steps.pop(uid, None)
-                return
-
-        # Reduce
-        if text == "➖ Reduce Balance":
-            admin_steps[uid] = {"action": "reduce", "step": "userid"}
-            bot.send_message(uid, "🎯 ইউজারের ID দিন:")
+        try:
+            db.run(request)
+        except ledger.InsufficientFunds as e:
+            outbound.send(uid, f"❌ আপনার ব্যালেন্সে যথেষ্ট টাকা নেই (বর্তমান: {e.balance}৳)")
+            router.end_flow(uid)
             return
 
-        if admin_steps.get(uid, {}).get("action") == "reduce":
-            if admin_steps[uid]["step"] == "userid":
-                try:
-                    target = int(text)
-                    admin_steps[uid]["target_id"] = target
-                    admin_steps[uid]["step"] = "amount"
-                    bot.send_message(uid, "💵 কত টাকা কমাবেন?")
-                except Exception:
-                    bot.send_message(uid, "❌ সঠিক ইউজার ID দিন।")
-                return
-            elif admin_steps[uid]["step"] == "amount":
-                try:
-                    amount = int(text)
-                    target = admin_steps[uid]["target_id"]
-                    cursor.execute("UPDATE users SET balance = balance - ? WHERE user_id=?", (amount, target))
-                    conn.commit()
-                    bot.send_message(uid, f"✅ {target} এর ব্যালেন্স থেকে {amount}৳ কেটে নেওয়া হয়েছে।")
-                    try:
-                        bot.send_message(target, f"⚠️ আপনার ব্যালেন্স থেকে {amount}৳ কমানো হয়েছে।")
-                    except Exception:
-                        pass
-                except Exception:
-                    bot.send_message(uid, "❌ সঠিক সংখ্যা দিন।")
-                admin_steps.pop(uid, None)
-                return
-
-        # --- NEW: Set Task Price via Admin Panel ---
-        if text == "⚙️ Set Task Price":
-            admin_steps[uid] = {"action": "set_task_price", "step": "ask"}
-            current = get_setting("task_price", "7")
-            bot.send_message(uid, f"🛠️ বর্তমান টাস্ক প্রাইস {current}৳\nনতুন প্রাইস লিখুন:")
-            return
+        outbound.send(uid, f"✅ Withdraw Request সাবমিট হয়েছে!\n💳 {method}\n☎️ {number}\n💵 {amount}৳")
+        # এডমিনকে অ্যালার্ট
+        outbound.alert(ADMIN_ID, f"🔔 নতুন Withdraw Request:\n👤 {uid}\n💳 {method} ({number})\n💵 {amount}৳")
 
-        if admin_steps.get(uid, {}).get("action") == "set_task_price":
-            try:
-                new_price = float(text)
-                if new_price < 0:
-                    raise ValueError("negative")
-                set_setting("task_price", str(new_price))
-
-                bot.send_message(uid, f"✅ টাস্ক প্রাইস এখন {new_price}৳ করা হয়েছে।")
-            except Exception:
-                bot.send_message(uid, "❌ সঠিক সংখ্যা লিখুন। (উদাহরণ: 7)")
-            admin_steps.pop(uid, None)
-            return
+    router.end_flow(uid)
 
 # ==============================
-# WITHDRAW APPROVE / REJECT (INLINE)
+# ADMIN FLOWS (add / set / reduce balance, task price, broadcast)
 # ==============================
-@bot.callback_query_handler(func=lambda c: c.data.startswith("approve_") or c.data.startswith("reject_") or
-                                      c.data.startswith("tapprove_") or c.data.startswith("treject_") or
-                                      c.data.startswith("topen_"))
-def on_inline_decision(call: types.CallbackQuery):
-    # শুধু এডমিন
-    if call.from_user.id != ADMIN_ID:
-        bot.answer_callback_query(call.id, "অনুমতি নেই")
+BALANCE_ACTIONS = {
+    "➕ Add Balance": "add",
+    "✏️ Set Balance": "set",
+    "➖ Reduce Balance": "reduce",
+}
+
+@router.button(*BALANCE_ACTIONS, admin=True)
+def on_balance_action(message: types.Message):
+    router.start_flow(message.chat.id, BALANCE_ACTIONS[message.text], "userid")
+    outbound.send(message.chat.id, "🎯 ইউজারের ID দিন:")
+
+@router.step("add", "userid")
+@router.step("set", "userid")
+@router.step("reduce", "userid")
+def admin_target_id(message: types.Message, state):
+    uid = message.chat.id
+    try:
+        target = int(message.text)
+    except Exception:
+        outbound.send(uid, "❌ সঠিক ইউজার ID দিন।")
         return
+    state.data["target_id"] = target
+    state.step = "amount"
+    if state.flow == "add":
+        outbound.send(uid, "💵 কত টাকা যোগ করবেন?")
+    elif state.flow == "reduce":
+        outbound.send(uid, "💵 কত টাকা কমাবেন?")
+    else:
+        row = db.fetchone("SELECT balance FROM users WHERE user_id=?", (target,))
+        old_balance = row[0] if row else 0
+        state.data["old_balance"] = old_balance
+        outbound.send(uid, f"💵 নতুন ব্যালেন্স কত হবে? (বর্তমান {old_balance}৳)")
 
-    data = call.data
+@router.step("add", "amount")
+def admin_add_amount(message: types.Message, state):
+    uid = message.chat.id
+    try:
+        amount = int(message.text)
+        target = state.data["target_id"]
+        with db.write() as w:
+            ledger.post(w, target, amount, ledger.ADMIN_ADD)
+            # রেফার বোনাস: increase = amount (pending এ জমে, settler দেয়)
+            referral.accrue(w, target, amount, get_setting("ref_percent"))
+            outbox.add(w, target, f"🎉 আপনার ব্যালেন্সে {amount}৳ যোগ হয়েছে।")
+        outbound.send(uid, f"✅ {target} এর ব্যালেন্সে {amount}৳ যোগ হয়েছে।")
+    except ledger.InsufficientFunds as e:
+        outbound.send(uid, f"❌ {target} এর ব্যালেন্সে যথেষ্ট টাকা নেই (বর্তমান: {e.balance}৳)")
+    except KeyError:
+        outbound.send(uid, "❌ এই ID এর কোনো ইউজার নেই।")
+    except Exception:
+        outbound.send(uid, "❌ সঠিক সংখ্যা দিন।")
+    router.end_flow(uid)
 
-    # ---- Withdraw decisions ----
-    if data.startswith("approve_") or data.startswith("reject_"):
-        action, req_id_str = data.split("_", 1)
-        try:
-            req_id = int(req_id_str)
-        except Exception:
-            bot.answer_callback_query(call.id, "ভুল ID")
-            return
+@router.step("set", "amount")
+def admin_set_amount(message: types.Message, state):
+    uid = message.chat.id
+    try:
+        new_amount = int(message.text)
+        target = state.data["target_id"]
+        with db.write() as w:
+            delta = ledger.set_balance(w, target, new_amount)
+            # রেফার বোনাস: increase = max(new-old, 0)
+            referral.accrue(w, target, delta, get_setting("ref_percent"))
+            outbox.add(w, target, f"⚠️ অ্যাডমিন আপনার ব্যালেন্স সেট করেছে: {new_amount}৳")
+        outbound.send(uid, f"✅ {target} এর ব্যালেন্স {new_amount}৳ এ সেট হয়েছে।")
+    except KeyError:
+        outbound.send(uid, "❌ এই ID এর কোনো ইউজার নেই।")
+    except Exception:
+        outbound.send(uid, "❌ সঠিক সংখ্যা দিন।")
+    router.end_flow(uid)
 
-        cursor.execute("SELECT user_id, amount, status FROM withdraws WHERE id=?", (req_id,))
-        row = cursor.fetchone()
-        if not row:
-            bot.answer_callback_query(call.id, "রিকোয়েস্ট পাওয়া যায়নি")
-            return
+@router.step("reduce", "amount")
+def admin_reduce_amount(message: types.Message, state):
+    uid = message.chat.id
+    try:
+        amount = int(message.text)
+        target = state.data["target_id"]
+        with db.write() as w:
+            ledger.post(w, target, -amount, ledger.ADMIN_REDUCE)
+            outbox.add(w, target, f"⚠️ আপনার ব্যালেন্স থেকে {amount}৳ কমানো হয়েছে।")
+        outbound.send(uid, f"✅ {target} এর ব্যালেন্স থেকে {amount}৳ কেটে নেওয়া হয়েছে।")
+    except ledger.InsufficientFunds as e:
+        outbound.send(uid, f"❌ {target} এর ব্যালেন্সে যথেষ্ট টাকা নেই (বর্তমান: {e.balance}৳)")
+    except KeyError:
+        outbound.send(uid, "❌ এই ID এর কোনো ইউজার নেই।")
+    except Exception:
+        outbound.send(uid, "❌ সঠিক সংখ্যা দিন।")
+    router.end_flow(uid)
 
-        u_id, amount, status = row
-        if status != "Pending":
-            bot.answer_callback_query(call.id, "ইতিমধ্যে প্রসেস হয়েছে")
-            return
+# --- Set Task Price via Admin Panel ---
+@router.button("⚙️ Set Task Price", admin=True)
+def on_set_task_price(message: types.Message):
+    uid = message.chat.id
+    router.start_flow(uid, "set_task_price", "ask")
+    current = get_setting("task_price")
+    outbound.send(uid, f"🛠️ বর্তমান টাস্ক প্রাইস {current}৳\nনতুন প্রাইস লিখুন:")
 
-        if action == "approve":
-            # already deducted at request time → only mark approved
-            cursor.execute("UPDATE withdraws SET status='Approved' WHERE id=?", (req_id,))
-            conn.commit()
-            try:
-                bot.send_message(u_id, f"✅ আপনার Withdraw Request {amount}৳ Approved হয়েছে!")
-            except Exception:
-                pass
-            try:
-                bot.edit_message_text(f"🆔 {req_id} Withdraw Approved ✅",
-                                      chat_id=call.message.chat.id, message_id=call.message.message_id)
-            except Exception:
-                pass
-            bot.answer_callback_query(call.id, "Approved ✅")
-
-        elif action == "reject":
-            # refund amount (we deducted previously)
-            cursor.execute("UPDATE withdraws SET status='Rejected' WHERE id=?", (req_id,))
-            cursor.execute("UPDATE users SET balance = balance + ? WHERE user_id=?", (amount, u_id))
-            conn.commit()
-            try:
-                bot.send_message(u_id, f"❌ আপনার Withdraw Request {amount}৳ Rejected হয়েছে। টাকা ফেরত দেওয়া হয়েছে।")
-            except Exception:
-                pass
-            try:
-                bot.edit_message_text(f"🆔 {req_id} Withdraw Rejected ❌",
-                                      chat_id=call.message.chat.id, message_id=call.message.message_id)
-            except Exception:
-                pass
-            bot.answer_callback_query(call.id, "Rejected ❌")
-        return
+@router.step("set_task_price", "ask")
+def set_task_price_step(message: types.Message, state):
+    uid = message.chat.id
+    try:
+        new_price = set_setting("task_price", message.text)
 
-    # ---- Task requests (open / approve / reject) ----
-    if data.startswith("topen_"):
-        tid = int(data.split("_", 1)[1])
-        cursor.execute("SELECT file_id FROM tasks WHERE id=?", (tid,))
-        r = cursor.fetchone()
-        if not r:
-            bot.answer_callback_query(call.id, "ফাইল পাওয়া যায়নি")
-            return
-        file_id = r[0]
-        try:
-            bot.send_document(ADMIN_ID, file_id, caption=f"🗂️ Task #{tid} file")
-        except Exception:
-            pass
-        bot.answer_callback_query(call.id, "ফাইল পাঠানো হলো")
-        return
+        outbound.send(uid, f"✅ টাস্ক প্রাইস এখন {new_price}৳ করা হয়েছে।")
+    except Exception:
+        outbound.send(uid, "❌ সঠিক সংখ্যা লিখুন। (উদাহরণ: 7)")
+    router.end_flow(uid)
 
-    if data.startswith("tapprove_") or data.startswith("treject_"):
-        is_approve = data.startswith("tapprove_")
-        tid = int(data.split("_", 1)[1])
+# --- Broadcast to all users ---
+@router.button("📣 Broadcast", admin=True)
+def on_broadcast(message: types.Message):
+    router.start_flow(message.chat.id, "broadcast", "text")
+    outbound.send(message.chat.id, "📣 সব ইউজারকে কী মেসেজ পাঠাবেন? লিখুন (বাতিল করতে ⬅️ Back):")
 
-        cursor.execute("SELECT user_id, status FROM tasks WHERE id=?", (tid,))
-        row = cursor.fetchone()
-        if not row:
-            bot.answer_callback_query(call.id, "টাস্ক পাওয়া যায়নি")
-            return
+@router.step("broadcast", "text")
+def broadcast_text_step(message: types.Message, state):
+    uid = message.chat.id
+    router.end_flow(uid)
+    bid = broadcaster.start(message.text)
+    outbound.send(uid, f"🚀 Broadcast #{bid} শুরু হয়েছে। অগ্রগতি এখানে জানানো হবে।")
 
-        u_id, status = row
-        if status != "Pending":
-            bot.answer_callback_query(call.id, "ইতিমধ্যে প্রসেস হয়েছে")
-            return
+# ==============================
+# WITHDRAW / TASK DECISIONS (single + bulk)
+# ==============================
+# status বদল + রিফান্ড decisions.py তে এক transaction এ; এখানে শুধু
+# নোটিফিকেশন আর পেজ আবার আঁকা। নোটিফিকেশন প্রতি ইউজারে একটি, সিদ্ধান্তের
+# একই transaction এ outbox এ লেখা হয় (on_done), পরে outbound queue দিয়ে যায়।
+def notify_withdraws(w, rows, approve: bool):
+    for u_id, items in decisions.by_user(rows).items():
+        total = sum(amount for _, _, amount in items)
+        if approve:
+            text = (f"✅ আপনার Withdraw Request {total}৳ Approved হয়েছে!" if len(items) == 1 else
+                    f"✅ আপনার {len(items)}টি Withdraw Request (মোট {total}৳) Approved হয়েছে!")
+        else:
+            text = (f"❌ আপনার Withdraw Request {total}৳ Rejected হয়েছে। টাকা ফেরত দেওয়া হয়েছে।" if len(items) == 1 else
+                    f"❌ আপনার {len(items)}টি Withdraw Request (মোট {total}৳) Rejected হয়েছে। টাকা ফেরত দেওয়া হয়েছে।")
+        outbox.add(w, u_id, text)
+
+def refund_failed_text(ids) -> str:
+    return f"⚠️ {len(ids)}টি রিফান্ড হয়নি (ইউজার নেই), Pending রইল: " + ", ".join(f"#{i}" for i in ids)
+
+def notify_tasks(w, rows, approve: bool):
+    # ইউজারকে নোটিফাই (কোনো ব্যালেন্স অটো-চেঞ্জ নেই)
+    for u_id, items in decisions.by_user(rows).items():
+        count = "" if len(items) == 1 else f"{len(items)}টি "
+        if approve:
+            outbox.add(w, u_id, f"✅ আপনার {count}Gmail অ্যাপ্রুভ হয়েছে। আপনার Report কাউন্ট করে আপনার ব্যালান্স যুক্ত হয়ে যাবে ধন্যবাদ!")
+        else:
+            outbox.add(w, u_id, f"❌ দুঃখিত, আপনার {count}Gmail রিজেক্ট করা হয়েছে।")
+
+@router.callback("approve", "reject", admin=True)
+def on_withdraw_decision(call: types.CallbackQuery):
+    # approve_<id>[_<page token>]
+    action, req_id_str, *page_token = call.data.split("_")
+    try:
+        req_id = int(req_id_str)
+    except Exception:
+        bot.answer_callback_query(call.id, "ভুল ID")
+        return
 
-        new_status = "Approved" if is_approve else "Rejected"
-        cursor.execute("UPDATE tasks SET status=? WHERE id=?", (new_status, tid))
-        conn.commit()
+    approve = action == "approve"
+    failed = []
+    done = decisions.decide_withdraws(db, [req_id], approve,
+                                      on_done=lambda w, rows: notify_withdraws(w, rows, approve),
+                                      on_error=lambda rid, e: failed.append(rid))
+    if failed:
+        bot.answer_callback_query(call.id, refund_failed_text(failed), show_alert=True)
+        return
+    if not done:
+        exists = db.fetchone("SELECT 1 FROM withdraws WHERE id=?", (req_id,))
+        bot.answer_callback_query(call.id, "ইতিমধ্যে প্রসেস হয়েছে" if exists else "রিকোয়েস্ট পাওয়া যায়নি")
+        return
+    selected["wpage"].discard(req_id)
 
-        # ইউজারকে নোটিফাই (কোনো ব্যালেন্স অটো-চেঞ্জ নেই)
+    new_status = "Approved ✅" if approve else "Rejected ❌"
+    if page_token:
+        show_page(withdraw_page_view, page_token[0], call)
+    else:
         try:
-            if is_approve:
-                bot.send_message(u_id, "✅ আপনার Gmail অ্যাপ্রুভ হয়েছে। আপনার Report কাউন্ট করে আপনার ব্যালান্স যুক্ত হয়ে যাবে ধন্যবাদ!")
-            else:
-                bot.send_message(u_id, "❌ দুঃখিত, আপনার Gmail রিজেক্ট করা হয়েছে।")
+            bot.edit_message_text(f"🆔 {req_id} Withdraw {new_status}",
+                                  chat_id=call.message.chat.id, message_id=call.message.message_id)
         except Exception:
             pass
+    bot.answer_callback_query(call.id, new_status)
+
+@router.callback("topen", admin=True)
+def on_task_open(call: types.CallbackQuery):
+    tid = int(call.data.split("_", 1)[1])
+    r = db.fetchone("SELECT file_id FROM tasks WHERE id=?", (tid,))
+    if not r:
+        bot.answer_callback_query(call.id, "ফাইল পাওয়া যায়নি")
+        return
+    file_id = r[0]
+    outbound.send_document(ADMIN_ID, file_id, caption=f"🗂️ Task #{tid} file")
+    bot.answer_callback_query(call.id, "ফাইল পাঠানো হলো")
+
+@router.callback("tapprove", "treject", admin=True)
+def on_task_decision(call: types.CallbackQuery):
+    is_approve = call.data.startswith("tapprove_")
+    # tapprove_<id>[_<page token>]
+    _, tid, *page_token = call.data.split("_")
+    tid = int(tid)
+
+    done = decisions.decide_tasks(db, [tid], is_approve,
+                                  on_done=lambda w, rows: notify_tasks(w, rows, is_approve))
+    if not done:
+        exists = db.fetchone("SELECT 1 FROM tasks WHERE id=?", (tid,))
+        bot.answer_callback_query(call.id, "ইতিমধ্যে প্রসেস হয়েছে" if exists else "টাস্ক পাওয়া যায়নি")
+        return
+    selected["tpage"].discard(tid)
 
-        # মেসেজ আপডেট
+    # মেসেজ আপডেট: পেজ থেকে এলে একই পেজ আবার আঁকো (প্রসেস করা টাস্ক বাদ যায়)
+    new_status = "Approved" if is_approve else "Rejected"
+    if page_token:
+        show_page(task_page_view, page_token[0], call)
+    else:
         try:
             bot.edit_message_text(f"🗂️ Task #{tid} → {new_status}",
                                   chat_id=call.message.chat.id, message_id=call.message.message_id)
         except Exception:
             pass
 
-        bot.answer_callback_query(call.id, f"{new_status} ✅" if is_approve else f"{new_status} ❌")
+    bot.answer_callback_query(call.id, f"{new_status} ✅" if is_approve else f"{new_status} ❌")
+
+# --- multi-select: ☐/☑️ টগল, শুধু পেজটা আবার আঁকে ---
+@router.callback("tsel", "wsel", admin=True)
+def on_select_toggle(call: types.CallbackQuery):
+    # tsel_<id>_<page token>
+    prefix, item_id, token = call.data.split("_")
+    chosen = selected[SELECT_PAGES[prefix]]
+    item_id = int(item_id)
+    if item_id in chosen:
+        chosen.discard(item_id)
+    else:
+        chosen.add(item_id)
+    show_page(PAGE_VIEWS[SELECT_PAGES[prefix]], token, call)
+    bot.answer_callback_query(call.id, f"☑️ {len(chosen)} selected")
+
+# --- bulk: এই পেজের সব / সিলেক্ট করা সব ---
+@router.callback("tbulk", "wbulk", admin=True)
+def on_bulk_decision(call: types.CallbackQuery):
+    # tbulk_<approve|reject>_page_<page token>_<last id> / tbulk_<approve|reject>_sel_<page token>
+    prefix, action, scope, token, *bounds = call.data.split("_")
+    approve = action == "approve"
+    if prefix == "tbulk":
+        page_key, view, decide, notify, table = "tpage", task_page_view, decisions.decide_tasks, notify_tasks, "tasks"
+    else:
+        page_key, view, decide, notify, table = ("wpage", withdraw_page_view, decisions.decide_withdraws,
+                                                 notify_withdraws, "withdraws")
+
+    chosen = selected[page_key]
+    if scope == "page":
+        if not bounds:
+            # id-সীমা ছাড়া পুরোনো বাটন — পেজ নতুন করে আঁকি, কিছু বদলাই না
+            show_page(view, token, call)
+            bot.answer_callback_query(call.id, "পেজ আপডেট হয়েছে, আবার চাপুন")
+            return
+        # শুধু দেখানো সীমা: last <= id < first + 1 (নতুন সারির id সবসময় বড়)
+        ids = [r[0] for r in db.fetchall(f"SELECT id FROM {table} WHERE status='Pending' AND id >= ? AND id < ?",
+                                         (int(bounds[0]), int(token[1:])))]
+    else:
+        ids = list(chosen)
+    if not ids:
+        bot.answer_callback_query(call.id, "কিছু সিলেক্ট করা নেই")
         return
 
+    failed = []
+    # withdraw এর কোনো রিফান্ড ব্যর্থ হলে সেটা বাদ দিয়ে বাকিগুলো হয়
+    on_error = {} if prefix == "tbulk" else {"on_error": lambda rid, e: failed.append(rid)}
+    done = decide(db, ids, approve, on_done=lambda w, rows: notify(w, rows, approve), **on_error)
+    chosen.difference_update(ids)
+    show_page(view, token, call)
+    text = f"{len(done)}টি {'Approved ✅' if approve else 'Rejected ❌'}"
+    if failed:
+        text += "\n" + refund_failed_text(failed)
+    bot.answer_callback_query(call.id, text, show_alert=bool(failed))
+
+@router.callback("bcstop", admin=True)
+def on_broadcast_stop(call: types.CallbackQuery):
+    bid = int(call.data.split("_", 1)[1])
+    if broadcaster.stop(bid):
+        bot.answer_callback_query(call.id, "⏹ Broadcast থামানো হচ্ছে")
+    else:
+        bot.answer_callback_query(call.id, "ইতিমধ্যে শেষ হয়েছে")
+
+# ==============================
+# APP FACTORY
+# ==============================
+def create_app(config: Config = None):
+    """
+    TeleBot, DB (migration সহ) আর সব ব্যাকগ্রাউন্ড অবজেক্ট জোড়া লাগায়, হ্যান্ডলার
+    রেজিস্টার করে। এই মডিউলটাই ফেরত দেয়, তাই app.bot / app.db ... আগের মতোই।
+    সব state মডিউলে, তাই প্রসেসে একটাই app: পরের ডাক config ছাড়া বা একই config
+    এ আগেরটাই ফেরত দেয়, অন্য config দিলে RuntimeError (চুপচাপ উপেক্ষা নয়)।
+    """
+    global TOKEN, ADMIN_ID, app_config, bot, outbound, db, settings, broadcaster, outbox, ref_settler
+    global gmails, task_checker, submitted_files, exporter, withdraw_pager, task_pager, user_pager
+    app = sys.modules[__name__]
+    if bot is not None:
+        if config is not None and config != app_config:
+            raise RuntimeError(f"create_app already ran with {app_config!r}; got {config!r}")
+        return app
+    config = config or Config()
+    app_config = config
+    TOKEN, ADMIN_ID = config.token, config.admin_id
+
+    bot = telebot.TeleBot(TOKEN)
+    metrics.instrument_telebot()
+    outbound = Outbound(bot)
+
+    db = Database(config.db_path, metrics=metrics)
+    # টেবিল/ইনডেক্স migrations.py তে — শুধু বাকি থাকা version গুলো চলে
+    db.migrate(migrations.MIGRATIONS)
+    settings = Settings(db)
+    settings.load()
+    if config.persist_flows:
+        router.flows = conversation.StateStore(db=db)
+
+    broadcaster = broadcast.Broadcaster(db, outbound, ADMIN_ID)
+    outbox = Outbox(db, outbound)
+    ref_settler = referral.Settler(db, outbox)
+    gmails = gmail_index.GmailIndex(db)
+    task_checker = task_files.TaskChecker(db, bot, price=lambda: get_setting("task_price"), index=gmails,
+                                          on_checked=on_task_checked)
+    submitted_files = task_files.SubmittedFiles(db)
+    exporter = export.Exporter(db, outbound)
+
+    withdraw_pager = KeysetPager(db, "wpage", "SELECT id, user_id, method, number, amount, status FROM withdraws",
+                                 key="id", size=10)
+    task_pager = KeysetPager(db, "tpage", """
+        SELECT t.id, t.user_id, t.username, u.balance, t.gmail_rows, t.invalid_rows, t.duplicate_rows,
+               t.payout, t.check_error
+        FROM tasks t
+        LEFT JOIN users u ON u.user_id = t.user_id
+    """, key="t.id", where="t.status='Pending'", size=15)
+    user_pager = KeysetPager(db, "upage", "SELECT user_id, balance FROM users", key="user_id", size=20)
+    PAGERS.update(wpage=withdraw_pager, tpage=task_pager, upage=user_pager)
+
+    # সব টেক্সট ও callback একটাই এন্ট্রি দিয়ে router এ যায়
+    # (anti-flood চেক আগে, তাই বাদ পড়া আপডেট কোনো কাজই করে না)
+    bot.register_message_handler(flood.guard(router.dispatch_message, flood_action), content_types=['text'])
+    bot.register_message_handler(flood.guard(metrics.wrap("handler", "handle_file", handle_file), "upload"),
+                                 content_types=['document'])
+    bot.register_callback_query_handler(flood.guard(router.dispatch_callback, "callback"), func=lambda c: True)
+    return app
+
 # ==============================
 # RUN
 # ==============================
+def warm_bot_username():
+    try:
+        bot_username()
+    except Exception:
+        log.exception("getMe failed")
+
+def start_background_jobs(singletons: bool = True):
+    """
+    পোলিং/ওয়েবহুক/async — যেকোনো মোডে চালুর সময় একবার ডাকা হয়।
+    singletons=False: supervisor এর বাকি worker — শুধু এই প্রসেসের নিজস্ব কাজ।
+    """
+    metrics.start_writer()
+    # প্রথম 👥 Refer যেন Bot API কলের জন্য না আটকায় (create_app নেটওয়ার্ক ছাড়াই থাকে)
+    threading.Thread(target=warm_bot_username, daemon=True, name="getme").start()
+    # আগের রানের না-পাঠানো নোটিফিকেশন — প্রতিটি প্রসেসে (claim এ lease, তাই ডুপ্লিকেট নয়)
+    outbox.start()
+    if not singletons:
+        return
+    broadcaster.resume()
+    ref_settler.start()
+    task_checker.resume()
+    # পুরোনো টাস্কের file_unique_id (getFile দিয়ে, ধীরে ধীরে)
+    threading.Thread(target=submitted_files.backfill, args=(task_checker.api,), daemon=True).start()
+
 if __name__ == "__main__":
-    print("🤖 Bot is running...")
-    bot.infinity_polling()
+    parser = argparse.ArgumentParser()
+    # বহু প্রসেসে (chat.id অনুযায়ী ভাগ): python supervisor.py -n 4
+    parser.add_argument("--webhook", action="store_true", help="long polling এর বদলে webhook সার্ভার চালাও")
+    args = parser.parse_args()
+    logs.setup()
+    create_app()
+    start_background_jobs()
+
+    if args.webhook:
+        from webhook import run_webhook
+        print("🤖 Bot is running (webhook)...")
+        run_webhook(bot)
+    else:
+        print("🤖 Bot is running...")
+        bot.infinity_polling()
 
@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+
+from telebot import types
+from telebot.apihelper import ApiTelegramException
+
+from outbound import TokenBucket
+
+log = logging.getLogger(__name__)
+
+# ==============================
+# ADMIN BROADCAST
+# ==============================
+# users টেবিল user_id ক্রমে (keyset: WHERE user_id > ?) ব্যাচে পড়া হয়, ব্যাচের
+# সব মেসেজ outbound queue তে একসাথে যায়। প্রতি ব্যাচ শেষে অগ্রগতি
+# broadcasts টেবিলে সেভ হয় — রিস্টার্টের পর resume() ঠিক সেখান থেকেই চালায়।
+BATCH_SIZE = 100
+RATE = 25.0          # global limit এর কিছুটা নিচে, যাতে সাধারণ রিপ্লাই আটকে না যায়
+REPORT_EVERY = 5.0   # সেকেন্ড
+
+# যাদের কাছে পাঠানো হবে — ব্লক করা চ্যাট বাদ (ব্যাচ আর "বাকি"/ETA একই হিসাবে)
+RECIPIENTS = "user_id > ? AND user_id NOT IN (SELECT user_id FROM blocked_users)"
+
+
+def is_blocked_error(e: Exception) -> bool:
+    # 403: bot was blocked by the user / user is deactivated
+    return isinstance(e, ApiTelegramException) and e.error_code == 403
+
+
+class Broadcaster:
+    def __init__(self, db, outbound, admin_id: int, batch_size: int = BATCH_SIZE, rate: float = RATE):
+        self.db = db
+        self.outbound = outbound
+        self.admin_id = admin_id
+        self.batch_size = batch_size
+        self.rate = rate
+        self._running = {}
+        self._lock = threading.Lock()
+
+    # ---------- control ----------
+    def start(self, text: str) -> int:
+        with self.db.write() as w:
+            bid = w.execute("INSERT INTO broadcasts (text, started_at) VALUES (?, ?)",
+                            (text, time.time())).lastrowid
+        self._spawn(bid)
+        return bid
+
+    def stop(self, bid: int) -> bool:
+        return bool(self.db.execute("UPDATE broadcasts SET status='Stopped' WHERE id=? AND status='Running'", (bid,)))
+
+    def resume(self):
+        """রিস্টার্টের পর অসমাপ্ত ব্রডকাস্টগুলো আবার চালু করে।"""
+        for (bid,) in self.db.fetchall("SELECT id FROM broadcasts WHERE status='Running'"):
+            self._spawn(bid)
+
+    def _spawn(self, bid: int):
+        with self._lock:
+            if bid in self._running:
+                return
+            t = threading.Thread(target=self._run, args=(bid,), daemon=True, name=f"broadcast-{bid}")
+            self._running[bid] = t
+        t.start()
+
+    # ---------- worker ----------
+    def _run(self, bid: int):
+        try:
+            self._loop(bid)
+        except Exception:
+            log.exception("Broadcast %s crashed", bid)
+        finally:
+            with self._lock:
+                self._running.pop(bid, None)
+
+    def _loop(self, bid: int):
+        text, last_id, sent, failed, blocked, report_msg = self.db.fetchone(
+            "SELECT text, last_user_id, sent, failed, blocked, report_msg FROM broadcasts WHERE id=?", (bid,))
+        bucket = TokenBucket(self.rate, self.rate)
+        started = time.monotonic()
+        done_here = 0
+        last_report = 0.0
+
+        while True:
+            status = self.db.fetchone("SELECT status FROM broadcasts WHERE id=?", (bid,))[0]
+            if status != "Running":
+                break
+            batch = self.db.fetchall(f"SELECT user_id FROM users WHERE {RECIPIENTS} ORDER BY user_id LIMIT ?",
+                                     (last_id, self.batch_size))
+            if not batch:
+                self.db.execute("UPDATE broadcasts SET status='Done' WHERE id=?", (bid,))
+                status = "Done"
+                break
+
+            futures = []
+            for (uid,) in batch:
+                wait = bucket.wait_time(time.monotonic())
+                if wait:
+                    time.sleep(wait)
+                    bucket.wait_time(time.monotonic())
+                bucket.take()
+                futures.append((uid, self.outbound.send(uid, text)))
+
+            newly_blocked = []
+            for uid, fut in futures:
+                try:
+                    fut.result()
+                    sent += 1
+                except Exception as e:
+                    if is_blocked_error(e):
+                        blocked += 1
+                        newly_blocked.append((uid, time.time()))
+                    else:
+                        failed += 1
+            last_id = batch[-1][0]
+            done_here += len(batch)
+
+            with self.db.write() as w:
+                if newly_blocked:
+                    w.executemany("INSERT OR IGNORE INTO blocked_users (user_id, blocked_at) VALUES (?, ?)",
+                                  newly_blocked)
+                w.execute("UPDATE broadcasts SET last_user_id=?, sent=?, failed=?, blocked=? WHERE id=?",
+                          (last_id, sent, failed, blocked, bid))
+
+            if time.monotonic() - last_report >= REPORT_EVERY:
+                last_report = time.monotonic()
+                report_msg = self._report(bid, report_msg, sent, failed, blocked, last_id,
+                                          done_here / max(last_report - started, 1e-6))
+
+        self._report(bid, report_msg, sent, failed, blocked, last_id, None, status)
+
+    # ---------- progress ----------
+    def _report(self, bid, report_msg, sent, failed, blocked, last_id, rate, status="Running"):
+        remaining = self.db.fetchone(f"SELECT COUNT(*) FROM users WHERE {RECIPIENTS}", (last_id,))[0]
+        text = (f"📣 Broadcast #{bid} — {status}\n"
+                f"✅ Sent: {sent} | ❌ Failed: {failed} | 🚫 Blocked: {blocked}\n"
+                f"⏳ বাকি: {remaining}")
+        if rate:
+            text += f"\n⚡ {rate:.1f} msg/s | ETA ~{int(remaining / rate)}s"
+
+        markup = None
+        if status == "Running":
+            markup = types.InlineKeyboardMarkup()
+            markup.add(types.InlineKeyboardButton("⏹ Stop", callback_data=f"bcstop_{bid}"))
+
+        try:
+            if report_msg:
+                self.outbound.api.edit_message_text(text, chat_id=self.admin_id, message_id=report_msg,
+                                                    reply_markup=markup)
+                return report_msg
+            msg = self.outbound.send(self.admin_id, text, reply_markup=markup).result()
+            self.db.execute("UPDATE broadcasts SET report_msg=? WHERE id=?", (msg.message_id, bid))
+            return msg.message_id
+        except Exception:
+            log.exception("Broadcast %s report failed", bid)
+            return report_msg
@@ -0,0 +1,92 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# ==============================
+# CONVERSATION STATE STORE
+# ==============================
+# withdraw/এডমিন flow এর per-user state। মেমোরিতে __slots__ রেকর্ড, LRU ক্রমে:
+#   - ttl সেকেন্ড কোনো সাড়া না দিলে flow বাতিল (অর্ধেক ছেড়ে যাওয়া withdraw)
+#   - max_size এর বেশি হলে সবচেয়ে পুরোনোটা বাদ — যত ইউজারই আসুক মেমোরি সীমিত
+# db দিলে প্রতিটি পরিবর্তন flow_state টেবিলেও লেখা হয়, ফলে রিস্টার্টের পর
+# চলমান flow ফিরে আসে। (এক ইউজারের আপডেট সবসময় একই প্রসেসে গেলে মেমোরি
+# ক্যাশ সঠিক থাকে।)
+FLOW_TTL = 15 * 60
+FLOW_MAX = 10000
+
+
+class FlowState:
+    """একজন ইউজারের চলমান multi-step flow: কোন flow, কোন step, আর জমানো ডেটা।"""
+    __slots__ = ("flow", "step", "data", "expires")
+
+    def __init__(self, flow: str, step: str, data: dict = None, expires: float = 0.0):
+        self.flow = flow
+        self.step = step
+        self.data = data if data is not None else {}
+        self.expires = expires
+
+
+class StateStore:
+    def __init__(self, ttl: float = FLOW_TTL, max_size: int = FLOW_MAX, db=None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.db = db
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def _evict(self, now: float):
+        # LRU ক্রমে সামনের গুলোই সবচেয়ে পুরোনো
+        items = self._items
+        while items:
+            oldest = next(iter(items.values()))
+            if oldest.expires > now and len(items) <= self.max_size:
+                break
+            items.popitem(last=False)
+
+    def get(self, uid: int):
+        now = time.time()
+        with self._lock:
+            state = self._items.get(uid)
+            if state is not None:
+                if state.expires > now:
+                    return state
+                del self._items[uid]
+                return None
+        if self.db is None:
+            return None
+
+        row = self.db.fetchone("SELECT flow, step, data, expires FROM flow_state WHERE user_id=?", (uid,))
+        if not row or row[3] <= now:
+            return None
+        state = FlowState(row[0], row[1], json.loads(row[2]), row[3])
+        with self._lock:
+            self._items[uid] = state
+            self._evict(now)
+        return state
+
+    def put(self, uid: int, state: FlowState):
+        """নতুন state রাখে বা বিদ্যমানটার TTL নবায়ন করে ও (থাকলে) DB তে সেভ করে।"""
+        now = time.time()
+        state.expires = now + self.ttl
+        with self._lock:
+            self._items[uid] = state
+            self._items.move_to_end(uid)
+            self._evict(now)
+        if self.db is not None:
+            with self.db.write() as w:
+                w.execute("INSERT OR REPLACE INTO flow_state (user_id, flow, step, data, expires) VALUES (?,?,?,?,?)",
+                          (uid, state.flow, state.step, json.dumps(state.data), state.expires))
+                self._writes += 1
+                if self._writes % 1000 == 0:
+                    w.execute("DELETE FROM flow_state WHERE expires <= ?", (now,))
+
+    def delete(self, uid: int):
+        with self._lock:
+            self._items.pop(uid, None)
+        if self.db is not None:
+            self.db.execute("DELETE FROM flow_state WHERE user_id=?", (uid,))
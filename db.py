@@ -0,0 +1,229 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from metrics import sql_label
+
+# ==============================
+# DATA ACCESS LAYER
+# ==============================
+# প্রতিটি থ্রেডের নিজস্ব read connection, আর সব write একটি মাত্র
+# writer connection দিয়ে সিরিয়ালি হয়। WAL মোডে reader রা কখনো
+# writer এর জন্য অপেক্ষা করে না।
+#
+# হ্যান্ডলারের ছোট ছোট write গুলো submit() দিয়ে group commit এ যায়: একটি
+# writer থ্রেড queue থেকে যতগুলো জমেছে (GROUP_MAX পর্যন্ত) নিয়ে এক
+# transaction এ চালায় — প্রতিটি নিজস্ব SAVEPOINT এ, তাই একটির exception
+# বাকিদের নষ্ট করে না। আগের COMMIT চলার সময় যেগুলো আসে সেগুলোই পরের ব্যাচ,
+# তাই ডিফল্টে বাড়তি অপেক্ষা নেই (GROUP_COMMIT_WAIT_MS দিলে প্রথমটার পর ততক্ষণ
+# আরও জমায়)। COMMIT এর পরই Future গুলো resolve হয়, অর্থাৎ caller রিপ্লাই দেয়
+# ডেটা durable হওয়ার পর।
+GROUP_WAIT = float(os.getenv("GROUP_COMMIT_WAIT_MS", "0")) / 1000
+GROUP_MAX = int(os.getenv("GROUP_COMMIT_MAX", "64"))
+
+
+class _TimedConnection(sqlite3.Connection):
+    """প্রতিটি execute/executemany এর সময় metrics এ যায় ("SELECT users", "COMMIT" ...)।"""
+    metrics = None
+
+    def execute(self, sql, params=()):
+        start = time.perf_counter()
+        error = True
+        try:
+            cur = super().execute(sql, params)
+            error = False
+            return cur
+        finally:
+            self.metrics.observe("db", sql_label(sql), time.perf_counter() - start, error)
+
+    def executemany(self, sql, seq):
+        start = time.perf_counter()
+        error = True
+        try:
+            cur = super().executemany(sql, seq)
+            error = False
+            return cur
+        finally:
+            self.metrics.observe("db", sql_label(sql), time.perf_counter() - start, error)
+
+
+class Database:
+    def __init__(self, path: str = "bot.db", busy_timeout: float = 5.0, metrics=None,
+                 group_wait: float = GROUP_WAIT, group_max: int = GROUP_MAX):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.group_wait = group_wait
+        self.group_max = group_max
+        self.batches = 0        # group commit এর সংখ্যা আর তাতে মোট কাজ (গড় ব্যাচ দেখতে)
+        self.batched = 0
+        self._queue = queue.SimpleQueue()
+        self._group = None
+        self._group_lock = threading.Lock()
+        # metrics.Metrics — দিলে সব connection এর প্রতিটি স্টেটমেন্ট মাপা হয়
+        self.metrics = metrics if metrics is not None and metrics.enabled else None
+        self._local = threading.local()
+        self._conns = []
+        self._conns_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None → আমরা নিজেরাই BEGIN/COMMIT নিয়ন্ত্রণ করি
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                               check_same_thread=False,
+                               factory=_TimedConnection if self.metrics else sqlite3.Connection)
+        if self.metrics:
+            conn.metrics = self.metrics
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        with self._conns_lock:
+            self._conns.append(conn)
+        return conn
+
+    @property
+    def reader(self) -> sqlite3.Connection:
+        """বর্তমান থ্রেডের read connection (প্রথমবার লাগলে তৈরি হয়)।"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # ---------- reads ----------
+    def fetchone(self, sql: str, params=()):
+        return self.reader.execute(sql, params).fetchone()
+
+    def fetchall(self, sql: str, params=()):
+        return self.reader.execute(sql, params).fetchall()
+
+    # ---------- writes ----------
+    @contextmanager
+    def write(self):
+        """
+        সিরিয়ালাইজড write transaction:
+            with db.write() as w:
+                w.execute(...)
+        ব্লক শেষ হলে commit, exception হলে rollback।
+        metrics থাকলে lock এর জন্য অপেক্ষা (contention) আর ধরে রাখার সময়ও মাপা হয়।
+        """
+        if self.metrics is None:
+            self._write_lock.acquire()
+        else:
+            waited = time.perf_counter()
+            self._write_lock.acquire()
+            held = time.perf_counter()
+            self.metrics.observe("db_lock", "wait", held - waited)
+        try:
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                # COMMIT নিজেও ব্যর্থ হতে পারে (deferred constraint, ডিস্ক) — তখনও
+                # transaction খোলা থাকে, lock ছাড়ার আগে বন্ধ করতে হয়
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+        finally:
+            self._write_lock.release()
+            if self.metrics is not None:
+                self.metrics.observe("db_lock", "hold", time.perf_counter() - held)
+
+    def execute(self, sql: str, params=()):
+        """একটি মাত্র write স্টেটমেন্ট নিজস্ব transaction এ চালায়।"""
+        with self.write() as w:
+            return w.execute(sql, params).rowcount
+
+    # ---------- group commit ----------
+    def submit(self, fn) -> Future:
+        """
+        fn(w) পরের group commit এ চলে; commit হলে Future এ fn এর return মান,
+        fn raise করলে সেই exception (শুধু fn এর কাজটুকু rollback)। fn এর
+        ভেতরে db.write()/submit().result() ডাকা যাবে না — writer থ্রেড আটকে যাবে।
+        """
+        future = Future()
+        if self._group is None:
+            with self._group_lock:
+                if self._group is None:
+                    self._group = threading.Thread(target=self._group_loop, daemon=True, name="db-writer")
+                    self._group.start()
+        self._queue.put((fn, future))
+        return future
+
+    def run(self, fn):
+        """submit(fn) করে commit পর্যন্ত অপেক্ষা; fn এর ফলাফল বা exception।"""
+        return self.submit(fn).result()
+
+    def _group_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.group_wait
+            while len(batch) < self.group_max:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            self._commit_batch(batch)
+
+    def _commit_batch(self, batch):
+        done = []
+        try:
+            with self.write() as w:
+                for fn, future in batch:
+                    w.execute("SAVEPOINT op")
+                    try:
+                        result = fn(w)
+                    except Exception as e:
+                        w.execute("ROLLBACK TO op")
+                        w.execute("RELEASE op")
+                        done.append((future, None, e))
+                        continue
+                    w.execute("RELEASE op")
+                    done.append((future, result, None))
+        except Exception as e:
+            # BEGIN/COMMIT ব্যর্থ — কিছুই সেভ হয়নি
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.batched += len(batch)
+        for future, result, error in done:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    # ---------- schema ----------
+    @property
+    def version(self) -> int:
+        return self._writer.execute("PRAGMA user_version").fetchone()[0]
+
+    def migrate(self, migrations) -> int:
+        """
+        migrations[i] হলো version i+1 — PRAGMA user_version এর পরেরগুলো
+        ক্রমে চালায়, প্রতিটি নিজস্ব transaction এ (মাঝপথে ব্যর্থ হলে সেটুকু
+        rollback, পরের স্টার্টে আবার চেষ্টা)। কয়টা চালানো হলো তা ফেরত দেয়।
+        """
+        applied = 0
+        for version, migration in enumerate(migrations, start=1):
+            with self.write() as w:
+                if w.execute("PRAGMA user_version").fetchone()[0] >= version:
+                    continue
+                migration(w)
+                w.execute(f"PRAGMA user_version = {version}")
+            applied += 1
+        return applied
+
+    def close(self):
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
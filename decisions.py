@@ -0,0 +1,80 @@
+import ledger
+
+# ==============================
+# TASK / WITHDRAW DECISIONS
+# ==============================
+# এক বা একসাথে অনেক আইটেম approve/reject — সব status পরিবর্তন আর withdraw
+# রিফান্ড একটি মাত্র transaction এ। শুধু যেগুলো তখনও Pending ছিল সেগুলোই
+# বদলায় ও ফেরত আসে, তাই দুইবার ক্লিক বা একই আইটেম দুই লিস্টে থাকলেও
+# ডাবল রিফান্ড হয় না। on_done(w, rows) — একই transaction এ (নোটিফিকেশন outbox এ)।
+# রিজেক্ট হওয়া টাস্কের ঠিকানা gmail_index থেকে মুছে যায়, যাতে ঠিক করা ফাইল
+# আবার জমা দিলে সেগুলো ডুপ্লিকেট না হয়।
+CHUNK = 500   # SQLite এর host parameter সীমার অনেক নিচে
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for i in range(0, len(ids), CHUNK):
+        yield ids[i:i + CHUNK]
+
+
+def decide_tasks(db, ids, approve: bool, on_done=None):
+    """Pending টাস্কগুলোর status বদলায়; [(task_id, user_id), ...] ফেরত দেয়।"""
+    status = "Approved" if approve else "Rejected"
+    done = []
+    with db.write() as w:
+        for chunk in _chunks(ids):
+            marks = ",".join("?" * len(chunk))
+            rows = w.execute(f"UPDATE tasks SET status=? WHERE status='Pending' AND id IN ({marks}) "
+                             f"RETURNING id, user_id", (status, *chunk)).fetchall()
+            if not approve and rows:
+                w.executemany("DELETE FROM gmail_index WHERE task_id=?", [(task_id,) for task_id, _ in rows])
+            done += rows
+        if on_done is not None and done:
+            on_done(w, done)
+    return done
+
+
+def decide_withdraws(db, ids, approve: bool, on_done=None, on_error=None):
+    """
+    Pending withdraw গুলোর status বদলায়; reject হলে একই transaction এ টাকা
+    ফেরত (request এর সময়েই কেটে রাখা হয়েছিল)। [(id, user_id, amount), ...]
+    প্রতিটি reject নিজস্ব SAVEPOINT এ — কোনোটার রিফান্ড ব্যর্থ হলে (যেমন ইউজার
+    নেই) শুধু সেটা Pending থাকে আর on_error(req_id, e), বাকিগুলো commit হয়।
+    on_error না দিলে exception পুরো transaction rollback করে।
+    """
+    status = "Approved" if approve else "Rejected"
+    done = []
+    with db.write() as w:
+        for chunk in _chunks(ids):
+            if approve:
+                marks = ",".join("?" * len(chunk))
+                done += w.execute(f"UPDATE withdraws SET status=? WHERE status='Pending' AND id IN ({marks}) "
+                                  f"RETURNING id, user_id, amount", (status, *chunk)).fetchall()
+                continue
+            for req_id in chunk:
+                w.execute("SAVEPOINT refund")
+                try:
+                    row = w.execute("UPDATE withdraws SET status=? WHERE status='Pending' AND id=? "
+                                    "RETURNING id, user_id, amount", (status, req_id)).fetchone()
+                    if row is not None:
+                        ledger.post(w, row[1], row[2], ledger.WITHDRAW_REFUND, ref=f"withdraw:{req_id}")
+                        done.append(row)
+                except (ledger.InsufficientFunds, KeyError) as e:
+                    if on_error is None:
+                        raise
+                    w.execute("ROLLBACK TO refund")
+                    on_error(req_id, e)
+                finally:
+                    w.execute("RELEASE refund")
+        if on_done is not None and done:
+            on_done(w, done)
+    return done
+
+
+def by_user(rows):
+    """[(id, user_id, ...)] → {user_id: [row, ...]} — প্রতি ইউজারে একটি নোটিফিকেশন।"""
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row[1], []).append(row)
+    return grouped
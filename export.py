@@ -0,0 +1,189 @@
+import csv
+import gzip
+import io
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+log = logging.getLogger(__name__)
+
+# ==============================
+# ADMIN EXPORTS
+# ==============================
+# users / withdraws / tasks keyset ব্যাচে (WHERE id > ?) পড়ে generator দিয়ে
+# সরাসরি gzip করা CSV temp ফাইলে লেখা হয় — মেমোরিতে একসাথে একটি ব্যাচই থাকে,
+# টেবিল যত বড়ই হোক। ব্যাচের মাঝে কোনো read transaction খোলা থাকে না, তাই
+# লম্বা এক্সপোর্টেও WAL checkpoint আটকায় না। ফাইল Telegram এর আপলোড সীমা
+# ছুঁলে নতুন part শুরু হয় (প্রতিটি part নিজের হেডারসহ আলাদাভাবে খোলা যায়)।
+BATCH = 5000
+PART_LIMIT = 45 * 1024 * 1024   # sendDocument সীমা 50MB; gzip buffer এর জন্য কিছুটা ফাঁকা
+DATE_FMT = "%Y-%m-%d"
+
+# টেবিল → (keyset কলাম, [কলাম], status ফিল্টার চলে কিনা)
+TABLES = {
+    "users": ("user_id", ["user_id", "balance", "refer_by", "ref_count", "ref_earn", "created_at"], False),
+    "withdraws": ("id", ["id", "user_id", "method", "number", "amount", "status", "created_at"], True),
+    "tasks": ("id", ["id", "user_id", "username", "file_id", "status", "gmail_rows", "invalid_rows",
+                     "duplicate_rows", "payout", "check_error", "created_at"], True),
+}
+
+
+class ExportRequest:
+    """/export <table> [status] [from] [to] — তারিখ YYYY-MM-DD, to সহ।"""
+    __slots__ = ("table", "status", "since", "until")
+
+    def __init__(self, table: str, status: str = None, since: float = None, until: float = None):
+        self.table = table
+        self.status = status
+        self.since = since
+        self.until = until
+
+    @classmethod
+    def parse(cls, args):
+        """['tasks', 'Pending', '2026-01-01'] → ExportRequest; ভুল হলে ValueError।"""
+        if not args or args[0].lower() not in TABLES:
+            raise ValueError("table")
+        table = args[0].lower()
+        status, dates = None, []
+        for arg in args[1:]:
+            if re.fullmatch(r"\d{4}-\d{2}-\d{2}", arg):
+                dates.append(datetime.strptime(arg, DATE_FMT))
+            elif status is None and TABLES[table][2]:
+                status = arg.capitalize()
+            else:
+                raise ValueError(arg)
+        if len(dates) > 2:
+            raise ValueError("dates")
+        since = dates[0].timestamp() if dates else None
+        until = (dates[1] + timedelta(days=1)).timestamp() if len(dates) == 2 else None
+        return cls(table, status, since, until)
+
+    @property
+    def name(self) -> str:
+        parts = [self.table]
+        if self.status:
+            parts.append(self.status)
+        if self.since is not None:
+            parts.append(time.strftime(DATE_FMT, time.localtime(self.since)))
+        if self.until is not None:
+            # until হলো শেষ দিনের পরের মধ্যরাত
+            parts.append(time.strftime(DATE_FMT, time.localtime(self.until - 1)))
+        return "_".join(parts)
+
+
+def rows(db, req: ExportRequest, batch: int = BATCH):
+    """ফিল্টার মেলা সারিগুলো keyset ক্রমে একটি একটি করে (created_at মানুষের পড়ার মতো)।"""
+    key, columns, _ = TABLES[req.table]
+    where, params = [], []
+    if req.status:
+        where.append("status = ?")
+        params.append(req.status)
+    if req.since is not None:
+        where.append("created_at >= ?")
+        params.append(req.since)
+    if req.until is not None:
+        where.append("created_at < ?")
+        params.append(req.until)
+    select = ", ".join(c if c != "created_at" else "datetime(created_at, 'unixepoch', 'localtime')"
+                       for c in columns)
+
+    last = None
+    while True:
+        cond = where + ([f"{key} > ?"] if last is not None else [])
+        args = params + ([last] if last is not None else [])
+        chunk = db.fetchall(f"SELECT {select} FROM {req.table} WHERE {' AND '.join(cond) or '1'} "
+                            f"ORDER BY {key} LIMIT ?", (*args, batch))
+        yield from chunk
+        if len(chunk) < batch:
+            return
+        last = chunk[-1][0]
+
+
+def _open_part(columns):
+    fd, path = tempfile.mkstemp(suffix=".csv.gz")
+    os.close(fd)
+    gz = gzip.GzipFile(path, "wb", compresslevel=6)
+    text = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    return path, gz, text, writer
+
+
+def write_parts(source, columns, limit: int = PART_LIMIT):
+    """
+    সারিগুলো gzip CSV temp ফাইলে লেখে; compressed আকার limit ছুঁলে নতুন
+    part। [(path, সারি সংখ্যা), ...] ফেরত দেয় — ফাইল মোছা caller এর দায়িত্ব।
+    """
+    parts = []
+    text = None
+    try:
+        for row in source:
+            if text is None:
+                path, gz, text, writer = _open_part(columns)
+                parts.append([path, 0])
+            writer.writerow(row)
+            parts[-1][1] += 1
+            if gz.fileobj.tell() >= limit:
+                text.close()
+                text = None
+        if not parts:
+            # কোনো সারি মেলেনি — শুধু হেডারসহ একটি ফাইল
+            path, gz, text, writer = _open_part(columns)
+            parts.append([path, 0])
+        if text is not None:
+            text.close()
+    except BaseException:
+        if text is not None:
+            text.close()
+        for path, _ in parts:
+            os.remove(path)
+        raise
+    return [tuple(p) for p in parts]
+
+
+class Exporter:
+    """এক্সপোর্ট আলাদা থ্রেডে চলে; একসাথে একটাই (ডিস্ক/CPU সীমিত রাখতে)।"""
+
+    def __init__(self, db, outbound):
+        self.db = db
+        self.outbound = outbound
+        self._busy = threading.Lock()
+
+    def start(self, chat_id: int, req: ExportRequest) -> bool:
+        if not self._busy.acquire(blocking=False):
+            return False
+        threading.Thread(target=self._run, args=(chat_id, req), daemon=True, name=f"export-{req.table}").start()
+        return True
+
+    def _run(self, chat_id: int, req: ExportRequest):
+        try:
+            self.export(chat_id, req)
+        except Exception as e:
+            log.exception("Export %s failed", req.name)
+            self.outbound.send(chat_id, f"❌ Export ব্যর্থ: {e}")
+        finally:
+            self._busy.release()
+
+    def export(self, chat_id: int, req: ExportRequest):
+        started = time.perf_counter()
+        parts = write_parts(rows(self.db, req), TABLES[req.table][1])
+        took = time.perf_counter() - started
+        total = sum(count for _, count in parts)
+        try:
+            for i, (path, count) in enumerate(parts, start=1):
+                suffix = f".part{i}" if len(parts) > 1 else ""
+                caption = f"📤 {req.name}: {count:,} সারি"
+                if len(parts) > 1:
+                    caption += f" (part {i}/{len(parts)}, মোট {total:,})"
+                with open(path, "rb") as f:
+                    # পাঠানো শেষ হওয়া পর্যন্ত অপেক্ষা — তারপরই ফাইল মোছা যায়
+                    self.outbound.send_document(chat_id, f, caption=caption + f" • {took:.1f}s",
+                                                visible_file_name=f"{req.name}{suffix}.csv.gz").result()
+        finally:
+            for path, _ in parts:
+                os.remove(path)
+        return total
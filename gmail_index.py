@@ -0,0 +1,126 @@
+import hashlib
+import math
+import os
+import threading
+
+# ==============================
+# DUPLICATE GMAIL INDEX
+# ==============================
+# সব টাস্কে জমা হওয়া প্রতিটি ঠিকানা normalize করে gmail_index টেবিলে (unique
+# index) রাখা হয়। সামনে একটি in-memory Bloom filter: "নেই" উত্তর মেমোরি থেকেই
+# আসে, শুধু সম্ভাব্য ডুপ্লিকেট (খুব অল্প false positive সহ) DB তে যাচাই হয়।
+# ফলে index লাখ-কোটিতে বাড়লেও নতুন ঠিকানার খরচ একই থাকে।
+# ডুপ্লিকেট = অন্য কোনো টাস্কের ঠিকানা; একই টাস্ক আবার যাচাই হলে (রিস্টার্টের
+# পর) নিজের ঠিকানা ডুপ্লিকেট নয়। রিজেক্ট হওয়া টাস্কের ঠিকানা index থেকে মুছে
+# যায় (decisions.py), তাই ঠিক করা ফাইল আবার জমা দেওয়া যায়।
+BLOOM_CAPACITY = int(os.getenv("GMAIL_BLOOM_CAPACITY", "5000000"))
+BLOOM_ERROR = 0.01
+CHUNK = 500
+GMAIL_DOMAINS = ("gmail.com", "googlemail.com")
+
+
+def normalize(address: str) -> str:
+    """ছোট হাতের অক্ষর; gmail এ লোকাল অংশের '.' আর '+ট্যাগ' বাদ, googlemail → gmail।"""
+    local, _, domain = address.strip().lower().rpartition("@")
+    if domain in GMAIL_DOMAINS:
+        local = local.split("+", 1)[0].replace(".", "")
+        domain = "gmail.com"
+    return f"{local}@{domain}"
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # double hashing: একটি blake2b থেকে k টি পজিশন
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class GmailIndex:
+    def __init__(self, db, capacity: int = BLOOM_CAPACITY):
+        self.db = db
+        self.capacity = capacity
+        self._bloom = None
+        self._lock = threading.Lock()
+
+    def _load(self, capacity: int):
+        """টেবিল থেকে streaming এ Bloom filter তৈরি (প্রথম ব্যবহারে / ভরে গেলে দ্বিগুণ আকারে)।"""
+        total = self.db.fetchone("SELECT COUNT(*) FROM gmail_index")[0]
+        while capacity < total * 2:
+            capacity *= 2
+        bloom = BloomFilter(capacity)
+        for (address,) in self.db.reader.execute("SELECT address FROM gmail_index"):
+            bloom.add(address)
+        self.capacity, self._bloom = capacity, bloom
+
+    @staticmethod
+    def _owners(w, candidates) -> dict:
+        """address → task_id, index এ যেগুলো আছে (write transaction এর ভেতরে)।"""
+        owners = {}
+        for i in range(0, len(candidates), CHUNK):
+            chunk = candidates[i:i + CHUNK]
+            marks = ",".join("?" * len(chunk))
+            owners.update(w.execute(f"SELECT address, task_id FROM gmail_index WHERE address IN ({marks})",
+                                    chunk).fetchall())
+        return owners
+
+    def register(self, task_id: int, user_id: int, addresses, on_done=None) -> int:
+        """
+        normalize করা ঠিকানাগুলো index এ যোগ করে; ডুপ্লিকেট কয়টা (একই ফাইলে
+        দুইবার, বা অন্য কোনো টাস্কে) তা ফেরত দেয়। on_done(w, duplicates) একই
+        transaction এ (টাস্কের ফলাফল লেখা)।
+        """
+        with self._lock:
+            if self._bloom is None:
+                self._load(self.capacity)
+            bloom = self._bloom
+
+            seen, fresh, maybe = set(), [], []
+            duplicates = 0
+            for address in addresses:
+                if address in seen:
+                    duplicates += 1
+                    continue
+                seen.add(address)
+                (maybe if address in bloom else fresh).append(address)
+
+            with self.db.write() as w:
+                owners = self._owners(w, maybe)
+                duplicates += sum(owners[a] != task_id for a in maybe if a in owners)
+                fresh += [a for a in maybe if a not in owners]
+                inserted = w.executemany("INSERT OR IGNORE INTO gmail_index (address, task_id, user_id) "
+                                         "VALUES (?,?,?)", [(a, task_id, user_id) for a in fresh]).rowcount
+                if inserted < len(fresh):
+                    # অন্য প্রসেস (supervisor worker) এর যোগ করা ঠিকানা এই Bloom এ নেই — IGNORE হওয়া গুলোর মালিক দেখি
+                    duplicates += sum(owner != task_id for owner in self._owners(w, fresh).values())
+                if on_done is not None:
+                    on_done(w, duplicates)
+            for address in fresh:
+                bloom.add(address)
+            if bloom.count > self.capacity:
+                self._load(self.capacity * 2)
+            return duplicates
+
+    def __contains__(self, address: str) -> bool:
+        with self._lock:
+            if self._bloom is None:
+                self._load(self.capacity)
+            if address not in self._bloom:
+                return False
+        return self.db.fetchone("SELECT 1 FROM gmail_index WHERE address=?", (address,)) is not None
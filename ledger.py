@@ -0,0 +1,93 @@
+import time
+
+# ==============================
+# BALANCE LEDGER
+# ==============================
+# ব্যালেন্সের প্রতিটি পরিবর্তন ledger এ একটি append-only এন্ট্রি (কারণ +
+# রেফারেন্স সহ), আর users.balance হলো তার materialized যোগফল। দুটোই একই
+# write transaction এ লেখা হয় — তাই সবসময় sum(ledger.delta) == balance,
+# যা reconcile() দিয়ে যাচাই করা যায়। balance বদলানোর অন্য কোনো পথ নেই।
+
+# reason
+OPENING = "opening"              # ledger চালুর আগের ব্যালেন্স (migration)
+ADMIN_ADD = "admin_add"
+ADMIN_SET = "admin_set"
+ADMIN_REDUCE = "admin_reduce"
+WITHDRAW = "withdraw"
+WITHDRAW_REFUND = "withdraw_refund"
+REF_JOIN = "ref_join"
+REF_BONUS = "ref_bonus"
+
+
+class InsufficientFunds(Exception):
+    def __init__(self, user_id: int, balance: int, delta: int):
+        super().__init__(f"user {user_id}: balance {balance}, delta {delta}")
+        self.user_id = user_id
+        self.balance = balance
+        self.delta = delta
+
+
+def post(w, user_id: int, delta: int, reason: str, ref: str = None) -> int:
+    """
+    w = db.write() এর connection। guarded update: কেটে নিলে (delta < 0)
+    ব্যালেন্স শূন্যের নিচে নামলে InsufficientFunds (caller এর পুরো transaction
+    rollback হয়)। জমা সবসময় হয় — ledger এর আগের (migration এ আনা) মাইনাস
+    ব্যালেন্সেও রিফান্ড/বোনাস আটকায় না। নতুন ব্যালেন্স ফেরত দেয়।
+    """
+    row = w.execute("UPDATE users SET balance = COALESCE(balance, 0) + ? "
+                    "WHERE user_id=? AND (? >= 0 OR COALESCE(balance, 0) + ? >= 0) RETURNING balance",
+                    (delta, user_id, delta, delta)).fetchone()
+    if row is None:
+        current = w.execute("SELECT COALESCE(balance, 0) FROM users WHERE user_id=?", (user_id,)).fetchone()
+        if current is None:
+            raise KeyError(user_id)
+        raise InsufficientFunds(user_id, current[0], delta)
+    w.execute("INSERT INTO ledger (user_id, delta, balance_after, reason, ref, created_at) VALUES (?,?,?,?,?,?)",
+              (user_id, delta, row[0], reason, ref, time.time()))
+    return row[0]
+
+
+def set_balance(w, user_id: int, new_balance: int, reason: str = ADMIN_SET, ref: str = None) -> int:
+    """ব্যালেন্স নির্দিষ্ট মানে আনে (ledger এ পার্থক্যটুকু যায়); delta ফেরত দেয়।"""
+    if new_balance < 0:
+        raise ValueError(new_balance)
+    row = w.execute("SELECT COALESCE(balance, 0) FROM users WHERE user_id=?", (user_id,)).fetchone()
+    if row is None:
+        raise KeyError(user_id)
+    delta = new_balance - row[0]
+    if delta:
+        post(w, user_id, delta, reason, ref)
+    return delta
+
+
+def statement(db, user_id: int, before_id: int = None, limit: int = 10):
+    """নতুন → পুরোনো এন্ট্রি, keyset (id < before_id) — idx_ledger_user_id দিয়ে সরাসরি seek।"""
+    if before_id is None:
+        return db.fetchall("SELECT id, delta, balance_after, reason, ref, created_at FROM ledger "
+                           "WHERE user_id=? ORDER BY id DESC LIMIT ?", (user_id, limit))
+    return db.fetchall("SELECT id, delta, balance_after, reason, ref, created_at FROM ledger "
+                       "WHERE user_id=? AND id < ? ORDER BY id DESC LIMIT ?", (user_id, before_id, limit))
+
+
+def reconcile(db):
+    """
+    users আর ledger দুটোই user_id ক্রমে একবার করে পড়ে merge করে (পুরো টেবিল
+    মেমোরিতে তোলে না)। (user_id, balance, ledger_sum) mismatch গুলো yield করে।
+    """
+    conn = db.reader
+    users = conn.execute("SELECT user_id, COALESCE(balance, 0) FROM users ORDER BY user_id")
+    sums = conn.execute("SELECT user_id, SUM(delta) FROM ledger GROUP BY user_id ORDER BY user_id")
+    u, s = next(users, None), next(sums, None)
+    while u is not None or s is not None:
+        if s is None or (u is not None and u[0] < s[0]):
+            if u[1] != 0:
+                yield u[0], u[1], 0
+            u = next(users, None)
+        elif u is None or s[0] < u[0]:
+            # ledger এ আছে কিন্তু ইউজার নেই
+            yield s[0], None, s[1]
+            s = next(sums, None)
+        else:
+            if u[1] != s[1]:
+                yield u[0], u[1], s[1]
+            u, s = next(users, None), next(sums, None)
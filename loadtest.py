@@ -0,0 +1,478 @@
+"""
+অফলাইন লোড টেস্ট — আসল Telegram বা টোকেন ছাড়াই bot.py কত আপডেট/সেকেন্ড সামলায়।
+
+    python loadtest.py [--updates 5000] [--workers 8] [--users 2000] [--latency 30] [--jitter 20]
+    python loadtest.py --processes 4 [--lanes 4]     # supervisor.py এর বহু-প্রসেস মোড
+
+একটি লোকাল fake Bot API সার্ভার (sendMessage, editMessageText,
+answerCallbackQuery, sendDocument, getMe, getFile + ফাইল ডাউনলোড; প্রতি কলে
+কনফিগার করা latency) চালু করে bot.py কে একটি temp ডিরেক্টরিতে import করা হয়,
+সব request সেদিকে যায়। তারপর বাস্তবের মতো মিশ্র সেশন (রেফারসহ /start,
+ব্যালেন্স, রেফার, withdraw flow, ফাইল জমা, এডমিন approve) workers টি থ্রেডে
+চালানো হয় — এক চ্যাটের আপডেট ক্রমানুসারে, যেমন webhook/polling এ হয়।
+ফলাফল: থ্রুপুট, প্রতি ধরনের আপডেটে p50/p95/p99, DB write lock এর অপেক্ষা,
+আর fake সার্ভারে কোন মেথড কতবার এসেছে।
+
+--processes দিলে আপডেটগুলো supervisor.Supervisor দিয়ে chat.id অনুযায়ী
+worker প্রসেসে যায় (একই bot.db); latency তখন supervisor থেকে পাঠানো থেকে
+handler শেষ পর্যন্ত (inbox এ অপেক্ষাসহ)।
+"""
+import functools
+import argparse
+import io
+import json
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+TOKEN = "123456:LOADTEST"
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Load", "username": "loadtest_bot"}
+ADMIN_ID = 7922495578   # bot.ADMIN_ID এর সাথে মেলে; import এর পর আবার নেওয়া হয়
+
+# সেশনের ধরন → ওজন (শতাংশের মতো)
+MIX = {
+    "start": 20,      # /start <রেফারার>
+    "balance": 30,
+    "refer": 10,
+    "withdraw": 15,   # 💵 Withdraw → মেথড → নম্বর → পরিমাণ
+    "upload": 10,     # .xlsx জমা (getFile + ডাউনলোড + যাচাই)
+    "admin": 5,       # 📂/📋 লিস্ট + কয়েকটি approve/reject
+}
+
+
+# ==============================
+# FAKE BOT API
+# ==============================
+class _FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # requests এর keep-alive session
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _handle(self):
+        api = self.server.api
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)   # sendDocument এর multipart — ফেলে দিই
+        parts = url.path.split("/")
+        api.pause()
+        if len(parts) > 2 and parts[1] == "file":
+            api.count("download")
+            body, ctype = api.file_bytes, "application/octet-stream"
+        else:
+            method = parts[-1]
+            api.count(method)
+            result = api.result(method, dict(parse_qsl(url.query)))
+            body, ctype = json.dumps({"ok": True, "result": result}).encode(), "application/json"
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _handle
+
+
+class FakeBotAPI:
+    def __init__(self, latency: float = 0.03, jitter: float = 0.02, file_bytes: bytes = b""):
+        self.latency = latency
+        self.jitter = jitter
+        self.file_bytes = file_bytes
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._message_id = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeHandler)
+        self.server.daemon_threads = True
+        self.server.api = self
+
+    @property
+    def base(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True, name="fake-api").start()
+
+    def stop(self):
+        self.server.shutdown()
+
+    def pause(self):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.random() * self.jitter)
+
+    def count(self, method: str):
+        with self._lock:
+            self.calls[method] += 1
+
+    def _message(self, chat_id) -> dict:
+        with self._lock:
+            self._message_id += 1
+            message_id = self._message_id
+        return {"message_id": message_id, "date": int(time.time()), "from": BOT_USER,
+                "chat": {"id": int(chat_id or 0), "type": "private"}, "text": "ok"}
+
+    def result(self, method: str, params: dict):
+        if method == "getMe":
+            return BOT_USER
+        if method in ("sendMessage", "editMessageText"):
+            return self._message(params.get("chat_id"))
+        if method == "sendDocument":
+            msg = self._message(params.get("chat_id"))
+            msg["document"] = {"file_id": "doc", "file_unique_id": "doc"}
+            return msg
+        if method == "getFile":
+            file_id = params.get("file_id", "")
+            return {"file_id": file_id, "file_unique_id": file_id, "file_size": len(self.file_bytes),
+                    "file_path": f"documents/{file_id}.xlsx"}
+        return True   # answerCallbackQuery ইত্যাদি
+
+
+def sample_workbook(rows: int = 20) -> bytes:
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(["Email", "Password"])
+    for i in range(rows):
+        ws.append([f"load.{random.getrandbits(48):x}.{i}@gmail.com", "password123"])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+# ==============================
+# SYNTHETIC TRAFFIC
+# ==============================
+class Traffic:
+    """সেশন = (chat_id, kind, আপডেটের generator)। admin সেশন চলার সময়ই Pending id পড়ে।"""
+
+    def __init__(self, app, users: int, seed: int = 1, raw: bool = False):
+        from telebot import types
+
+        self.app = app
+        # raw=True: Update অবজেক্ট নয়, JSON dict (supervisor এ প্রসেসের বাইরে যায়)
+        self.wrap = (lambda update: update) if raw else types.Update.de_json
+        self.users = users
+        self.rnd = random.Random(seed)
+        self.next_user = 10_000 + users   # নতুন ইউজার এখান থেকে
+        self._update_id = 0
+        self._lock = threading.Lock()
+
+    def _ids(self):
+        with self._lock:
+            self._update_id += 1
+            return self._update_id
+
+    def message(self, uid: int, text: str = None, document: dict = None):
+        n = self._ids()
+        msg = {"message_id": n, "date": int(time.time()), "chat": {"id": uid, "type": "private"},
+               "from": {"id": uid, "is_bot": False, "first_name": "u", "username": f"u{uid}"}}
+        if document:
+            msg["document"] = document
+        else:
+            msg["text"] = text
+        return self.wrap({"update_id": n, "message": msg})
+
+    def callback(self, uid: int, data: str):
+        n = self._ids()
+        return self.wrap({"update_id": n, "callback_query": {
+            "id": str(n), "chat_instance": "load", "data": data,
+            "from": {"id": uid, "is_bot": False, "first_name": "u"},
+            "message": {"message_id": n, "date": int(time.time()), "chat": {"id": uid, "type": "private"},
+                        "text": "x"}}})
+
+    def existing(self) -> int:
+        return 10_000 + self.rnd.randrange(self.users)
+
+    def session(self):
+        kind = self.rnd.choices(list(MIX), weights=list(MIX.values()))[0]
+        if kind == "start":
+            with self._lock:
+                uid = self.next_user
+                self.next_user += 1
+            return uid, kind, iter([self.message(uid, f"/start {self.existing()}")])
+        if kind == "admin":
+            return ADMIN_ID, kind, self._admin()
+        uid = self.existing()
+        if kind == "balance":
+            return uid, kind, iter([self.message(uid, "💰 Balance")])
+        if kind == "refer":
+            return uid, kind, iter([self.message(uid, "👥 Refer")])
+        if kind == "withdraw":
+            amount = str(self.rnd.choice([50, 60, 100, 500, 5000]))
+            return uid, kind, iter([self.message(uid, "💵 Withdraw"), self.message(uid, "📲 Bkash"),
+                                    self.message(uid, "01700000000"), self.message(uid, amount)])
+        file_id = f"f{self._ids()}"
+        return uid, kind, iter([self.message(uid, document={
+            "file_id": file_id, "file_unique_id": file_id, "file_name": "gmails.xlsx"})])
+
+    def _admin(self):
+        app = self.app
+        if self.rnd.random() < 0.5:
+            yield self.message(ADMIN_ID, "📂 Task Requests")
+            rows = app.db.fetchall("SELECT id FROM tasks WHERE status='Pending' ORDER BY id DESC LIMIT 5")
+            for (task_id,) in rows:
+                yield self.callback(ADMIN_ID, f"{self.rnd.choice(['tapprove', 'treject'])}_{task_id}")
+        else:
+            yield self.message(ADMIN_ID, "📋 All Requests")
+            rows = app.db.fetchall("SELECT id FROM withdraws WHERE status='Pending' ORDER BY id DESC LIMIT 5")
+            for (req_id,) in rows:
+                yield self.callback(ADMIN_ID, f"{self.rnd.choice(['approve', 'reject'])}_{req_id}")
+
+
+# ==============================
+# RUNNER
+# ==============================
+def _pct(values, q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def lift_limits(app):
+    # fake সার্ভারে flood limit নেই — rate limiter যেন থ্রুপুট না ঢাকে
+    import outbound
+
+    outbound.CHAT_RATE = outbound.CHAT_BURST = 1e6
+    app.outbound._global = outbound.TokenBucket(1e6, 1e6)
+
+
+def configure(base: str, telegram_limits: bool, outbound_workers, app):
+    """তৈরি করা app কে fake সার্ভারের দিকে তাক (supervisor worker এর setup ও এটাই)।"""
+    from telebot import apihelper
+
+    apihelper.API_URL = base + "/bot{0}/{1}"
+    apihelper.FILE_URL = base + "/file/bot{0}/{1}"
+    if not telegram_limits:
+        lift_limits(app)
+    if outbound_workers:
+        app.outbound.workers = outbound_workers   # প্রথম send এর আগে — থ্রেড তখনই চালু হয়
+
+
+def load_app(api: FakeBotAPI, workdir: str, telegram_limits: bool, outbound_workers: int = None):
+    """bot.py এর app workdir এ (আলাদা bot.db) তৈরি করে fake সার্ভারের দিকে তাক করে।"""
+    os.chdir(workdir)
+    os.environ["BOT_TOKEN"] = TOKEN
+    os.environ.setdefault("METRICS_FILE", os.path.join(workdir, "metrics.prom"))
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import bot
+
+    app = bot.create_app(bot.Config(token=TOKEN, db_path=os.path.join(workdir, "bot.db")))
+
+    app.bot.threaded = False   # আমাদের worker থ্রেডই handler চালায়, সময় মাপা যায়
+    configure(api.base, telegram_limits, outbound_workers, app)
+    return app
+
+
+def seed_users(app, users: int):
+    import ledger
+
+    now = time.time()
+    with app.db.write() as w:
+        w.executemany("INSERT OR IGNORE INTO users (user_id, created_at) VALUES (?, ?)",
+                      ((10_000 + i, now) for i in range(users)))
+        for i in range(users):
+            ledger.post(w, 10_000 + i, 1000, ledger.ADMIN_ADD, ref="loadtest")
+
+
+def run(app, traffic: Traffic, updates: int, workers: int):
+    jobs = queue.Queue(maxsize=workers * 4)
+    # এডমিন একজন মানুষ: আগের সেশনের উত্তর আসার আগে নতুন ক্লিক নয়, আর
+    # তার চ্যাট আলাদা লেনে চলে যাতে user worker রা তার জন্য আটকে না থাকে
+    admin_jobs = queue.Queue(maxsize=1)
+    chat_locks = {}
+    results = []           # (kind, seconds, ok) — list.append thread-safe
+    done = Counter()
+
+    def worker(jobs):
+        while True:
+            item = jobs.get()
+            if item is None:
+                return
+            chat_id, kind, session = item
+            lock = chat_locks.setdefault(chat_id, threading.Lock())
+            with lock:
+                for update in session:
+                    start = time.perf_counter()
+                    ok = True
+                    try:
+                        app.bot.process_new_updates([update])
+                    except Exception:
+                        ok = False
+                    results.append((kind, time.perf_counter() - start, ok))
+
+    threads = [threading.Thread(target=worker, args=(jobs,), daemon=True) for _ in range(workers)]
+    admin = threading.Thread(target=worker, args=(admin_jobs,), daemon=True)
+    for t in threads + [admin]:
+        t.start()
+    started = time.perf_counter()
+    issued = 0
+    while issued < updates:
+        chat_id, kind, session = traffic.session()
+        if kind == "admin":
+            try:
+                admin_jobs.put_nowait((chat_id, kind, session))
+            except queue.Full:
+                continue
+        else:
+            jobs.put((chat_id, kind, session))
+        done[kind] += 1
+        issued += 4 if kind == "withdraw" else 3 if kind == "admin" else 1
+    for _ in threads:
+        jobs.put(None)
+    admin_jobs.put(None)
+    for t in threads + [admin]:
+        t.join()
+    handled = time.perf_counter() - started
+
+    # handler শেষ মানেই রিপ্লাই পৌঁছেনি — outbox আর outbound queue খালি হওয়া পর্যন্ত
+    while app.outbound.pending() or app.outbox.pending():
+        time.sleep(0.01)
+    drained = time.perf_counter() - started
+    return results, done, handled, drained
+
+
+def run_sharded(supervisor, traffic: Traffic, updates: int):
+    """একই ট্রাফিক supervisor দিয়ে worker প্রসেসে; এডমিন সেশন আগেরটা শেষ হলে তবেই।"""
+    kinds = {}
+    admin_open = set()
+    results = []
+    done = Counter()
+
+    def on_done(update_id, seconds, ok):
+        results.append((kinds.pop(update_id), seconds, ok))
+        admin_open.discard(update_id)
+
+    supervisor.on_done = on_done
+    started = time.perf_counter()
+    issued = 0
+    while issued < updates:
+        chat_id, kind, session = traffic.session()
+        if kind == "admin" and admin_open:
+            continue
+        for raw in session:
+            kinds[raw["update_id"]] = kind
+            if kind == "admin":
+                admin_open.add(raw["update_id"])
+            supervisor.dispatch(raw)
+            issued += 1
+        done[kind] += 1
+    while supervisor.handled < supervisor.sent:
+        time.sleep(0.01)
+    handled = time.perf_counter() - started
+    supervisor.stop()   # worker রা outbound queue খালি করে তবেই থামে
+    drained = time.perf_counter() - started
+    return results, done, handled, drained
+
+
+def report(results, sessions, handled, drained, api: FakeBotAPI, app, as_json: bool):
+    by_kind = {}
+    for kind, seconds, ok in results:
+        entry = by_kind.setdefault(kind, [[], 0])
+        entry[0].append(seconds)
+        entry[1] += not ok
+    every = sorted(s for _, s, _ in results)
+    summary = {
+        "updates": len(results),
+        "sessions": dict(sessions),
+        "handled_s": round(handled, 3),
+        "updates_per_s": round(len(results) / handled, 1),
+        "replies_drained_s": round(drained, 3),
+        "replies_per_s": round(api.calls["sendMessage"] / drained, 1),
+        "latency_ms": {kind: {"n": len(values), "errors": errors,
+                              "p50": round(_pct(sorted(values), .50) * 1000, 2),
+                              "p95": round(_pct(sorted(values), .95) * 1000, 2),
+                              "p99": round(_pct(sorted(values), .99) * 1000, 2)}
+                       for kind, (values, errors) in sorted(by_kind.items())},
+        "api_calls": dict(api.calls.most_common()),
+    }
+    summary["latency_ms"]["all"] = {"n": len(every), "errors": sum(not ok for *_, ok in results),
+                                    "p50": round(_pct(every, .50) * 1000, 2),
+                                    "p95": round(_pct(every, .95) * 1000, 2),
+                                    "p99": round(_pct(every, .99) * 1000, 2)}
+    # app=None: বহু-প্রসেস — lock/flood এর হিসাব worker দের নিজস্ব metrics ফাইলে
+    if app is not None:
+        locks = {label: (count, p50, p95, p99)
+                 for _, label, count, _, p50, p95, p99 in app.metrics.summary("db_lock")}
+        summary["db_lock_ms"] = {label: {"n": count, "p50": round(p50 * 1000, 3), "p95": round(p95 * 1000, 3),
+                                         "p99": round(p99 * 1000, 3)}
+                                 for label, (count, p50, p95, p99) in locks.items()}
+        summary["db_errors"] = sum(errors for _, _, _, errors, *_ in app.metrics.summary("db", top=1000))
+        summary["flood_dropped"] = dict(app.flood.dropped)
+
+    if as_json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return summary
+    print(f"{summary['updates']:,} updates in {handled:.2f}s → {summary['updates_per_s']:,} updates/s; "
+          f"replies drained at {drained:.2f}s → {summary['replies_per_s']:,} sendMessage/s")
+    print(f"\n{'kind':>10}  {'n':>6}  {'err':>4}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}")
+    for kind, row in summary["latency_ms"].items():
+        print(f"{kind:>10}  {row['n']:>6}  {row['errors']:>4}  {row['p50']:8.2f}  {row['p95']:8.2f}  {row['p99']:8.2f}")
+    print()
+    if app is not None:
+        print("DB write lock (ms): " + ", ".join(
+            f"{label} p50 {row['p50']} / p95 {row['p95']} / p99 {row['p99']}"
+            for label, row in summary["db_lock_ms"].items()) + f" | statement errors: {summary['db_errors']}")
+    print("Bot API calls: " + ", ".join(f"{m} {n:,}" for m, n in summary["api_calls"].items()))
+    if summary.get("flood_dropped"):
+        print("Anti-flood dropped: " + ", ".join(f"{a} {n:,}" for a, n in summary["flood_dropped"].items()))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=8, help="একসাথে কয়টি আপডেট হ্যান্ডেল হবে")
+    parser.add_argument("--users", type=int, default=2000, help="আগে থেকে থাকা ইউজার (ব্যালেন্সসহ)")
+    parser.add_argument("--latency", type=float, default=30, help="fake API এর প্রতি কলে ms")
+    parser.add_argument("--jitter", type=float, default=20, help="latency এর উপর র‍্যান্ডম 0..jitter ms")
+    parser.add_argument("--telegram-limits", action="store_true", help="outbound এর আসল flood limit রাখো")
+    parser.add_argument("--outbound-workers", type=int, default=None, help="outbound sender থ্রেড (ডিফল্ট bot.py এর)")
+    parser.add_argument("--processes", type=int, default=0, help="supervisor.py এর worker প্রসেস (0 = এক প্রসেস)")
+    parser.add_argument("--lanes", type=int, default=None, help="প্রতি worker প্রসেসে চ্যাট-লেন")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="ফলাফল JSON এ (regression তুলনার জন্য)")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    api = FakeBotAPI(args.latency / 1000, args.jitter / 1000, sample_workbook())
+    api.start()
+    with tempfile.TemporaryDirectory() as workdir:
+        app = load_app(api, workdir, args.telegram_limits, args.outbound_workers)
+        global ADMIN_ID
+        ADMIN_ID = app.ADMIN_ID
+        seed_users(app, args.users)
+        if args.processes:
+            # এই প্রসেস শুধু ট্রাফিক বানায়; হ্যান্ডলার চলে worker প্রসেসে (একই workdir/bot.db)
+            from supervisor import LANES, Supervisor
+
+            setup = functools.partial(configure, api.base, args.telegram_limits, args.outbound_workers)
+            supervisor = Supervisor(args.processes, args.lanes or LANES, setup=setup).start()
+            if not supervisor.wait_ready():
+                sys.exit("worker প্রসেস চালু হয়নি")
+            traffic = Traffic(app, args.users, args.seed, raw=True)
+            results, sessions, handled, drained = run_sharded(supervisor, traffic, args.updates)
+            report(results, sessions, handled, drained, api, None, args.json)
+        else:
+            app.start_background_jobs()
+            traffic = Traffic(app, args.users, args.seed)
+            results, sessions, handled, drained = run(app, traffic, args.updates, args.workers)
+            report(results, sessions, handled, drained, api, app, args.json)
+        app.task_checker.close()
+        app.outbox.close()
+        app.db.close()
+    api.stop()
+    sys.stdout.flush()
+    # ব্যাকগ্রাউন্ড থ্রেড (settler, outbound, checker) এর জন্য অপেক্ষা নয়
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
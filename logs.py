@@ -0,0 +1,23 @@
+import logging
+import os
+
+# ==============================
+# LOGGING
+# ==============================
+# ব্যাকগ্রাউন্ড থ্রেড, হ্যান্ডলার আর ওয়ার্কারের ত্রুটি logging দিয়ে যায় (traceback
+# সহ, সময় আর প্রসেস/থ্রেডের নাম সমেত) — মডিউলগুলো শুধু getLogger(__name__) নেয়।
+# প্রতিটি এন্ট্রি পয়েন্ট (bot.py, supervisor.py ও তার worker, async_bot.py)
+# চালুর সময় setup() ডাকে। LOG_FILE দিলে stderr এর বদলে ফাইলে (append)।
+LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+FILE = os.getenv("LOG_FILE") or None
+FORMAT = "%(asctime)s %(levelname)s [%(processName)s/%(threadName)s] %(name)s: %(message)s"
+
+
+def setup():
+    logging.basicConfig(level=LEVEL, format=FORMAT, filename=FILE)
+    # pyTelegramBotAPI এর নিজস্ব stderr handler আছে — root এ আবার গেলে দুইবার ছাপা হত
+    telebot_log = logging.getLogger("TeleBot")
+    if FILE is None:
+        telebot_log.propagate = False
+    else:
+        telebot_log.handlers.clear()
@@ -0,0 +1,215 @@
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache
+
+log = logging.getLogger(__name__)
+
+# ==============================
+# METRICS (handler / DB / Telegram API)
+# ==============================
+# প্রতিটি মাপ (count, error, মোট সময়, latency histogram) যে থ্রেড মাপছে
+# তার নিজস্ব dict এ যায় — hot path এ কোনো lock নেই, শুধু দুটো perf_counter
+# আর একটি bisect। পড়ার সময় (/stats, Prometheus ফাইল) সব থ্রেডের dict যোগ
+# করা হয়; পড়া চলাকালীন আসা মাপ পরের বার ধরা পড়ে, হারায় না।
+#   handler{name}   router এর প্রতিটি handler (bot.py)
+#   db{op}          প্রতিটি cursor execute — "SELECT users", "COMMIT" ...
+#   api{method}     প্রতিটি Bot API কল — sendMessage, getMe ...
+#   db_lock{kind}   write lock এর জন্য অপেক্ষা (wait) আর ধরে রাখা (hold)
+ENABLED = os.getenv("METRICS", "1") == "1"
+METRICS_FILE = os.getenv("METRICS_FILE", "metrics.prom")
+WRITE_EVERY = float(os.getenv("METRICS_EVERY", "15"))   # সেকেন্ড
+
+# 10µs থেকে ~2 মিনিট, প্রতি ধাপে √2 গুণ — percentile এর ভুল ~20% এর মধ্যে
+BUCKETS = [1e-5 * 2 ** (i / 2) for i in range(48)]
+
+
+class _Series:
+    __slots__ = ("count", "errors", "total", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)   # শেষটা +Inf
+
+
+def quantile(buckets, q: float) -> float:
+    """histogram থেকে q-th percentile (bucket এর ভেতরে linear interpolation)।"""
+    count = sum(buckets)
+    if not count:
+        return 0.0
+    rank = q * count
+    seen = 0
+    for i, n in enumerate(buckets):
+        if n and seen + n >= rank:
+            low = BUCKETS[i - 1] if i > 0 else 0.0
+            high = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+            return low + (high - low) * (rank - seen) / n
+        seen += n
+    return BUCKETS[-1]
+
+
+@lru_cache(maxsize=2048)
+def sql_label(sql: str) -> str:
+    """"SELECT id FROM tasks WHERE ..." → "SELECT tasks" (IN (?,?..) এর দৈর্ঘ্য যাই হোক)।"""
+    words = sql.split(None, 1)
+    if not words:
+        return "?"
+    verb = words[0].upper()
+    if verb not in ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE"):
+        return verb   # BEGIN / COMMIT / PRAGMA / CREATE ...
+    m = re.search(r"\b(?:FROM|INTO|UPDATE)\s+([A-Za-z_]\w*)", sql, re.IGNORECASE)
+    return f"{verb} {m.group(1)}" if m else verb
+
+
+def _escape(label: str) -> str:
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    def __init__(self, enabled: bool = ENABLED):
+        self.enabled = enabled
+        self.started = time.time()
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()   # শুধু নতুন থ্রেডের shard যোগ করতে
+        self._writer = None
+
+    # ---------- recording ----------
+    def _shard(self) -> dict:
+        shard = self._local.series = {}
+        with self._lock:
+            self._shards.append(shard)
+        return shard
+
+    def observe(self, name: str, label: str, seconds: float, error: bool = False):
+        try:
+            shard = self._local.series
+        except AttributeError:   # এই থ্রেডের প্রথম মাপ
+            shard = self._shard()
+        series = shard.get((name, label))
+        if series is None:
+            series = shard[(name, label)] = _Series()
+        series.count += 1
+        series.total += seconds
+        if error:
+            series.errors += 1
+        series.buckets[bisect_left(BUCKETS, seconds)] += 1
+
+    def wrap(self, name: str, label: str, fn):
+        """fn কে মাপা সংস্করণে মুড়ে দেয় (exception হলে error গোনা হয়, আবার raise)।"""
+        if not self.enabled:
+            return fn
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = clock()
+            error = True
+            try:
+                result = fn(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                self.observe(name, label, clock() - start, error)
+        timed.__name__ = getattr(fn, "__name__", label)
+        return timed
+
+    # ---------- Telegram API ----------
+    def instrument_telebot(self):
+        """
+        pyTelegramBotAPI এর সব sync Bot API request (CUSTOM_REQUEST_SENDER) মাপে।
+        HTTP 200 ছাড়া সব (400/403/429 ...) error হিসেবে গোনা।
+        """
+        if not self.enabled:
+            return
+        from telebot import apihelper
+
+        clock = time.perf_counter
+
+        def sender(method, url, **kwargs):
+            start = clock()
+            error = True
+            try:
+                response = apihelper._get_req_session().request(method, url, **kwargs)
+                error = response.status_code != 200
+                return response
+            finally:
+                self.observe("api", url.rsplit("/", 1)[-1], clock() - start, error)
+
+        apihelper.CUSTOM_REQUEST_SENDER = sender
+
+    # ---------- reading ----------
+    def snapshot(self) -> dict:
+        """{(name, label): (count, errors, total, buckets)} — সব থ্রেড মিলিয়ে।"""
+        with self._lock:
+            shards = list(self._shards)
+        merged = {}
+        for shard in shards:
+            for key, s in list(shard.items()):
+                count, errors, total, buckets = merged.get(key, (0, 0, 0.0, [0] * (len(BUCKETS) + 1)))
+                merged[key] = (count + s.count, errors + s.errors, total + s.total,
+                               [a + b for a, b in zip(buckets, s.buckets)])
+        return merged
+
+    def summary(self, name: str = None, top: int = 15):
+        """[(name, label, count, errors, p50, p95, p99)] — মোট সময় বেশি যেগুলোর, সেগুলো আগে।"""
+        rows = []
+        for (n, label), (count, errors, total, buckets) in self.snapshot().items():
+            if name is None or n == name:
+                rows.append((total, n, label, count, errors,
+                             quantile(buckets, 0.50), quantile(buckets, 0.95), quantile(buckets, 0.99)))
+        rows.sort(reverse=True)
+        return [row[1:] for row in rows[:top]]
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format (node_exporter textfile collector এর জন্য)।"""
+        lines = []
+        by_name = {}
+        for (name, label), value in sorted(self.snapshot().items()):
+            by_name.setdefault(name, []).append((label, value))
+        label_key = {"handler": "name", "db": "op", "api": "method", "db_lock": "kind"}
+        for name, series in by_name.items():
+            metric = f"bot_{name}_seconds"
+            key = label_key.get(name, "label")
+            lines.append(f"# TYPE {metric} histogram")
+            for label, (count, errors, total, buckets) in series:
+                tag = f'{key}="{_escape(label)}"'
+                cumulative = 0
+                for bound, n in zip(BUCKETS, buckets):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{{tag},le="{bound:.6g}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{tag},le="+Inf"}} {count}')
+                lines.append(f"{metric}_sum{{{tag}}} {total:.6f}")
+                lines.append(f"{metric}_count{{{tag}}} {count}")
+            lines.append(f"# TYPE bot_{name}_errors_total counter")
+            for label, (count, errors, total, buckets) in series:
+                lines.append(f'bot_{name}_errors_total{{{key}="{_escape(label)}"}} {errors}')
+        lines.append("# TYPE bot_start_time_seconds gauge")
+        lines.append(f"bot_start_time_seconds {self.started:.0f}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str = METRICS_FILE):
+        # আধা-লেখা ফাইল যেন কেউ না পড়ে: tmp এ লিখে rename
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def start_writer(self, path: str = METRICS_FILE, interval: float = WRITE_EVERY):
+        if not self.enabled or not path or self._writer is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write(path)
+                except Exception:
+                    log.exception("Metrics write failed")
+
+        self._writer = threading.Thread(target=loop, daemon=True, name="metrics")
+        self._writer.start()
@@ -0,0 +1,288 @@
+# ==============================
+# SCHEMA MIGRATIONS
+# ==============================
+# PRAGMA user_version = শেষ যে migration চালানো হয়েছে তার নম্বর।
+# Database.migrate(MIGRATIONS) শুধু নতুনগুলো চালায়, প্রতিটি নিজস্ব transaction এ।
+# নতুন পরিবর্তন লাগলে তালিকার শেষে নতুন ফাংশন যোগ করো — পুরোনোগুলো বদলাবে না।
+
+
+def add_column(w, table: str, column: str, decl: str):
+    """কলাম না থাকলে যোগ করে (পুরোনো DB তেও নিরাপদ)।"""
+    cols = {row[1] for row in w.execute(f"PRAGMA table_info({table})")}
+    if column not in cols:
+        w.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+def m001_base_tables(w):
+    w.execute("""
+    CREATE TABLE IF NOT EXISTS users (
+        user_id   INTEGER PRIMARY KEY,
+        balance   INTEGER DEFAULT 0,
+        refer_by  INTEGER,
+        ref_count INTEGER DEFAULT 0,
+        ref_earn  INTEGER DEFAULT 0
+    )
+    """)
+    # খুব পুরোনো DB তে এই কলামগুলো ছিল না
+    add_column(w, "users", "refer_by", "INTEGER")
+    add_column(w, "users", "ref_count", "INTEGER DEFAULT 0")
+    add_column(w, "users", "ref_earn", "INTEGER DEFAULT 0")
+
+    w.execute("""
+    CREATE TABLE IF NOT EXISTS withdraws (
+        id      INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        method  TEXT,
+        number  TEXT,
+        amount  INTEGER,
+        status  TEXT DEFAULT 'Pending'
+    )
+    """)
+
+    # টাস্ক সাবমিশনের জন্য টেবিল
+    w.execute("""
+    CREATE TABLE IF NOT EXISTS tasks (
+        id       INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id  INTEGER,
+        username TEXT,
+        file_id  TEXT,
+        status   TEXT DEFAULT 'Pending'
+    )
+    """)
+
+    # settings টেবিল (task_price ইত্যাদি স্টোর করার জন্য)
+    w.execute("""
+    CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """)
+
+
+def m002_broadcast_and_flows(w):
+    # ব্রডকাস্ট অগ্রগতি
+    w.execute("""
+    CREATE TABLE IF NOT EXISTS broadcasts (
+        id           INTEGER PRIMARY KEY AUTOINCREMENT,
+        text         TEXT,
+        status       TEXT DEFAULT 'Running',
+        last_user_id INTEGER DEFAULT 0,
+        sent         INTEGER DEFAULT 0,
+        failed       INTEGER DEFAULT 0,
+        blocked      INTEGER DEFAULT 0,
+        started_at   REAL,
+        report_msg   INTEGER
+    )
+    """)
+    # যেসব ইউজার বট ব্লক করেছে — পরের ব্রডকাস্টে বাদ যায়
+    w.execute("""
+    CREATE TABLE IF NOT EXISTS blocked_users (
+        user_id    INTEGER PRIMARY KEY,
+        blocked_at REAL
+    )
+    """)
+    # চলমান withdraw/এডমিন flow (PERSIST_FLOWS=1 হলে ব্যবহৃত)
+    w.execute("""
+    CREATE TABLE IF NOT EXISTS flow_state (
+        user_id INTEGER PRIMARY KEY,
+        flow    TEXT,
+        step    TEXT,
+        data    TEXT,
+        expires REAL
+    )
+    """)
+
+
+def m003_hot_path_indexes(w):
+    # 📂 Task Requests: WHERE status='Pending' ORDER BY id DESC
+    w.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status_id ON tasks(status, id)")
+    # withdraw approve/reject ও লিস্ট: status দিয়ে, নতুন আগে
+    w.execute("CREATE INDEX IF NOT EXISTS idx_withdraws_status_id ON withdraws(status, id)")
+    # ইউজারের withdraw ইতিহাস
+    w.execute("CREATE INDEX IF NOT EXISTS idx_withdraws_user ON withdraws(user_id)")
+    # রেফারেল স্ট্যাটস / বোনাস
+    w.execute("CREATE INDEX IF NOT EXISTS idx_users_refer_by ON users(refer_by)")
+
+
+def m004_ledger(w):
+    # ব্যালেন্সের প্রতিটি পরিবর্তন (ledger.py)
+    w.execute("""
+    CREATE TABLE IF NOT EXISTS ledger (
+        id            INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id       INTEGER NOT NULL,
+        delta         INTEGER NOT NULL,
+        balance_after INTEGER NOT NULL,
+        reason        TEXT NOT NULL,
+        ref           TEXT,
+        created_at    REAL
+    )
+    """)
+    # স্টেটমেন্ট (user_id, id DESC) আর reconcile (user_id ক্রমে SUM)
+    w.execute("CREATE INDEX IF NOT EXISTS idx_ledger_user_id ON ledger(user_id, id)")
+    # আগের ব্যালেন্স opening এন্ট্রি হিসেবে — যাতে শুরু থেকেই sum(delta) == balance
+    w.execute("UPDATE users SET balance = 0 WHERE balance IS NULL")
+    w.execute("""
+    INSERT INTO ledger (user_id, delta, balance_after, reason, created_at)
+    SELECT user_id, balance, balance, 'opening', strftime('%s', 'now')
+    FROM users WHERE balance != 0
+    """)
+
+
+def m005_ref_pending(w):
+    # সেটল না হওয়া রেফারেল বোনাস, micro-৳ এ (referral.py)
+    w.execute("""
+    CREATE TABLE IF NOT EXISTS ref_pending (
+        referrer_id INTEGER PRIMARY KEY,
+        micros      INTEGER NOT NULL DEFAULT 0,
+        credits     INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+
+
+def m006_task_check(w):
+    # ফাইল যাচাইয়ের ফলাফল (task_files.py) — NULL মানে এখনো যাচাই হয়নি
+    add_column(w, "tasks", "gmail_rows", "INTEGER")
+    add_column(w, "tasks", "invalid_rows", "INTEGER")
+    add_column(w, "tasks", "payout", "REAL")
+    add_column(w, "tasks", "check_error", "TEXT")
+
+
+def m007_gmail_index(w):
+    # সব জমা হওয়া ঠিকানা, normalize করা (gmail_index.py)
+    w.execute("""
+    CREATE TABLE IF NOT EXISTS gmail_index (
+        address TEXT NOT NULL,
+        task_id INTEGER NOT NULL,
+        user_id INTEGER
+    )
+    """)
+    w.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_gmail_address ON gmail_index(address)")
+    add_column(w, "tasks", "duplicate_rows", "INTEGER")
+
+
+def m008_file_unique_id(w):
+    # একই ফাইল দুইবার জমা আটকাতে (task_files.SubmittedFiles)
+    add_column(w, "tasks", "file_unique_id", "TEXT")
+    w.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_file_unique ON tasks(file_unique_id)")
+
+
+def m009_created_at(w):
+    # এক্সপোর্টের তারিখ ফিল্টার (export.py) — আগের সারিতে NULL থাকে
+    add_column(w, "users", "created_at", "REAL")
+    add_column(w, "withdraws", "created_at", "REAL")
+    add_column(w, "tasks", "created_at", "REAL")
+
+
+def m010_stats(w):
+    # ড্যাশবোর্ডের চলমান যোগফল (stats.py) — trigger দিয়ে সবসময় হালনাগাদ
+    w.execute("""
+    CREATE TABLE IF NOT EXISTS stats (
+        key   TEXT PRIMARY KEY,
+        value NUMERIC NOT NULL DEFAULT 0
+    )
+    """)
+    bump = "INSERT INTO stats (key, value) VALUES {} ON CONFLICT(key) DO UPDATE SET value = value + excluded.value"
+    w.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS stats_users_insert AFTER INSERT ON users BEGIN
+        {bump.format("('users', 1), ('balance', COALESCE(NEW.balance, 0))")};
+    END
+    """)
+    w.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS stats_users_signup AFTER INSERT ON users WHEN NEW.created_at IS NOT NULL BEGIN
+        {bump.format("('signups.' || date(NEW.created_at, 'unixepoch', 'localtime'), 1)")};
+    END
+    """)
+    w.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS stats_users_balance AFTER UPDATE OF balance ON users
+    WHEN NEW.balance IS NOT OLD.balance BEGIN
+        {bump.format("('balance', COALESCE(NEW.balance, 0) - COALESCE(OLD.balance, 0))")};
+    END
+    """)
+    w.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS stats_users_delete AFTER DELETE ON users BEGIN
+        {bump.format("('users', -1), ('balance', -COALESCE(OLD.balance, 0))")};
+    END
+    """)
+    # withdraws / tasks: status অনুযায়ী count আর টাকার যোগফল
+    for table, total in (("withdraws", "amount"), ("tasks", "payout")):
+        old = (f"('{table}.' || lower(COALESCE(OLD.status, 'none')) || '.count', -1), "
+               f"('{table}.' || lower(COALESCE(OLD.status, 'none')) || '.{total}', -COALESCE(OLD.{total}, 0))")
+        new = (f"('{table}.' || lower(COALESCE(NEW.status, 'none')) || '.count', 1), "
+               f"('{table}.' || lower(COALESCE(NEW.status, 'none')) || '.{total}', COALESCE(NEW.{total}, 0))")
+        w.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS stats_{table}_insert AFTER INSERT ON {table} BEGIN
+            {bump.format(new)};
+        END
+        """)
+        w.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS stats_{table}_update AFTER UPDATE OF status, {total} ON {table}
+        WHEN NEW.status IS NOT OLD.status OR NEW.{total} IS NOT OLD.{total} BEGIN
+            {bump.format(old)};
+            {bump.format(new)};
+        END
+        """)
+        w.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS stats_{table}_delete AFTER DELETE ON {table} BEGIN
+            {bump.format(old)};
+        END
+        """)
+    # বর্তমান ডেটা থেকে শুরুর মান
+    w.execute("DELETE FROM stats")
+    w.execute("""
+    INSERT INTO stats (key, value)
+    SELECT 'users', COUNT(*) FROM users
+    UNION ALL SELECT 'balance', COALESCE(SUM(balance), 0) FROM users
+    UNION ALL SELECT 'withdraws.' || lower(COALESCE(status, 'none')) || '.count', COUNT(*) FROM withdraws GROUP BY 1
+    UNION ALL SELECT 'withdraws.' || lower(COALESCE(status, 'none')) || '.amount', COALESCE(SUM(amount), 0)
+              FROM withdraws GROUP BY 1
+    UNION ALL SELECT 'tasks.' || lower(COALESCE(status, 'none')) || '.count', COUNT(*) FROM tasks GROUP BY 1
+    UNION ALL SELECT 'tasks.' || lower(COALESCE(status, 'none')) || '.payout', COALESCE(SUM(payout), 0)
+              FROM tasks GROUP BY 1
+    UNION ALL SELECT 'signups.' || date(created_at, 'unixepoch', 'localtime'), COUNT(*)
+              FROM users WHERE created_at IS NOT NULL GROUP BY 1
+    """)
+
+
+def m011_outbox(w):
+    # টিকে থাকা ইউজার নোটিফিকেশন (outbox.py) — পৌঁছালে সারি মুছে যায়
+    w.execute("""
+    CREATE TABLE IF NOT EXISTS outbox (
+        id         INTEGER PRIMARY KEY AUTOINCREMENT,
+        chat_id    INTEGER NOT NULL,
+        text       TEXT NOT NULL,
+        status     TEXT NOT NULL DEFAULT 'Pending',
+        attempts   INTEGER NOT NULL DEFAULT 0,
+        next_at    REAL NOT NULL,
+        last_error TEXT,
+        created_at REAL
+    )
+    """)
+    w.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_at)")
+
+
+def m012_gmail_index_task(w):
+    # রিজেক্ট হলে টাস্কের ঠিকানা মোছা হয় (decisions.py); আগে রিজেক্ট হওয়া গুলোও এখনই
+    w.execute("CREATE INDEX IF NOT EXISTS idx_gmail_task ON gmail_index(task_id)")
+    w.execute("DELETE FROM gmail_index WHERE task_id IN (SELECT id FROM tasks WHERE status='Rejected')")
+
+
+def m013_file_lookup_at(w):
+    # file_unique_id backfill এ getFile চেষ্টা হয়ে গেছে (task_files.SubmittedFiles.backfill)
+    add_column(w, "tasks", "file_lookup_at", "REAL")
+
+
+MIGRATIONS = [
+    m001_base_tables,
+    m002_broadcast_and_flows,
+    m003_hot_path_indexes,
+    m004_ledger,
+    m005_ref_pending,
+    m006_task_check,
+    m007_gmail_index,
+    m008_file_unique_id,
+    m009_created_at,
+    m010_stats,
+    m011_outbox,
+    m012_gmail_index_task,
+    m013_file_lookup_at,
+]
@@ -0,0 +1,237 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from telebot.apihelper import ApiTelegramException
+
+log = logging.getLogger(__name__)
+
+# ==============================
+# OUTBOUND MESSAGE QUEUE
+# ==============================
+# হ্যান্ডলার মেসেজ queue তে রেখে সাথে সাথে ফেরত যায়; sender থ্রেডগুলো
+# Telegram এর flood limit মেনে পাঠায়:
+#   - global token bucket (~30 msg/s)
+#   - প্রতি চ্যাটে আলাদা token bucket (~1 msg/s, ছোট burst সহ)
+#   - একই চ্যাটের মেসেজ ক্রমানুসারে (এক চ্যাটে একসাথে একটাই in-flight)
+#   - 429 পেলে সার্ভারের retry_after পর্যন্ত ওই চ্যাট থামিয়ে আবার চেষ্টা
+#   - এডমিন অ্যালার্ট অল্প সময় অপেক্ষা করে, burst হলে একটি মেসেজে জোড়া লাগে
+GLOBAL_RATE = 30.0
+GLOBAL_BURST = 30
+CHAT_RATE = 1.0
+CHAT_BURST = 3
+ALERT_DELAY = 1.5
+MAX_TEXT = 4096
+MAX_RETRIES = 5
+MAX_IDLE_CHATS = 10000
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "stamp")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.stamp = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_time(self, now: float) -> float:
+        """একটি টোকেন পেতে আর কত সেকেন্ড লাগবে (0 = এখনই পাওয়া যাবে)।"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class _Job:
+    __slots__ = ("method", "args", "kwargs", "future", "not_before", "attempts", "alert")
+
+    def __init__(self, method, args, kwargs, not_before=0.0, alert=False):
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.not_before = not_before
+        self.attempts = 0
+        self.alert = alert
+
+
+class _Chat:
+    __slots__ = ("jobs", "bucket", "busy", "queued", "paused_until")
+
+    def __init__(self):
+        self.jobs = deque()
+        self.bucket = TokenBucket(CHAT_RATE, CHAT_BURST)
+        self.busy = False
+        self.queued = False
+        self.paused_until = 0.0
+
+
+def retry_after(e: Exception):
+    """429 হলে Telegram এর retry_after (সেকেন্ড), নইলে None।"""
+    if isinstance(e, ApiTelegramException) and e.error_code == 429:
+        params = (e.result_json or {}).get("parameters") or {}
+        return float(params.get("retry_after", 1))
+    return None
+
+
+class Outbound:
+    def __init__(self, api, workers: int = 4, global_rate: float = GLOBAL_RATE,
+                 global_burst: float = GLOBAL_BURST, alert_delay: float = ALERT_DELAY):
+        self.api = api
+        self.workers = workers
+        self.alert_delay = alert_delay
+        self._global = TokenBucket(global_rate, global_burst)
+        self._chats = {}
+        self._order = deque()  # যেসব চ্যাটে কাজ আছে (round-robin)
+        self._cond = threading.Condition()
+        self._threads = []
+
+    # ---------- enqueue ----------
+    def _start(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            t = threading.Thread(target=self._work, daemon=True, name=f"outbound-{i}")
+            t.start()
+            self._threads.append(t)
+
+    def _enqueue(self, chat_id, job: _Job) -> Future:
+        with self._cond:
+            self._start()
+            chat = self._chats.get(chat_id)
+            if chat is None:
+                if len(self._chats) > MAX_IDLE_CHATS:
+                    self._prune()
+                chat = self._chats[chat_id] = _Chat()
+            chat.jobs.append(job)
+            self._schedule(chat_id, chat)
+            self._cond.notify()
+        return job.future
+
+    def _schedule(self, chat_id, chat: _Chat):
+        if not chat.queued:
+            chat.queued = True
+            self._order.append(chat_id)
+
+    def _prune(self):
+        # কাজ নেই এবং bucket ভরে গেছে এমন চ্যাট রাখার দরকার নেই
+        now = time.monotonic()
+        for chat_id in [k for k, c in self._chats.items()
+                        if not c.queued and not c.busy and c.bucket.is_full(now)]:
+            del self._chats[chat_id]
+
+    def send(self, chat_id, text, **kwargs) -> Future:
+        return self._enqueue(chat_id, _Job("send_message", (chat_id, text), kwargs))
+
+    def send_document(self, chat_id, document, **kwargs) -> Future:
+        return self._enqueue(chat_id, _Job("send_document", (chat_id, document), kwargs))
+
+    def alert(self, chat_id, text) -> Future:
+        """
+        এডমিন অ্যালার্ট: queue তে এখনো না-পাঠানো আগের অ্যালার্ট থাকলে তার
+        সাথেই জুড়ে দেওয়া হয়, ফলে burst একটি মেসেজ হয়ে যায়।
+        """
+        with self._cond:
+            chat = self._chats.get(chat_id)
+            if chat and chat.jobs:
+                last = chat.jobs[-1]
+                if last.alert and last.attempts == 0 and len(last.args[1]) + len(text) + 2 <= MAX_TEXT:
+                    last.args = (chat_id, last.args[1] + "\n\n" + text)
+                    return last.future
+        job = _Job("send_message", (chat_id, text), {}, time.monotonic() + self.alert_delay, alert=True)
+        return self._enqueue(chat_id, job)
+
+    def share_global(self, parts: int):
+        """global limit টা parts টি প্রসেসে ভাগ করে এটুকু রাখে (supervisor এর প্রতিটি worker)।"""
+        with self._cond:
+            self._global = TokenBucket(self._global.rate / parts, max(1.0, self._global.capacity / parts))
+
+    # ---------- workers ----------
+    def _next(self):
+        """পাঠানোর উপযোগী (chat_id, job) অথবা (None, অপেক্ষার সময়)।"""
+        now = time.monotonic()
+        wait = self._global.wait_time(now)
+        if wait:
+            return None, wait
+        wait = 1.0
+        for _ in range(len(self._order)):
+            chat_id = self._order.popleft()
+            chat = self._chats[chat_id]
+            if not chat.jobs:
+                # কাজ শেষ — bucket টা রেখে দিই যাতে পরের মেসেজেও per-chat limit বজায় থাকে
+                chat.queued = False
+                continue
+            self._order.append(chat_id)
+            if chat.busy:
+                continue
+            job = chat.jobs[0]
+            ready_at = max(job.not_before, chat.paused_until)
+            delay = max(ready_at - now, chat.bucket.wait_time(now))
+            if delay > 0:
+                wait = min(wait, delay)
+                continue
+            chat.jobs.popleft()
+            chat.busy = True
+            chat.bucket.take()
+            self._global.take()
+            return chat_id, job
+        return None, wait
+
+    def _done(self, chat_id, job: _Job = None, pause: float = 0.0):
+        with self._cond:
+            chat = self._chats[chat_id]
+            chat.busy = False
+            if job is not None:
+                # retry → সামনেই ফিরিয়ে রাখি যাতে ক্রম ঠিক থাকে
+                chat.jobs.appendleft(job)
+                chat.paused_until = time.monotonic() + pause
+                self._schedule(chat_id, chat)
+            self._cond.notify_all()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while True:
+                    chat_id, job_or_wait = self._next()
+                    if chat_id is not None:
+                        break
+                    self._cond.wait(job_or_wait)
+            job = job_or_wait
+
+            job.attempts += 1
+            try:
+                result = getattr(self.api, job.method)(*job.args, **job.kwargs)
+            except Exception as e:
+                pause = retry_after(e)
+                if pause is not None and job.attempts < MAX_RETRIES:
+                    # ফাইল (send_document) আবার পাঠাতে হলে শুরু থেকে পড়তে হবে
+                    for arg in job.args:
+                        if hasattr(arg, "seek"):
+                            arg.seek(0)
+                    self._done(chat_id, job, pause)
+                    continue
+                self._done(chat_id)
+                if getattr(e, "error_code", None) != 403:  # ব্লক করা ইউজার প্রত্যাশিত, লগ নয়
+                    log.warning("%s to %s failed", job.method, chat_id, exc_info=e)
+                job.future.set_exception(e)
+                continue
+            self._done(chat_id)
+            job.future.set_result(result)
+
+    def pending(self) -> int:
+        with self._cond:
+            return sum(len(c.jobs) for c in self._chats.values())
@@ -0,0 +1,161 @@
+import logging
+import threading
+import time
+from concurrent.futures import TimeoutError
+
+from telebot.apihelper import ApiTelegramException
+
+from broadcast import is_blocked_error
+
+log = logging.getLogger(__name__)
+
+# ==============================
+# NOTIFICATION OUTBOX
+# ==============================
+# ব্যালেন্স/স্ট্যাটাস বদলের নোটিফিকেশন (withdraw/টাস্ক সিদ্ধান্ত, রেফার বোনাস,
+# এডমিনের ব্যালেন্স পরিবর্তন) সরাসরি পাঠানো হয় না — state change এর একই
+# transaction এ outbox টেবিলে লেখা হয়। তাই commit হলে নোটিফিকেশনও টিকে থাকে
+# (রিস্টার্ট বা Telegram এর সাময়িক সমস্যাতেও হারায় না), rollback হলে যায়ও না।
+# drainer থ্রেড due সারিগুলো outbound queue দিয়ে পাঠায়:
+#   - পৌঁছালে সারি মুছে ফেলা হয়
+#   - 403 (বট ব্লক) → blocked_users এ, ওই চ্যাটের বাকি সারিও বাদ; পরে
+#     আসা সারি পাঠানোর চেষ্টা ছাড়াই বাদ (/start দিলে আবার খোলে)
+#   - 400 (ভুল অনুরোধ, চ্যাট নেই) → সাথে সাথে Failed
+#   - বাকি (নেটওয়ার্ক, 5xx, 429 শেষ) → BACKOFF·2^n পরে আবার, MAX_ATTEMPTS পরে Failed
+#   - SEND_TIMEOUT এর মধ্যে উত্তর না এলে (আটকে থাকা send) — ওটাও retry, যাতে
+#     drainer থ্রেড আটকে না থাকে আর lease শেষের আগেই সারিগুলো ছাড়া হয়
+# claim করা সারির next_at LEASE পর্যন্ত সরিয়ে রাখা হয়, তাই supervisor এর
+# একাধিক প্রসেস একই সারি দুইবার পাঠায় না; প্রসেস মাঝপথে মারা গেলে LEASE
+# শেষে অন্য কেউ আবার পাঠায় (at-least-once)।
+BATCH = 50
+POLL = 2.0            # সেকেন্ড — অন্য প্রসেসের লেখা / retry এর সময় হলো কিনা
+LEASE = 120.0
+BACKOFF = 5.0
+MAX_DELAY = 3600.0
+MAX_ATTEMPTS = 10
+SEND_TIMEOUT = LEASE / 2   # পুরো ব্যাচের জন্য; lease শেষের আগে ফলাফল লেখার সময় থাকে
+
+
+def _permanent(e: Exception) -> bool:
+    return isinstance(e, ApiTelegramException) and e.error_code == 400
+
+
+class Outbox:
+    def __init__(self, db, outbound, batch: int = BATCH, poll: float = POLL):
+        self.db = db
+        self.outbound = outbound
+        self.batch = batch
+        self.poll = poll
+        self.sent = 0
+        self.retried = 0
+        self.skipped = 0       # ব্লক করা চ্যাট
+        self.failed = 0
+        self._inflight = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def add(self, w, chat_id: int, text: str):
+        """w = যে write transaction এ state বদলেছে সেটাই; commit এর পর পাঠানো হয়।"""
+        now = time.time()
+        w.execute("INSERT INTO outbox (chat_id, text, next_at, created_at) VALUES (?, ?, ?, ?)",
+                  (chat_id, text, now, now))
+        # drainer জাগে, তবে claim ও write lock নেয় — তাই এই transaction commit হওয়ার পরেই দেখে
+        self.start()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, daemon=True, name="outbox")
+                self._thread.start()
+        self._wake.set()
+
+    # ---------- drain ----------
+    def _claim(self):
+        now = time.time()
+        with self.db.write() as w:
+            rows = w.execute("""
+                SELECT o.id, o.chat_id, o.text, o.attempts, b.user_id IS NOT NULL
+                FROM outbox o LEFT JOIN blocked_users b ON b.user_id = o.chat_id
+                WHERE o.status = 'Pending' AND o.next_at <= ?
+                ORDER BY o.next_at LIMIT ?
+            """, (now, self.batch)).fetchall()
+            blocked = [(oid,) for oid, *_, is_blocked in rows if is_blocked]
+            live = [row[:4] for row in rows if not row[4]]
+            w.executemany("DELETE FROM outbox WHERE id=?", blocked)
+            w.executemany("UPDATE outbox SET next_at=? WHERE id=?", [(now + LEASE, row[0]) for row in live])
+            self._inflight = len(live)    # commit এর আগেই, যাতে pending() মাঝখানে 0 না দেখে
+        self.skipped += len(blocked)
+        return live, len(blocked)
+
+    def drain(self) -> int:
+        """due সারির একটি ব্যাচ; কয়টা সারি নিষ্পত্তি হলো (0 = এখন কিছু নেই)।"""
+        live, skipped = self._claim()
+        if not live:
+            return skipped
+        futures = [(row, self.outbound.send(row[1], row[2])) for row in live]
+        deadline = time.monotonic() + SEND_TIMEOUT
+
+        delivered, blocked, retry, dead = [], [], [], []
+        for (oid, chat_id, _, attempts), fut in futures:
+            try:
+                fut.result(timeout=max(0.0, deadline - time.monotonic()))
+                delivered.append((oid,))
+            except Exception as e:
+                if isinstance(e, TimeoutError):
+                    fut.cancel()      # এখনো queue তে থাকলে আর যাবে না
+                    error = f"send timed out after {SEND_TIMEOUT:.0f}s"
+                else:
+                    error = str(e)[:300]
+                if is_blocked_error(e):
+                    blocked.append((chat_id, time.time()))
+                elif _permanent(e) or attempts + 1 >= MAX_ATTEMPTS:
+                    dead.append((attempts + 1, error, oid))
+                else:
+                    delay = min(MAX_DELAY, BACKOFF * 2 ** attempts)
+                    retry.append((attempts + 1, time.time() + delay, error, oid))
+
+        with self.db.write() as w:
+            w.executemany("DELETE FROM outbox WHERE id=?", delivered)
+            if blocked:
+                w.executemany("INSERT OR IGNORE INTO blocked_users (user_id, blocked_at) VALUES (?, ?)", blocked)
+                w.executemany("DELETE FROM outbox WHERE chat_id=? AND status='Pending'",
+                              [(chat_id,) for chat_id, _ in blocked])
+            w.executemany("UPDATE outbox SET attempts=?, next_at=?, last_error=? WHERE id=?", retry)
+            w.executemany("UPDATE outbox SET status='Failed', attempts=?, last_error=? WHERE id=?", dead)
+        self._inflight = 0
+        self.sent += len(delivered)
+        self.skipped += len(blocked)
+        self.retried += len(retry)
+        self.failed += len(dead)
+        return len(live) + skipped
+
+    def pending(self) -> int:
+        """এখনই পাঠানোর কথা এমন সারি + পাঠানো চলছে এমন (backoff এ থাকা গুলো বাদ)।"""
+        due = self.db.fetchone("SELECT COUNT(*) FROM outbox WHERE status='Pending' AND next_at <= ?",
+                               (time.time(),))[0]
+        return due + self._inflight
+
+    def counts(self) -> dict:
+        """status → কয়টা সারি (Pending = এখনো পাঠানো বাকি, Failed = হাল ছেড়ে দেওয়া)।"""
+        return dict(self.db.fetchall("SELECT status, COUNT(*) FROM outbox GROUP BY status"))
+
+    def close(self):
+        """drainer থামায় (db.close এর আগে); বাকি সারি পরের রানে যায়।"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.poll)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                while not self._stop.is_set() and self.drain():
+                    pass
+            except Exception:
+                log.exception("Outbox drain failed")
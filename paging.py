@@ -0,0 +1,78 @@
+from telebot import types
+
+# ==============================
+# KEYSET PAGINATION
+# ==============================
+# এডমিন লিস্ট (withdraw / task / user) এর পেজ। OFFSET এর বদলে key দিয়ে
+# সরাসরি index seek করে (WHERE id < ?), তাই যত গভীরেই যাও প্রতি পেজের
+# খরচ একই। পেজের অবস্থান একটি ছোট token এ থাকে, যা callback_data তে যায়:
+#   ""      → সবচেয়ে নতুন পেজ
+#   "b<id>" → id এর চেয়ে পুরোনো (ছোট) সারি       ▶️
+#   "a<id>" → id এর চেয়ে নতুন (বড়) সারি           ◀️
+
+
+class Page:
+    __slots__ = ("rows", "token", "newer", "older")
+
+    def __init__(self, rows, token: str, newer: str = None, older: str = None):
+        self.rows = rows      # নতুন → পুরোনো ক্রমে
+        self.token = token    # এই পেজটাই আবার আঁকার token (অ্যাকশনের পর রিফ্রেশ)
+        self.newer = newer    # ◀️ token, না থাকলে None
+        self.older = older    # ▶️ token, না থাকলে None
+
+
+class KeysetPager:
+    """
+    select এর প্রথম কলামটাই key হতে হবে (key তে index/PK থাকা চাই)।
+        pager = KeysetPager(db, "wpage", "SELECT id, ... FROM withdraws", key="id")
+        page = pager.page(token)
+    """
+
+    def __init__(self, db, prefix: str, select: str, key: str, where: str = "1", size: int = 10):
+        self.db = db
+        self.prefix = prefix
+        self.size = size
+        base = f"{select} WHERE ({where})"
+        self._top_sql = f"{base} ORDER BY {key} DESC LIMIT ?"
+        self._older_sql = f"{base} AND {key} < ? ORDER BY {key} DESC LIMIT ?"
+        self._newer_sql = f"{base} AND {key} > ? ORDER BY {key} ASC LIMIT ?"
+        self._exists_newer_sql = f"SELECT EXISTS({base} AND {key} > ?)"
+
+    def page(self, token: str = "") -> Page:
+        if token.startswith("a"):
+            rows = self.db.fetchall(self._newer_sql, (int(token[1:]), self.size + 1))
+            if len(rows) <= self.size:
+                # উপরে পুরো একটি পেজও নেই → সরাসরি প্রথম পেজ
+                return self.page()
+            return self._build(rows[:self.size][::-1], newer=True, older=True)
+
+        if token.startswith("b"):
+            rows = self.db.fetchall(self._older_sql, (int(token[1:]), self.size + 1))
+            if not rows:
+                # এই পেজের সব সারি প্রসেস হয়ে গেছে → প্রথম পেজে ফিরে যাও
+                return self.page()
+            newer = self.db.fetchone(self._exists_newer_sql, (rows[0][0],))[0]
+        else:
+            rows = self.db.fetchall(self._top_sql, (self.size + 1,))
+            if not rows:
+                return Page([], "")
+            newer = False
+        return self._build(rows[:self.size], newer=bool(newer), older=len(rows) > self.size)
+
+    def _build(self, rows, newer: bool, older: bool) -> Page:
+        first, last = rows[0][0], rows[-1][0]
+        return Page(rows, f"b{first + 1}",
+                    newer=f"a{first}" if newer else None,
+                    older=f"b{last}" if older else None)
+
+    def add_nav(self, ikb: types.InlineKeyboardMarkup, page: Page):
+        """ikb তে ◀️ / ▶️ সারি যোগ করে (যেদিকে আর সারি নেই সেদিকে বাটন নেই)।
+        কীবোর্ড পুরো খালি থাকলে None ফেরত দেয়।"""
+        row = []
+        if page.newer:
+            row.append(types.InlineKeyboardButton("◀️", callback_data=f"{self.prefix}_{page.newer}"))
+        if page.older:
+            row.append(types.InlineKeyboardButton("▶️", callback_data=f"{self.prefix}_{page.older}"))
+        if row:
+            ikb.row(*row)
+        return ikb if ikb.keyboard else None
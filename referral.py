@@ -0,0 +1,110 @@
+import logging
+import os
+import threading
+import time
+
+import ledger
+
+log = logging.getLogger(__name__)
+
+# ==============================
+# REFERRAL BONUS SETTLEMENT
+# ==============================
+# রেফার্ড ইউজারের ব্যালেন্স বাড়লে বোনাস সাথে সাথে দেওয়া হয় না — ভগ্নাংশসহ
+# ref_pending টেবিলে জমে (micro-৳ পূর্ণসংখ্যায়, তাই 3% of 10৳ = 0.3৳ ও হারায়
+# না)। Settler প্রতি SETTLE_EVERY সেকেন্ডে একটি transaction এ সব রেফারারের
+# পূর্ণ টাকাটুকু ledger এ পোস্ট করে, বাকি ভগ্নাংশ পরের বারের জন্য রাখে, আর
+# প্রতি রেফারারকে একটি মাত্র সারাংশ মেসেজ একই transaction এ outbox এ রাখে।
+UNIT = 1_000_000                                          # 1৳ = 1,000,000 micro
+SETTLE_EVERY = float(os.getenv("REF_SETTLE_EVERY", "60"))  # সেকেন্ড
+
+
+def attach(w, user_id: int, referrer_id: int, join_bonus: int) -> bool:
+    """
+    /start <referrer_id>: ইউজারের refer_by খালি থাকলে বসায়, রেফারারের
+    ref_count/ref_earn বাড়ায় আর join bonus ledger এ দেয়। attach হলে True।
+    """
+    # ensure referrer row exists so UPDATE works
+    w.execute("INSERT OR IGNORE INTO users (user_id, created_at) VALUES (?, ?)", (referrer_id, time.time()))
+    # only attach if current user's refer_by is empty
+    attached = w.execute("UPDATE users SET refer_by=? WHERE user_id=? AND refer_by IS NULL",
+                         (referrer_id, user_id)).rowcount
+    if not attached:
+        return False
+    w.execute("""
+        UPDATE users
+        SET ref_count = COALESCE(ref_count,0) + 1,
+            ref_earn  = COALESCE(ref_earn,0) + ?
+        WHERE user_id=?
+    """, (join_bonus, referrer_id))
+    if join_bonus:
+        ledger.post(w, referrer_id, join_bonus, ledger.REF_JOIN, ref=f"user:{user_id}")
+    return True
+
+
+def accrue(w, referred_id: int, increase: int, percent: float):
+    """
+    w = যে write transaction এ ব্যালেন্স বেড়েছে সেটাই। রেফারার থাকলে তার
+    pending এ বোনাস যোগ করে রেফারারের id ফেরত দেয়, না থাকলে None।
+    """
+    if increase <= 0:
+        return None
+    row = w.execute("SELECT refer_by FROM users WHERE user_id=?", (referred_id,)).fetchone()
+    if not row or not row[0]:
+        return None
+    micros = round(increase * percent * UNIT)
+    if micros <= 0:
+        return None
+    w.execute("""
+        INSERT INTO ref_pending (referrer_id, micros, credits) VALUES (?, ?, 1)
+        ON CONFLICT(referrer_id) DO UPDATE SET micros = micros + excluded.micros, credits = credits + 1
+    """, (row[0], micros))
+    return row[0]
+
+
+class Settler:
+    def __init__(self, db, outbox, interval: float = SETTLE_EVERY):
+        self.db = db
+        self.outbox = outbox
+        self.interval = interval
+        self._thread = None
+        self._stop = threading.Event()
+
+    def settle(self):
+        """এক transaction এ সব পূর্ণ টাকা পোস্ট; [(referrer_id, taka, credits)] ফেরত দেয়।"""
+        paid = []
+        with self.db.write() as w:
+            rows = w.execute("SELECT referrer_id, micros, credits FROM ref_pending WHERE micros >= ?",
+                             (UNIT,)).fetchall()
+            for referrer, micros, credits in rows:
+                taka = micros // UNIT
+                try:
+                    ledger.post(w, referrer, taka, ledger.REF_BONUS, ref=f"settle:{credits}")
+                except KeyError:
+                    # রেফারার আর নেই — জমা বাতিল
+                    w.execute("DELETE FROM ref_pending WHERE referrer_id=?", (referrer,))
+                    continue
+                paid.append((referrer, taka, credits))
+            w.executemany("UPDATE users SET ref_earn = COALESCE(ref_earn, 0) + ? WHERE user_id=?",
+                          [(taka, referrer) for referrer, taka, _ in paid])
+            w.executemany("UPDATE ref_pending SET micros = micros - ?, credits = 0 WHERE referrer_id=?",
+                          [(taka * UNIT, referrer) for referrer, taka, _ in paid])
+            for referrer, taka, credits in paid:
+                self.outbox.add(w, referrer, f"🎉 আপনার রেফার্ডদের ব্যালেন্স বৃদ্ধি থেকে আপনি পেলেন {taka}৳ "
+                                             f"({credits}টি ক্রেডিট)")
+        return paid
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.settle()
+            except Exception:
+                log.exception("Referral settlement failed")
@@ -0,0 +1,111 @@
+# ==============================
+# ROUTER + FLOW STATE MACHINE
+# ==============================
+# প্রতিটি আপডেটে লম্বা lambda-ফিল্টার চেইন বা if/elif সিঁড়ি না চালিয়ে সরাসরি
+# dict lookup:
+#   - কমান্ড       "/start"     → handler
+#   - বাটন টেক্সট  "💰 Balance" → handler
+#   - callback     "approve_12" → prefix "approve" → handler
+#   - বাকি টেক্সট  → ইউজারের চলমান flow এর বর্তমান step এর handler
+# এডমিন-অনলি রুট অন্য কেউ পাঠালে সেটা সাধারণ টেক্সট হিসেবে ধরা হয়।
+# metrics দিলে প্রতিটি handler রেজিস্ট্রেশনের সময়ই মাপা সংস্করণে মোড়ানো হয়।
+from conversation import FlowState, StateStore
+
+
+class Router:
+    def __init__(self, is_admin, on_denied=None, flows: StateStore = None, metrics=None):
+        self.is_admin = is_admin
+        self.metrics = metrics
+        self.on_denied = on_denied
+        self.commands = {}
+        self.buttons = {}
+        self.callbacks = {}
+        self.steps = {}      # {(flow, step): handler}
+        self.flows = flows if flows is not None else StateStore()
+        self.fallback = None
+
+    # ---------- registration ----------
+    def _timed(self, fn):
+        return fn if self.metrics is None else self.metrics.wrap("handler", fn.__name__, fn)
+
+    def command(self, name: str, admin: bool = False):
+        def deco(fn):
+            self.commands["/" + name] = (self._timed(fn), admin)
+            return fn
+        return deco
+
+    def button(self, *texts: str, admin: bool = False):
+        def deco(fn):
+            timed = self._timed(fn)
+            for text in texts:
+                self.buttons[text] = (timed, admin)
+            return fn
+        return deco
+
+    def callback(self, *prefixes: str, admin: bool = False):
+        def deco(fn):
+            timed = self._timed(fn)
+            for prefix in prefixes:
+                self.callbacks[prefix] = (timed, admin)
+            return fn
+        return deco
+
+    def step(self, flow: str, step: str):
+        def deco(fn):
+            self.steps[(flow, step)] = self._timed(fn)
+            return fn
+        return deco
+
+    # ---------- flow state ----------
+    def start_flow(self, uid: int, flow: str, step: str, **data) -> FlowState:
+        state = FlowState(flow, step, data)
+        self.flows.put(uid, state)
+        return state
+
+    def get_flow(self, uid: int):
+        return self.flows.get(uid)
+
+    def end_flow(self, uid: int):
+        self.flows.delete(uid)
+
+    # ---------- dispatch ----------
+    def _allowed(self, entry, uid):
+        return entry is not None and (not entry[1] or self.is_admin(uid))
+
+    def dispatch_message(self, message):
+        uid = message.chat.id
+        text = message.text or ""
+
+        if text.startswith("/"):
+            # "/start 123" বা "/start@BotName" → "/start"
+            entry = self.commands.get(text.split(maxsplit=1)[0].split("@", 1)[0])
+            if self._allowed(entry, uid):
+                return entry[0](message)
+
+        entry = self.buttons.get(text)
+        if self._allowed(entry, uid):
+            return entry[0](message)
+
+        state = self.flows.get(uid)
+        if state is not None:
+            handler = self.steps.get((state.flow, state.step))
+            if handler is not None:
+                result = handler(message, state)
+                # step বদলালে/ডেটা জমলে সেভ + TTL নবায়ন (flow শেষ হয়ে গেলে নয়)
+                if self.flows.get(uid) is state:
+                    self.flows.put(uid, state)
+                return result
+
+        if self.fallback is not None:
+            return self.fallback(message)
+
+    def dispatch_callback(self, call):
+        prefix = call.data.split("_", 1)[0]
+        entry = self.callbacks.get(prefix)
+        if entry is None:
+            return
+        if not self._allowed(entry, call.from_user.id):
+            if self.on_denied is not None:
+                self.on_denied(call)
+            return
+        return entry[0](call)
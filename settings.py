@@ -0,0 +1,91 @@
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# ==============================
+# SETTINGS REGISTRY
+# ==============================
+# সব কনফিগ এখানে টাইপ ও ডিফল্ট সহ রেজিস্টার্ড। স্টার্টআপে একবার DB থেকে
+# লোড হয়ে মেমোরিতে থাকে; হ্যান্ডলাররা settings.get(...) দিয়ে শুধু dict থেকে পড়ে।
+# set() আগে DB তে commit করে, তারপর ক্যাশ আপডেট করে — দুটোই একই lock এর ভেতরে।
+# একাধিক প্রসেস (supervisor.py) হলে follow() অন্য প্রসেসের set() নিয়মিত টেনে আনে।
+REFRESH_EVERY = 5.0
+
+
+class Setting:
+    __slots__ = ("key", "type", "default", "label")
+
+    def __init__(self, key: str, type_, default, label: str):
+        self.key = key
+        self.type = type_
+        self.default = default
+        self.label = label
+
+    def parse(self, raw):
+        value = self.type(raw)
+        if self.type in (int, float) and value < 0:
+            raise ValueError(f"{self.key} negative")
+        return value
+
+
+REGISTRY = {s.key: s for s in [
+    Setting("task_price", float, 7.0, "প্রতি Gmail এর দাম (৳)"),
+    Setting("min_withdraw", int, 50, "সর্বনিম্ন withdraw (৳)"),
+    Setting("ref_percent", float, 0.03, "রেফারেল বোনাস (ভগ্নাংশ, 0.03 = 3%)"),
+    Setting("ref_join_bonus", int, 1, "প্রতি নতুন রেফারে বোনাস (৳)"),
+    Setting("support_link", str, "https://t.me/+f9tOe5fPe0Q0NGZl", "সাপোর্ট গ্রুপ লিঙ্ক"),
+    Setting("guide_link", str, "https://t.me/taskincometoday/16", "কাজের নিয়মের লিঙ্ক"),
+]}
+
+
+class Settings:
+    def __init__(self, db):
+        self.db = db
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """DB থেকে সব সেটিং একবারে পড়ে; না থাকলে ডিফল্ট লিখে দেয়।"""
+        rows = dict(self.db.fetchall("SELECT key, value FROM settings"))
+        values = {}
+        missing = []
+        for key, spec in REGISTRY.items():
+            try:
+                values[key] = spec.parse(rows[key])
+            except (KeyError, ValueError, TypeError):
+                values[key] = spec.default
+                if key not in rows:
+                    missing.append((key, str(spec.default)))
+        if missing:
+            with self.db.write() as w:
+                w.executemany("INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)", missing)
+        with self._lock:
+            self._values = values
+
+    def get(self, key: str, default=None):
+        return self._values.get(key, default)
+
+    def set(self, key: str, raw) -> object:
+        """ValueError/KeyError হলে কিছুই বদলায় না।"""
+        value = REGISTRY[key].parse(raw)
+        with self._lock:
+            self.db.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, str(value)))
+            self._values = {**self._values, key: value}
+        return value
+
+    def follow(self, interval: float = REFRESH_EVERY):
+        """ব্যাকগ্রাউন্ডে প্রতি interval সেকেন্ডে load() — অন্য worker প্রসেসের বদল দেখতে।"""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.load()
+                except Exception:
+                    log.exception("Settings reload failed")
+
+        threading.Thread(target=loop, daemon=True, name="settings").start()
+
+    def items(self):
+        return [(key, self._values.get(key), spec.label) for key, spec in REGISTRY.items()]
@@ -0,0 +1,84 @@
+import time
+
+# ==============================
+# DASHBOARD COUNTERS
+# ==============================
+# stats টেবিলের প্রতিটি key একটি চলমান যোগফল, users/withdraws/tasks এর
+# trigger গুলো (migrations.m010_stats) প্রতিটি INSERT/UPDATE/DELETE এর সাথে
+# একই transaction এ +/- করে রাখে — তাই কোনো write path বাদ পড়ে না। ড্যাশবোর্ড
+# কয়েকটি primary key read এ চলে, টেবিল যত বড়ই হোক। check() সব কিছু শুরু
+# থেকে আবার গুনে মিলিয়ে দেখে (আর দরকারে ঠিক করে)।
+#   users / balance
+#   withdraws.<status>.count / withdraws.<status>.amount
+#   tasks.<status>.count / tasks.<status>.payout
+#   signups.<YYYY-MM-DD>
+SIGNUP_DAYS = 7
+
+FRESH_SQL = """
+SELECT 'users', COUNT(*) FROM users
+UNION ALL SELECT 'balance', COALESCE(SUM(balance), 0) FROM users
+UNION ALL SELECT 'withdraws.' || lower(COALESCE(status, 'none')) || '.count', COUNT(*) FROM withdraws GROUP BY 1
+UNION ALL SELECT 'withdraws.' || lower(COALESCE(status, 'none')) || '.amount', COALESCE(SUM(amount), 0)
+          FROM withdraws GROUP BY 1
+UNION ALL SELECT 'tasks.' || lower(COALESCE(status, 'none')) || '.count', COUNT(*) FROM tasks GROUP BY 1
+UNION ALL SELECT 'tasks.' || lower(COALESCE(status, 'none')) || '.payout', COALESCE(SUM(payout), 0)
+          FROM tasks GROUP BY 1
+UNION ALL SELECT 'signups.' || date(created_at, 'unixepoch', 'localtime'), COUNT(*)
+          FROM users WHERE created_at IS NOT NULL GROUP BY 1
+"""
+
+
+def _day(offset: int = 0) -> str:
+    return time.strftime("%Y-%m-%d", time.localtime(time.time() - offset * 86400))
+
+
+def values(db, keys) -> dict:
+    """key → মান (না থাকলে 0); শুধু primary key lookup।"""
+    keys = list(keys)
+    marks = ",".join("?" * len(keys))
+    found = dict(db.fetchall(f"SELECT key, value FROM stats WHERE key IN ({marks})", keys))
+    return {key: found.get(key, 0) for key in keys}
+
+
+def snapshot(db, days: int = SIGNUP_DAYS) -> dict:
+    """ড্যাশবোর্ডের সব key → মান (signups শেষ days দিনের, আজ প্রথমে)।"""
+    keys = ["users", "balance"]
+    for table, total in (("withdraws", "amount"), ("tasks", "payout")):
+        for status in ("pending", "approved", "rejected"):
+            keys += [f"{table}.{status}.count", f"{table}.{status}.{total}"]
+    keys += [f"signups.{_day(i)}" for i in range(days)]
+    return values(db, keys)
+
+
+def _same(a, b) -> bool:
+    # payout REAL — বারবার যোগ-বিয়োগে সামান্য float ভুল হতে পারে
+    return abs((a or 0) - (b or 0)) < 0.005
+
+
+def rebuild(w):
+    """stats টেবিল শুরু থেকে আবার তৈরি (w = write transaction)।"""
+    w.execute("DELETE FROM stats")
+    w.execute(f"INSERT INTO stats (key, value) {FRESH_SQL}")
+
+
+def check(db, repair: bool = True):
+    """
+    সব counter শুরু থেকে গুনে মিলিয়ে দেখে; [(key, stored, fresh)] অমিল ফেরত
+    দেয়। গোনা হয় reader এর একটি read transaction এ — WAL snapshot, তাই মাঝপথের
+    write হিসাব বদলায় না, আর পুরো স্ক্যানের সময় write lock ও ধরা থাকে না।
+    অমিল থাকলে শুধু rebuild এর জন্য write lock।
+    """
+    conn = db.reader
+    conn.execute("BEGIN")
+    try:
+        fresh = dict(conn.execute(FRESH_SQL).fetchall())
+        stored = dict(conn.execute("SELECT key, value FROM stats").fetchall())
+    finally:
+        conn.execute("COMMIT")
+    mismatches = [(key, stored.get(key), fresh.get(key))
+                  for key in sorted(fresh.keys() | stored.keys())
+                  if not _same(stored.get(key), fresh.get(key))]
+    if mismatches and repair:
+        with db.write() as w:
+            rebuild(w)
+    return mismatches
@@ -0,0 +1,218 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+import logs
+
+log = logging.getLogger(__name__)
+
+# ==============================
+# SUPERVISOR (multi-process, chat-sharded)
+# ==============================
+# একটি supervisor প্রসেস Telegram থেকে আপডেট আনে (long polling, একবারই) আর
+# chat.id অনুযায়ী N টি worker প্রসেসের একটিতে পাঠায় — একই ইউজারের সব আপডেট
+# সবসময় একই worker এ যায়। worker এর ভেতরে আবার chat অনুযায়ী কয়েকটি লেন
+# (থ্রেড): এক চ্যাটের আপডেট ক্রমানুসারে, আলাদা চ্যাটের গুলো একসাথে।
+#
+# প্রতিটি worker bot.py আলাদাভাবে import করে (spawn)। ভাগ করা state শুধু
+# SQLite (WAL): প্রতিটি প্রসেসের নিজস্ব connection, প্রসেসগুলোর write
+# BEGIN IMMEDIATE + busy_timeout এ সিরিয়াল হয়। flow state, anti-flood, ফাইল
+# ক্যাশ per-user, তাই worker-লোকাল থাকলেও সঠিক। এক-কপি ব্যাকগ্রাউন্ড কাজ
+# (broadcast resume, রেফার settle, টাস্ক resume, backfill) শুধু worker 0 এ;
+# outbox drainer প্রতিটিতে (সারি claim হয় lease দিয়ে); Telegram এর global limit সব worker এ সমান ভাগ, সেটিং প্রতিটি worker নিয়মিত
+# আবার পড়ে। কোনো worker মারা গেলে একই inbox নিয়ে আবার চালু হয়।
+PROCESSES = int(os.getenv("BOT_PROCESSES", str(os.cpu_count() or 2)))
+LANES = int(os.getenv("WORKER_LANES", "4"))
+INBOX = int(os.getenv("WORKER_INBOX", "1000"))
+POLL_TIMEOUT = 20
+
+
+def chat_of(raw: dict) -> int:
+    """raw আপডেট (dict) কোন চ্যাটের — router এর মতোই: message → chat, callback → from।"""
+    for key in ("message", "edited_message", "channel_post", "edited_channel_post"):
+        if key in raw:
+            return raw[key]["chat"]["id"]
+    for key in ("callback_query", "inline_query", "chosen_inline_result", "pre_checkout_query",
+                "shipping_query", "my_chat_member", "chat_member", "chat_join_request"):
+        if key in raw:
+            return raw[key]["from"]["id"]
+    return 0
+
+
+def _worker(index: int, processes: int, lanes: int, inbox, done, setup):
+    # প্রতিটি worker এর নিজস্ব Prometheus ফাইল (textfile collector সব পড়ে)
+    root, ext = os.path.splitext(os.environ.get("METRICS_FILE", "metrics.prom"))
+    os.environ["METRICS_FILE"] = f"{root}.{index}{ext}"
+    from telebot import types
+
+    import bot
+
+    logs.setup()     # spawn — নতুন interpreter, মূল প্রসেসের logging সেটআপ এখানে নেই
+    app = bot.create_app()
+    app.bot.threaded = False    # লেন থ্রেডগুলোই হ্যান্ডলার চালায়
+    if setup is not None:
+        setup(app)
+    app.outbound.share_global(processes)
+    app.settings.follow()
+    app.start_background_jobs(singletons=index == 0)
+    done.put((None, index, True))   # প্রস্তুত
+
+    def lane(updates):
+        while True:
+            item = updates.get()
+            if item is None:
+                return
+            raw, received = item
+            ok = True
+            try:
+                app.bot.process_new_updates([types.Update.de_json(raw)])
+            except Exception:
+                ok = False
+                log.exception("Update %s failed", raw.get("update_id"))
+            done.put((raw["update_id"], time.time() - received, ok))
+
+    queues = [queue.SimpleQueue() for _ in range(lanes)]
+    threads = [threading.Thread(target=lane, args=(q,), daemon=True, name=f"lane-{i}")
+               for i, q in enumerate(queues)]
+    for t in threads:
+        t.start()
+    while True:
+        item = inbox.get()
+        if item is None:
+            break
+        queues[chat_of(item[0]) // processes % lanes].put(item)
+    for q in queues:
+        q.put(None)
+    for t in threads:
+        t.join()
+    # রিপ্লাইগুলো পৌঁছানোর আগে প্রসেস শেষ নয়
+    while app.outbound.pending() or app.outbox.pending():
+        time.sleep(0.05)
+    app.outbox.close()
+    app.task_checker.close(wait=True)
+    app.db.close()
+
+
+class Supervisor:
+    def __init__(self, processes: int = PROCESSES, lanes: int = LANES, inbox: int = INBOX, setup=None):
+        """setup(app) — প্রতিটি worker এ bot.py import এর পরপরই (loadtest এর fake API ইত্যাদি)।"""
+        self.processes = processes
+        self.lanes = lanes
+        self.setup = setup
+        self._ctx = multiprocessing.get_context("spawn")
+        self.inboxes = [self._ctx.Queue(inbox) for _ in range(processes)]
+        self.done = self._ctx.Queue()
+        self.procs = [None] * processes
+        self.sent = 0
+        self.handled = 0
+        self.failed = 0
+        self.ready = 0
+        self.on_done = None          # on_done(update_id, seconds, ok) — loadtest এর latency
+        self._collector = None
+
+    # ---------- workers ----------
+    def _spawn(self, index: int):
+        # daemon নয়: worker এর TaskChecker নিজেই process pool চালায়
+        proc = self._ctx.Process(target=_worker, name=f"bot-worker-{index}",
+                                 args=(index, self.processes, self.lanes, self.inboxes[index], self.done,
+                                       self.setup))
+        proc.start()
+        self.procs[index] = proc
+
+    def start(self):
+        for i in range(self.processes):
+            self._spawn(i)
+        self._collector = threading.Thread(target=self._collect, daemon=True, name="supervisor-done")
+        self._collector.start()
+        return self
+
+    def check(self):
+        """মারা যাওয়া worker আবার চালু করে (inbox এ জমে থাকা আপডেট সে-ই নেবে)।"""
+        for i, proc in enumerate(self.procs):
+            if proc is not None and not proc.is_alive() and proc.exitcode != 0:
+                log.error("Worker %d exited (%s), restarting", i, proc.exitcode)
+                self._spawn(i)
+
+    def wait_ready(self, timeout: float = 60.0) -> bool:
+        """সব worker bot.py import শেষ করে আপডেট নেওয়ার জন্য তৈরি হওয়া পর্যন্ত।"""
+        deadline = time.monotonic() + timeout
+        while self.ready < self.processes:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _collect(self):
+        while True:
+            item = self.done.get()
+            if item is None:
+                return
+            update_id, seconds, ok = item
+            if update_id is None:
+                self.ready += 1
+                continue
+            self.handled += 1
+            self.failed += not ok
+            if self.on_done is not None:
+                self.on_done(update_id, seconds, ok)
+
+    # ---------- updates ----------
+    def dispatch(self, raw: dict):
+        """একটি raw আপডেট তার চ্যাটের worker এ (inbox ভর্তি থাকলে অপেক্ষা — backpressure)।"""
+        self.inboxes[chat_of(raw) % self.processes].put((raw, time.time()))
+        self.sent += 1
+
+    def poll(self, token: str, timeout: int = POLL_TIMEOUT):
+        """getUpdates long polling — supervisor নিজে কোনো handler চালায় না।"""
+        from telebot import apihelper
+
+        offset = None
+        while True:
+            try:
+                updates = apihelper.get_updates(token, offset=offset, timeout=timeout,
+                                                long_polling_timeout=timeout)
+            except Exception:
+                log.exception("getUpdates failed")
+                time.sleep(3)
+                continue
+            for raw in updates:
+                self.dispatch(raw)
+                offset = raw["update_id"] + 1
+            self.check()
+
+    def stop(self):
+        """inbox শেষ করে worker দের থামায়; তাদের রিপ্লাই পৌঁছানো পর্যন্ত অপেক্ষা করে।"""
+        for inbox in self.inboxes:
+            inbox.put(None)
+        for proc in self.procs:
+            if proc is not None:
+                proc.join()
+        self.done.put(None)
+        if self._collector is not None:
+            self._collector.join()
+
+
+def run_supervisor(token: str, processes: int = PROCESSES, lanes: int = LANES):
+    supervisor = Supervisor(processes, lanes).start()
+    print(f"🧩 Bot is running (supervisor: {processes} worker processes × {lanes} lanes)...")
+    try:
+        supervisor.poll(token)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        supervisor.stop()
+
+
+if __name__ == "__main__":
+    # আলাদা এন্ট্রি পয়েন্ট: spawn করা worker রা এই ছোট মডিউলটাই আবার import করে, bot.py নয়
+    import argparse
+
+    parser = argparse.ArgumentParser(description="chat.id অনুযায়ী ভাগ করা বহু-প্রসেস bot")
+    parser.add_argument("-n", "--processes", type=int, default=PROCESSES)
+    parser.add_argument("--lanes", type=int, default=LANES, help="প্রতি worker এ চ্যাট-লেন (থ্রেড)")
+    args = parser.parse_args()
+    logs.setup()
+    run_supervisor(os.getenv("BOT_TOKEN"), args.processes, args.lanes)
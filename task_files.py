@@ -0,0 +1,229 @@
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from telebot.apihelper import ApiTelegramException
+
+from gmail_index import normalize
+
+# ==============================
+# TASK FILE CHECKER
+# ==============================
+# জমা হওয়া .xlsx ব্যাকগ্রাউন্ডে ডাউনলোড করে process pool এ streaming
+# (openpyxl read_only) পড়া হয় — বড় শিট কখনো পুরোটা মেমোরিতে ওঠে না, আর
+# handler বা polling থ্রেড আটকায় না। ফলাফল (সঠিক সারি, ভুল সারি, payout =
+# নতুন সারি × task_price) tasks টেবিলে সেভ হয়ে এডমিন কার্ডে দেখায়। সঠিক
+# ঠিকানাগুলো gmail_index এ যাচাই হয় — আগে জমা পড়া ঠিকানা ডুপ্লিকেট গোনা হয়।
+WORKERS = int(os.getenv("TASK_CHECK_WORKERS", "2"))
+MAX_FILE = 20 * 1024 * 1024   # Bot API getFile সীমা
+
+GMAIL_RE = re.compile(r"^[a-z0-9](?:[a-z0-9.+_-]*[a-z0-9])?@(?:gmail|googlemail)\.com$", re.IGNORECASE)
+MIN_PASSWORD = 8              # Google এর সর্বনিম্ন পাসওয়ার্ড দৈর্ঘ্য
+RECENT_FILES = 5000           # মেমোরিতে রাখা সাম্প্রতিক file_unique_id
+
+
+def check_row(values):
+    """
+    একটি সারি → normalize করা ঠিকানা (সঠিক Gmail + পাসওয়ার্ড), False (ভুল),
+    None (ফাঁকা/হেডার)।
+    প্রথম যে সেলে '@' আছে সেটা ঠিকানা, তার পরের প্রথম ভরা সেল পাসওয়ার্ড।
+    """
+    cells = [str(v).strip() for v in values if v is not None and str(v).strip()]
+    if not cells:
+        return None
+    for i, cell in enumerate(cells):
+        if "@" in cell:
+            password = cells[i + 1] if i + 1 < len(cells) else ""
+            if GMAIL_RE.match(cell) and len(password) >= MIN_PASSWORD:
+                return normalize(cell)
+            return False
+    # '@' ছাড়া সারি: হেডার (Email / Password ...) হলে বাদ, নাহলে ভুল সারি
+    return None if any(c.lower() in ("email", "gmail", "mail", "password", "pass") for c in cells) else False
+
+
+def parse_workbook(path: str):
+    """([সঠিক ঠিকানা], invalid) — child process এ চলে; সব শিটের সারি একটি একটি করে পড়ে।"""
+    from openpyxl import load_workbook
+
+    valid, invalid = [], 0
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            for values in ws.iter_rows(values_only=True):
+                ok = check_row(values)
+                if ok:
+                    valid.append(ok)
+                elif ok is False:
+                    invalid += 1
+    finally:
+        wb.close()
+    return valid, invalid
+
+
+class SubmittedFiles:
+    """
+    file_unique_id → task_id। একই ফাইল আবার জমা দিলে সাম্প্রতিকগুলো LRU থেকেই
+    ধরা পড়ে (DB তে কিছু লেখা হয় না); LRU তে না থাকলে unique index দিয়ে একটি read।
+    """
+
+    def __init__(self, db, max_size: int = RECENT_FILES):
+        self.db = db
+        self.max_size = max_size
+        self._recent = OrderedDict()
+        self._lock = threading.Lock()
+
+    def remember(self, file_unique_id: str, task_id: int):
+        with self._lock:
+            self._recent[file_unique_id] = task_id
+            self._recent.move_to_end(file_unique_id)
+            while len(self._recent) > self.max_size:
+                self._recent.popitem(last=False)
+
+    def original(self, file_unique_id: str):
+        """আগে জমা হয়ে থাকলে সেই task_id, নাহলে None।"""
+        with self._lock:
+            task_id = self._recent.get(file_unique_id)
+            if task_id is not None:
+                self._recent.move_to_end(file_unique_id)
+                return task_id
+        row = self.db.fetchone("SELECT id FROM tasks WHERE file_unique_id=?", (file_unique_id,))
+        if row:
+            self.remember(file_unique_id, row[0])
+            return row[0]
+        return None
+
+    def add(self, user_id: int, username: str, file_id: str, file_unique_id: str):
+        """
+        নতুন টাস্ক তৈরি করে (task_id, True) ফেরত দেয়; একই মুহূর্তে অন্য কেউ
+        একই ফাইল জমা দিয়ে ফেললে (original task_id, False)।
+        """
+        def insert(w):
+            cur = w.execute("INSERT OR IGNORE INTO tasks (user_id, username, file_id, file_unique_id, status, "
+                            "created_at) VALUES (?, ?, ?, ?, 'Pending', ?)",
+                            (user_id, username, file_id, file_unique_id, time.time()))
+            return cur.lastrowid if cur.rowcount == 1 else None
+
+        task_id = self.db.run(insert)
+        if task_id is None:
+            return self.original(file_unique_id), False
+        self.remember(file_unique_id, task_id)
+        return task_id, True
+
+    def backfill(self, api, pause: float = 0.05):
+        """
+        পুরোনো টাস্কের file_unique_id getFile দিয়ে ভরে (যেগুলোর ফাইল এখনো পাওয়া
+        যায়)। পুরোনো থেকে নতুন ক্রমে — একই ফাইল দুইবার থাকলে প্রথমটাই id পায়।
+        চেষ্টা হয়ে যাওয়া সারিতে file_lookup_at বসে (ফাইল নেই, বা ডুপ্লিকেট বলে
+        NULL রাখা), তাই পরের রিস্টার্টে একই getFile আর হয় না; শুধু নেটওয়ার্ক
+        সমস্যায় পরের বার আবার।
+        """
+        filled = 0
+        last_id = 0
+        while True:
+            rows = self.db.fetchall("SELECT id, file_id FROM tasks WHERE file_unique_id IS NULL "
+                                    "AND file_lookup_at IS NULL AND id > ? ORDER BY id LIMIT 100", (last_id,))
+            if not rows:
+                return filled
+            for task_id, file_id in rows:
+                last_id = task_id
+                try:
+                    unique_id = api.get_file(file_id).file_unique_id
+                except ApiTelegramException:
+                    # মুছে যাওয়া / 20MB এর বড় ফাইল — আর চেষ্টা নয়
+                    self.db.execute("UPDATE tasks SET file_lookup_at=? WHERE id=?", (time.time(), task_id))
+                    continue
+                except Exception:
+                    continue
+                updated = self.db.execute("UPDATE OR IGNORE tasks SET file_unique_id=?, file_lookup_at=? WHERE id=?",
+                                          (unique_id, time.time(), task_id))
+                if not updated:
+                    # একই ফাইল আগের কোনো টাস্কে — unique index এর জন্য NULL থাকে
+                    self.db.execute("UPDATE tasks SET file_lookup_at=? WHERE id=?", (time.time(), task_id))
+                filled += updated
+                time.sleep(pause)
+
+
+class TaskChecker:
+    def __init__(self, db, api, price, index=None, workers: int = WORKERS, on_checked=None):
+        self.db = db
+        self.api = api                  # আসল TeleBot (get_file / download_file)
+        self.price = price              # () → বর্তমান task_price
+        self.index = index              # gmail_index.GmailIndex (ডুপ্লিকেট গোনার জন্য)
+        self.workers = workers
+        self.on_checked = on_checked    # (task_id, user_id, valid, invalid, duplicates, payout, error) → None
+        self._io = None
+        self._procs = None
+        self._lock = threading.Lock()
+
+    def _pools(self):
+        with self._lock:
+            if self._io is None:
+                # spawn: থ্রেডওয়ালা প্রসেস fork করা নিরাপদ নয়। child এ এন্ট্রি মডিউল
+                # (bot.py) আবার import হয় — তাই সেখানে top-level এ নেটওয়ার্ক কল নেই
+                self._procs = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+                self._io = ThreadPoolExecutor(self.workers * 2, thread_name_prefix="taskcheck")
+        return self._io, self._procs
+
+    def submit(self, task_id: int, file_id: str):
+        io, _ = self._pools()
+        return io.submit(self._check, task_id, file_id)
+
+    def resume(self):
+        """রিস্টার্টের আগে যাচাই না হওয়া Pending টাস্কগুলো আবার কিউতে দেয়।"""
+        rows = self.db.fetchall("SELECT id, file_id FROM tasks WHERE status='Pending' AND gmail_rows IS NULL "
+                                "AND check_error IS NULL")
+        for task_id, file_id in rows:
+            self.submit(task_id, file_id)
+        return len(rows)
+
+    def _check(self, task_id: int, file_id: str):
+        _, procs = self._pools()
+        row = self.db.fetchone("SELECT user_id FROM tasks WHERE id=?", (task_id,))
+        if not row:
+            return
+        user_id = row[0]
+        valid = invalid = duplicates = 0
+        payout, error = 0.0, None
+        path = None
+        try:
+            info = self.api.get_file(file_id)
+            if info.file_size and info.file_size > MAX_FILE:
+                raise ValueError("file too large")
+            fd, path = tempfile.mkstemp(suffix=".xlsx")
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.api.download_file(info.file_path))
+            addresses, invalid = procs.submit(parse_workbook, path).result()
+            valid = len(addresses)
+            price = self.price()
+
+            def record(w, duplicates):
+                # ডুপ্লিকেট ঠিকানার টাকা হয় না; index আর টাস্কের ফলাফল একই transaction এ,
+                # তাই মাঝপথে প্রসেস মারা গেলে resume() পরিষ্কারভাবে আবার যাচাই করে
+                w.execute("UPDATE tasks SET gmail_rows=?, invalid_rows=?, duplicate_rows=?, payout=? WHERE id=?",
+                          (valid, invalid, duplicates, round((valid - duplicates) * price, 2), task_id))
+
+            if self.index is not None:
+                duplicates = self.index.register(task_id, user_id, addresses, on_done=record)
+            else:
+                with self.db.write() as w:
+                    record(w, 0)
+            payout = round((valid - duplicates) * price, 2)
+        except Exception as e:
+            error = str(e)[:200] or type(e).__name__
+            self.db.execute("UPDATE tasks SET check_error=? WHERE id=?", (error, task_id))
+        finally:
+            if path:
+                os.remove(path)
+        if self.on_checked:
+            self.on_checked(task_id, user_id, valid, invalid, duplicates, payout, error)
+
+    def close(self, wait: bool = False):
+        """wait=True: চলমান যাচাই শেষ হওয়া আর pool প্রসেসগুলো থামা পর্যন্ত অপেক্ষা।"""
+        if self._io is not None:
+            self._io.shutdown(wait=wait)
+            self._procs.shutdown(wait=wait)
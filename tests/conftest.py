@@ -0,0 +1,67 @@
+import itertools
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("BOT_TOKEN", "1:test")
+os.environ.setdefault("METRICS", "0")
+
+
+class FakeApi:
+    """outbound এর Bot API — নেটওয়ার্ক নয়, শুধু গোনে।"""
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+
+    def send_document(self, chat_id, document, **kwargs):
+        self.sent.append((chat_id, document))
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    import outbound
+
+    import bot
+
+    app = bot.create_app(bot.Config(db_path=str(tmp_path_factory.mktemp("db") / "bot.db")))
+    outbound.CHAT_RATE = outbound.CHAT_BURST = 1e6
+    app.outbound._global = outbound.TokenBucket(1e6, 1e6)
+    app.outbound.api = FakeApi()
+    app.bot.threaded = False
+    app.flood.exempt = lambda uid: True     # anti-flood এর বাদ দেওয়া আপডেট টেস্ট লুকিয়ে ফেলত
+    yield app
+    app.outbox.close()
+    app.task_checker.close(wait=True)
+
+
+@pytest.fixture
+def db(tmp_path):
+    """migration করা আলাদা খালি DB — bot ছাড়া সরাসরি মডিউল টেস্টের জন্য।"""
+    import migrations
+    from db import Database
+
+    database = Database(str(tmp_path / "bot.db"))
+    database.migrate(migrations.MIGRATIONS)
+    yield database
+    database.close()
+
+
+@pytest.fixture(scope="session")
+def message():
+    from telebot import types
+
+    ids = itertools.count(1)
+
+    def make(uid: int, text: str) -> types.Update:
+        n = next(ids)
+        return types.Update.de_json({
+            "update_id": n,
+            "message": {"message_id": n, "date": 0, "text": text,
+                        "chat": {"id": uid, "type": "private"},
+                        "from": {"id": uid, "is_bot": False, "first_name": "u"}},
+        })
+    return make
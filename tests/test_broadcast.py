@@ -0,0 +1,29 @@
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from broadcast import Broadcaster
+
+
+class FakeOutbound:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+        fut = Future()
+        fut.set_result(SimpleNamespace(message_id=len(self.sent)))
+        return fut
+
+
+def test_report_leaves_out_blocked_users(db):
+    with db.write() as w:
+        w.executemany("INSERT INTO users (user_id) VALUES (?)", [(uid,) for uid in range(1, 11)])
+        w.executemany("INSERT INTO blocked_users (user_id, blocked_at) VALUES (?, 0)", [(2,), (3,), (9,)])
+        bid = w.execute("INSERT INTO broadcasts (text, started_at) VALUES ('hi', 0)").lastrowid
+
+    outbound = FakeOutbound()
+    Broadcaster(db, outbound, admin_id=1)._report(bid, None, 0, 0, 0, last_id=1, rate=2.0)
+
+    (_, text), = outbound.sent
+    assert "বাকি: 6" in text          # 2..10 থেকে 2, 3, 9 বাদ
+    assert "ETA ~3s" in text
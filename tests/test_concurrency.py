@@ -0,0 +1,46 @@
+import threading
+
+import ledger
+
+USERS = 40
+THREADS_PER_USER = 3
+ROUNDS = 5
+START_BALANCE = 100
+AMOUNT = 60     # একবারই হতে পারে — দ্বিতীয়টা overdraft
+
+
+def _hammer(app, message, uid: int, errors: list):
+    for _ in range(ROUNDS):
+        for text in ("💰 Balance", "💵 Withdraw", "📲 Bkash", "01700000000", str(AMOUNT), "💰 Balance"):
+            try:
+                app.bot.process_new_updates([message(uid, text)])
+            except Exception as e:
+                errors.append(e)
+
+
+def test_balance_and_withdraw_from_many_threads(app, message):
+    users = range(50_000, 50_000 + USERS)
+    with app.db.write() as w:
+        for uid in users:
+            w.execute("INSERT OR IGNORE INTO users (user_id) VALUES (?)", (uid,))
+            ledger.post(w, uid, START_BALANCE, ledger.ADMIN_ADD, ref="test")
+
+    errors = []
+    threads = [threading.Thread(target=_hammer, args=(app, message, uid, errors))
+               for uid in users for _ in range(THREADS_PER_USER)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    marks = ",".join("?" * USERS)
+    balances = dict(app.db.fetchall(f"SELECT user_id, balance FROM users WHERE user_id IN ({marks})", tuple(users)))
+    assert min(balances.values()) >= 0
+    withdrawn = dict(app.db.fetchall(f"SELECT user_id, SUM(amount) FROM withdraws WHERE user_id IN ({marks}) "
+                                     f"GROUP BY user_id", tuple(users)))
+    for uid in users:
+        # একসাথে অনেক withdraw এও ব্যালেন্সের বেশি কখনো নয়, আর টাকা হারায়ও না
+        assert withdrawn.get(uid, 0) <= START_BALANCE
+        assert balances[uid] + withdrawn.get(uid, 0) == START_BALANCE
+    assert list(ledger.reconcile(app.db)) == []
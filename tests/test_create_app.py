@@ -0,0 +1,16 @@
+import pytest
+
+import bot
+
+
+def test_create_app_returns_the_same_app(app):
+    assert bot.create_app() is app
+    assert bot.create_app(bot.Config(db_path=app.app_config.db_path)) is app
+
+
+def test_create_app_rejects_a_different_config(app):
+    with pytest.raises(RuntimeError):
+        bot.create_app(bot.Config(db_path=app.app_config.db_path + ".other"))
+    with pytest.raises(RuntimeError):
+        bot.create_app(bot.Config(db_path=app.app_config.db_path, persist_flows=not app.app_config.persist_flows))
+    assert app.db is bot.db
@@ -0,0 +1,22 @@
+import sqlite3
+
+import pytest
+
+
+def test_failed_commit_is_rolled_back(db):
+    w = db._writer
+    w.execute("PRAGMA foreign_keys = ON")
+    w.execute("CREATE TABLE parent (id INTEGER PRIMARY KEY)")
+    w.execute("CREATE TABLE child (parent_id INTEGER REFERENCES parent (id) DEFERRABLE INITIALLY DEFERRED)")
+
+    # deferred foreign key — INSERT চলে, COMMIT এ গিয়ে ব্যর্থ হয়
+    with pytest.raises(sqlite3.IntegrityError):
+        with db.write() as w:
+            w.execute("INSERT INTO child (parent_id) VALUES (1)")
+
+    assert not db._writer.in_transaction
+    # writer আবার ব্যবহারযোগ্য, আর ব্যর্থ transaction এর কিছুই থাকেনি
+    with db.write() as w:
+        w.execute("INSERT INTO parent (id) VALUES (2)")
+    assert db.fetchall("SELECT * FROM child") == []
+    assert db.fetchall("SELECT id FROM parent") == [(2,)]
@@ -0,0 +1,40 @@
+import pytest
+
+import decisions
+import ledger
+
+
+def _withdraws(db, *requests):
+    """requests = (user_id, amount); টাকা আগেই কাটা — তাই শুরুর ব্যালেন্স 0।"""
+    with db.write() as w:
+        for uid, amount in requests:
+            w.execute("INSERT OR IGNORE INTO users (user_id, balance) VALUES (?, 0)", (uid,))
+            w.execute("INSERT INTO withdraws (user_id, method, number, amount) VALUES (?, 'Bkash', '017', ?)",
+                      (uid, amount))
+
+
+def test_bulk_reject_skips_a_failed_refund(db):
+    _withdraws(db, (1, 50), (2, 60), (3, 70))
+    db.execute("DELETE FROM users WHERE user_id=2")      # রিফান্ডের ইউজার নেই → KeyError
+
+    failed, notified = [], []
+    done = decisions.decide_withdraws(db, [1, 2, 3], False,
+                                      on_done=lambda w, rows: notified.extend(rows),
+                                      on_error=lambda req_id, e: failed.append((req_id, type(e))))
+
+    assert done == [(1, 1, 50), (3, 3, 70)]
+    assert notified == done
+    assert failed == [(2, KeyError)]
+    assert db.fetchall("SELECT id, status FROM withdraws ORDER BY id") == [
+        (1, "Rejected"), (2, "Pending"), (3, "Rejected")]
+    assert db.fetchall("SELECT user_id, balance FROM users ORDER BY user_id") == [(1, 50), (3, 70)]
+    assert list(ledger.reconcile(db)) == []
+
+
+def test_bulk_reject_without_on_error_rolls_back(db):
+    _withdraws(db, (1, 50), (2, 60))
+    db.execute("DELETE FROM users WHERE user_id=2")
+    with pytest.raises(KeyError):
+        decisions.decide_withdraws(db, [1, 2], False)
+    assert db.fetchall("SELECT status FROM withdraws") == [("Pending",), ("Pending",)]
+    assert db.fetchone("SELECT balance FROM users WHERE user_id=1") == (0,)
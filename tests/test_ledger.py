@@ -0,0 +1,36 @@
+import pytest
+
+import ledger
+
+
+def _user(db, uid: int, balance: int):
+    # ledger এর আগের DB থেকে আসা ব্যালেন্স (m004 এ opening এন্ট্রি হয়)
+    with db.write() as w:
+        w.execute("INSERT INTO users (user_id, balance) VALUES (?, ?)", (uid, balance))
+        w.execute("INSERT INTO ledger (user_id, delta, balance_after, reason, created_at) VALUES (?, ?, ?, ?, 0)",
+                  (uid, balance, balance, ledger.OPENING))
+
+
+def test_debit_below_zero_is_refused(db):
+    _user(db, 1, 50)
+    with pytest.raises(ledger.InsufficientFunds):
+        with db.write() as w:
+            ledger.post(w, 1, -60, ledger.WITHDRAW)
+    assert db.fetchone("SELECT balance FROM users WHERE user_id=1") == (50,)
+
+
+def test_credit_to_negative_balance(db):
+    _user(db, 1, -30)
+    with db.write() as w:
+        assert ledger.post(w, 1, 10, ledger.ADMIN_ADD) == -20
+        assert ledger.post(w, 1, 5, ledger.WITHDRAW_REFUND, ref="withdraw:1") == -15
+    with pytest.raises(ledger.InsufficientFunds):
+        with db.write() as w:
+            ledger.post(w, 1, -1, ledger.ADMIN_REDUCE)
+    assert list(ledger.reconcile(db)) == []
+
+
+def test_unknown_user(db):
+    with pytest.raises(KeyError):
+        with db.write() as w:
+            ledger.post(w, 404, 10, ledger.ADMIN_ADD)
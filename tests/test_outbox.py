@@ -0,0 +1,35 @@
+import time
+from concurrent.futures import Future
+
+import outbox
+from outbox import Outbox
+
+
+class HungOutbound:
+    """send এর Future কখনো শেষ হয় না (আটকে থাকা Bot API কল)।"""
+    def __init__(self):
+        self.futures = []
+
+    def send(self, chat_id, text, **kwargs):
+        fut = Future()
+        self.futures.append(fut)
+        return fut
+
+
+def test_hung_send_is_rescheduled(db, monkeypatch):
+    monkeypatch.setattr(outbox, "SEND_TIMEOUT", 0.2)
+    box = Outbox(db, HungOutbound())
+    with db.write() as w:
+        w.execute("INSERT INTO outbox (chat_id, text, next_at, created_at) VALUES (1, 'hi', 0, 0)")
+
+    started = time.monotonic()
+    assert box.drain() == 1
+    assert time.monotonic() - started < 2
+
+    attempts, next_at, error, status = db.fetchone("SELECT attempts, next_at, last_error, status FROM outbox")
+    assert (attempts, status) == (1, "Pending")
+    assert "timed out" in error
+    # lease নয়, সাধারণ backoff
+    assert next_at - time.time() <= outbox.BACKOFF
+    assert box.outbound.futures[0].cancelled()
+    assert box.retried == 1 and box.pending() == 0
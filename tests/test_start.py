@@ -0,0 +1,15 @@
+import logging
+import sqlite3
+
+
+def test_failed_signup_is_logged(app, message, monkeypatch, caplog):
+    def broken(fn):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(app.db, "run", broken)
+    with caplog.at_level(logging.ERROR, logger="bot"):
+        app.bot.process_new_updates([message(70_001, "/start")])
+
+    record, = [r for r in caplog.records if r.name == "bot"]
+    assert record.getMessage() == "Signup 70001 failed"
+    assert record.exc_info[0] is sqlite3.OperationalError
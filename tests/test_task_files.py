@@ -0,0 +1,63 @@
+import zipfile
+
+import pytest
+from openpyxl import Workbook
+
+from task_files import check_row, parse_workbook
+
+PASSWORD = "secret123"
+
+
+def _workbook(path, *sheets):
+    """প্রতিটি sheet = সারির লিস্ট; openpyxl দিয়ে লোকালি তৈরি .xlsx।"""
+    wb = Workbook()
+    wb.remove(wb.active)
+    for i, rows in enumerate(sheets):
+        ws = wb.create_sheet(f"Sheet{i + 1}")
+        for row in rows:
+            ws.append(row)
+    wb.save(path)
+    return str(path)
+
+
+@pytest.mark.parametrize("values, expected", [
+    (("User.Name+tag@Gmail.com", PASSWORD), "username@gmail.com"),
+    (("1", "a.b@googlemail.com", None, PASSWORD), "ab@gmail.com"),
+    (("user@gmail.com", "short"), False),              # পাসওয়ার্ড ছোট
+    (("user@gmail.com",), False),                      # পাসওয়ার্ড নেই
+    (("user@yahoo.com", PASSWORD), False),             # Gmail নয়
+    (("not an @ddress", PASSWORD), False),
+    (("Email", "Password"), None),                     # হেডার
+    ((None, "", "  "), None),                          # ফাঁকা
+    (("hello", "world"), False),
+])
+def test_check_row(values, expected):
+    assert check_row(values) == expected
+
+
+def test_parse_workbook_rows(tmp_path):
+    path = _workbook(tmp_path / "task.xlsx", [
+        ("Gmail", "Password"),
+        ("first@gmail.com", PASSWORD),
+        (None, None),
+        ("second@gmail.com", "short"),
+        ("third@outlook.com", PASSWORD),
+        (),
+        ("fourth@gmail.com", PASSWORD),
+    ])
+    assert parse_workbook(path) == (["first@gmail.com", "fourth@gmail.com"], 2)
+
+
+def test_parse_workbook_reads_every_sheet(tmp_path):
+    path = _workbook(tmp_path / "task.xlsx",
+                     [("Email", "Pass"), ("a@gmail.com", PASSWORD)],
+                     [("b@gmail.com", PASSWORD), ("bad@gmail.com", "x")],
+                     [])
+    assert parse_workbook(path) == (["a@gmail.com", "b@gmail.com"], 1)
+
+
+def test_parse_workbook_rejects_non_xlsx(tmp_path):
+    path = tmp_path / "fake.xlsx"
+    path.write_bytes(b"not a zip file at all")
+    with pytest.raises(zipfile.BadZipFile):
+        parse_workbook(str(path))
@@ -0,0 +1,137 @@
+import hmac
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import telebot
+
+log = logging.getLogger(__name__)
+
+# ==============================
+# WEBHOOK SERVER
+# ==============================
+# Telegram থেকে আসা আপডেট একটি bounded queue তে রাখা হয় এবং সাথে সাথে 200
+# ফেরত দেওয়া হয়। queue ভর্তি থাকলে 503 — Telegram পরে আবার পাঠাবে
+# (backpressure)। আলাদা worker থ্রেডগুলো queue থেকে নিয়ে
+# bot.process_new_updates চালায়।
+# secret ছাড়া কোনো আপডেট নেওয়া হয় না (নইলে যে কেউ ADMIN_ID এর নামে আপডেট
+# পাঠাতে পারত) — WEBHOOK_SECRET না থাকলে run_webhook নিজেই একটি বানিয়ে
+# set_webhook এ দেয়।
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "127.0.0.1")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_QUEUE = int(os.getenv("WEBHOOK_QUEUE", "1000"))
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "8"))
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+MAX_BODY = 1 << 20
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "bot-webhook"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _reply(self, code: int):
+        self.send_response(code)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        hook = self.server.hook
+        if self.path != hook.path:
+            return self._reply(404)
+        if not hmac.compare_digest(self.headers.get(SECRET_HEADER, ""), hook.secret):
+            return self._reply(403)
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_BODY:
+            return self._reply(400)
+        try:
+            update = telebot.types.Update.de_json(json.loads(self.rfile.read(length)))
+        except Exception:
+            return self._reply(400)
+
+        try:
+            hook.updates.put_nowait(update)
+        except queue.Full:
+            hook.dropped += 1
+            return self._reply(503)
+        self._reply(200)
+
+
+class WebhookServer:
+    def __init__(self, bot: telebot.TeleBot, secret: str,
+                 host: str = WEBHOOK_HOST, port: int = WEBHOOK_PORT, path: str = "/webhook",
+                 queue_size: int = WEBHOOK_QUEUE, workers: int = WEBHOOK_WORKERS):
+        self.bot = bot
+        # আমাদের worker রাই হ্যান্ডলার চালাবে, তাই bot এর নিজস্ব thread pool লাগবে না
+        self.bot.threaded = False
+        if not secret:
+            raise ValueError("webhook secret is required")
+        self.secret = secret
+        self.path = path
+        self.updates = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.hook = self
+        self._workers = [threading.Thread(target=self._work, daemon=True, name=f"webhook-{i}")
+                         for i in range(workers)]
+
+    @property
+    def address(self):
+        return self.httpd.server_address
+
+    def _work(self):
+        while True:
+            update = self.updates.get()
+            if update is None:
+                return
+            try:
+                self.bot.process_new_updates([update])
+            except Exception:
+                log.exception("Update %s failed", update.update_id)
+
+    def start(self):
+        """ব্যাকগ্রাউন্ডে সার্ভার চালু করে (লোকাল টেস্ট/ফেক ক্লায়েন্টের জন্য সুবিধাজনক)।"""
+        for t in self._workers:
+            t.start()
+        threading.Thread(target=self.httpd.serve_forever, daemon=True, name="webhook-http").start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for _ in self._workers:
+            self.updates.put(None)
+
+    def serve_forever(self):
+        for t in self._workers:
+            t.start()
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.stop()
+
+
+def run_webhook(bot: telebot.TeleBot):
+    secret = WEBHOOK_SECRET
+    if not secret:
+        if not WEBHOOK_URL:
+            # webhook অন্য কোথাও সেট করা, কিন্তু কোন secret দিয়ে তা জানি না — খোলা রেখে চালাব না
+            raise SystemExit("❌ --webhook: WEBHOOK_SECRET অথবা WEBHOOK_URL (secret নিজে বানানো হবে) দিন")
+        secret = secrets.token_urlsafe(32)
+    server = WebhookServer(bot, secret)
+    if WEBHOOK_URL:
+        bot.remove_webhook()
+        bot.set_webhook(url=WEBHOOK_URL.rstrip("/") + server.path, secret_token=secret, max_connections=100)
+    host, port = server.address
+    print(f"🌐 Webhook listening on http://{host}:{port}{server.path}")
+    server.serve_forever()